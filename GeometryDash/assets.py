@@ -0,0 +1,124 @@
+import hashlib  # Makes a short "fingerprint" of each image file
+import os  # For building file paths
+import tempfile  # A folder where we can keep the scaled images between runs
+from collections import OrderedDict  # A dictionary that remembers the order things were used in
+
+import pygame
+
+# ============================================================================
+# ASSETS - load images only when they are needed, and scale each one only once
+# ============================================================================
+# The images live next to this file, so the game finds them whichever folder
+# it is started from. Nothing is loaded until something is drawn with it, so
+# headless runs, the trainer and the benchmarks never touch an image at all.
+#
+# The big images (the ground is 1249 x 1280) take a while to load and shrink,
+# so every scaled copy is also saved in a cache folder on disk. Next time the
+# game starts it reads the small copy straight back instead. The cache files
+# are named after a fingerprint (hash) of the original image and the size,
+# so changing a picture automatically makes new copies.
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CACHE_FOLDER = os.path.join(tempfile.gettempdir(), "geometry_dash_sprites")
+
+
+class AssetManager:
+    """
+    Loads images from `folder` on first use and hands out scaled copies.
+
+    image(name) gives the full size image (or None if the file is missing).
+    scaled(name, w, h) gives it resized to (w, h). The last `max_scaled` sizes
+    are kept in memory, and every size ever made is kept in `cache_folder`
+    (set cache_folder=None to turn the disk cache off).
+    """
+    def __init__(self, folder=HERE, cache_folder=DEFAULT_CACHE_FOLDER, max_scaled=256):
+        self.folder = folder
+        self.cache_folder = cache_folder
+        self.max_scaled = max_scaled
+        self._images = {}  # name -> full size Surface, or None if there is no such file
+        self._hashes = {}  # name -> fingerprint of the file, or None if there is no such file
+        self._scaled = OrderedDict()  # (name, w, h) -> scaled Surface, least recently used first
+        self.disk_hits = 0  # How many scaled copies came from the disk cache
+        self.misses = 0  # How many had to be scaled from the full image
+
+    def path(self, name):
+        return os.path.join(self.folder, name)
+
+    def _ready(self, surf):
+        # convert_alpha() makes drawing much faster (and transparent parts work),
+        # but it needs a window. Without one the image is used as it is
+        if pygame.display.get_surface() is not None:
+            return surf.convert_alpha()
+        return surf
+
+    def image(self, name):
+        # --- The full size image, loaded the first time it is asked for --- #
+        if name not in self._images:
+            try:
+                self._images[name] = self._ready(pygame.image.load(self.path(name)))
+            except (IOError, pygame.error):
+                self._images[name] = None  # If the file doesn't exist, draw shapes instead
+        return self._images[name]
+
+    def fingerprint(self, name):
+        # --- A hash of the image file, so the disk cache knows when a picture changed --- #
+        if name not in self._hashes:
+            try:
+                with open(self.path(name), "rb") as f:
+                    self._hashes[name] = hashlib.sha1(f.read()).hexdigest()[:16]
+            except IOError:
+                self._hashes[name] = None
+        return self._hashes[name]
+
+    def scaled(self, name, w, h):
+        # --- The image resized to (w, h), or None if there is no such image --- #
+        key = (name, int(w), int(h))
+        sprite = self._scaled.get(key)
+        if sprite is not None:
+            self._scaled.move_to_end(key)
+            return sprite
+        sprite = self._load_scaled(*key)
+        if sprite is None:
+            return None
+        self._scaled[key] = sprite
+        if len(self._scaled) > self.max_scaled:
+            self._scaled.popitem(last=False)  # Forget the copy that was used longest ago
+        return sprite
+
+    def _load_scaled(self, name, w, h):
+        fingerprint = self.fingerprint(name)
+        if fingerprint is None:
+            return None
+        cache_path = None
+        if self.cache_folder is not None:
+            # Raw pixels (not PNG) so reading them back needs no decoding at all
+            cache_path = os.path.join(self.cache_folder, f"{fingerprint}_{w}x{h}.rgba")
+            try:
+                with open(cache_path, "rb") as f:
+                    data = f.read()
+                if len(data) == w * h * 4:
+                    self.disk_hits += 1
+                    return self._ready(pygame.image.frombytes(data, (w, h), "RGBA"))
+            except IOError:
+                pass  # Not made yet
+        image = self.image(name)
+        if image is None:
+            return None
+        self.misses += 1
+        sprite = pygame.transform.scale(image, (w, h))
+        if cache_path is not None:
+            try:
+                os.makedirs(self.cache_folder, exist_ok=True)
+                # Write to a temporary name first so a half-written file is never read
+                partial = f"{cache_path}.{os.getpid()}.tmp"
+                with open(partial, "wb") as f:
+                    f.write(pygame.image.tobytes(sprite, "RGBA"))
+                os.replace(partial, cache_path)
+            except OSError:
+                pass  # The cache is only there to save time - the game works without it
+        return sprite
+
+    def clear(self):
+        # --- Forget everything in memory (the disk cache stays) --- #
+        self._images.clear()
+        self._hashes.clear()
+        self._scaled.clear()
@@ -0,0 +1,191 @@
+# ============================================================================
+# BENCHMARKS - how fast are the different parts of the game?
+# ============================================================================
+# Run one of these from inside the GeometryDash folder:
+#     python benchmark.py collisions
+#     python benchmark.py memory
+#     python benchmark.py startup
+#     python benchmark.py reach
+import gc  # To watch the garbage collector
+import random  # To scatter objects across the level
+import sys  # To read which benchmark to run
+import tempfile  # A throwaway folder for the sprite cache
+import time  # To time things
+import tracemalloc  # To measure how much memory Python is using
+from collections import deque  # For the pattern of obstacles
+
+import assets  # Loads and scales the images
+import main  # The game itself (importing it does not open a window)
+import world  # The object store
+
+
+def time_per_call(func, repeats):
+    # --- Average time for one call of func, in microseconds --- #
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - start) / repeats * 1_000_000
+
+
+def bench_collisions(sizes=(10, 100, 1000, 10000, 100000), repeats=2000):
+    """
+    Compare finding the objects that might touch the player:
+    - every object: look at all of them (what the game used to do)
+    - broadphase:   binary search the sorted world (World.near)
+    The broadphase time should stay flat however many objects there are.
+    """
+    print(f"{'objects':>8} {'every object (us)':>18} {'broadphase (us)':>16}")
+    player = main.Player(80, main.GROUND_Y - 60, 60)
+    left, right = player.rect.left, player.rect.right
+    for n in sizes:
+        random.seed(n)
+        level = world.World()
+        # Objects scattered along a level that is longer when there are more of them
+        for _ in range(n):
+            kind = random.choice((world.SPIKE, world.PLATFORM, world.JUMP_PAD))
+            level.add(kind, random.uniform(0, n * 40), main.GROUND_Y - 60,
+                      random.randint(40, 240), 60)
+
+        def every_object():
+            return [(kind, x, y, w, h)
+                    for kind in (world.SPIKE, world.PLATFORM, world.JUMP_PAD)
+                    for x, y, w, h in level.boxes(kind)
+                    if x <= right and x + w >= left]
+
+        def broadphase():
+            return level.near(left, right)
+
+        assert sorted(every_object()) == sorted(broadphase())  # Both must find the same objects
+        slow = time_per_call(every_object, max(1, repeats * 10 // n))
+        fast = time_per_call(broadphase, repeats)
+        print(f"{n:>8} {slow:>18.1f} {fast:>16.1f}")
+
+
+def bench_memory(minutes=30, draw=False):
+    """
+    Play a simulated game for a long time (30 minutes of physics steps by default)
+    and check that memory stays flat and the garbage collector never stalls a frame.
+    A simple bot jumps every half second and restarts when it dies.
+    With draw=True every frame is also drawn onto an off-screen surface.
+    """
+    frames = int(minutes * 60 * main.PHYSICS_HZ)
+    pauses = []  # How long each garbage collection took
+    started = {}
+
+    def watch_gc(phase, info):
+        if phase == "start":
+            started["t"] = time.perf_counter()
+        else:
+            pauses.append((info["generation"], time.perf_counter() - started["t"]))
+
+    surf = None
+    if draw:
+        main.pygame.font.init()
+        surf = main.pygame.Surface((main.SCREEN_WIDTH, main.SCREEN_HEIGHT))
+    runner = main.HeadlessRunner(seed=1)
+    jump_every = main.PHYSICS_HZ // 2
+    keys_jump, keys_restart, no_keys = [main.pygame.K_SPACE], [main.pygame.K_r], []
+    gc.collect()
+    tracemalloc.start()
+    gc.callbacks.append(watch_gc)
+    samples = []  # Memory in use every simulated minute
+    start = time.perf_counter()
+    try:
+        for frame in range(frames):
+            if not runner.game.running:
+                keys = keys_restart
+            elif frame % jump_every == 0:
+                keys = keys_jump
+            else:
+                keys = no_keys
+            runner.step(keys)
+            if surf is not None:
+                runner.game.draw(surf)
+            if frame % (60 * main.PHYSICS_HZ) == 0:
+                samples.append(tracemalloc.get_traced_memory()[0])
+        elapsed = time.perf_counter() - start
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        gc.callbacks.remove(watch_gc)
+        tracemalloc.stop()
+
+    print(f"simulated {frames} frames ({minutes} minutes) in {elapsed:.1f}s")
+    # Compare with the memory after 1 minute (a shorter run only has the sample from the start)
+    early = len(samples) > 1
+    print(f"memory {'after 1 minute' if early else 'at the start'}: {samples[early] / 1024:.1f} KiB, "
+          f"at the end: {current / 1024:.1f} KiB, peak: {peak / 1024:.1f} KiB")
+    print(f"live objects in the world at the end: {len(runner.game.world)} "
+          f"(rows allocated: {len(runner.game.world.x)})")
+    for generation in (0, 1, 2):
+        times = [t for g, t in pauses if g == generation]
+        if times:
+            print(f"gc generation {generation}: {len(times)} collections, "
+                  f"longest {max(times) * 1000:.3f} ms")
+        else:
+            print(f"gc generation {generation}: no collections")
+
+
+def bench_startup(repeats=5):
+    """
+    Time getting every sprite a game needs at the start, like a fresh run does:
+    - no disk cache: load each full size image and scale it
+    - disk cache:    read the scaled copies saved by an earlier run
+    """
+    sprites = [(main.PLAYER_IMAGE, 60, 60), (main.GROUND_IMAGE, 150, 150),
+               (main.JUMP_PAD_IMAGE, 40, 10), (main.TRIANGLE_IMAGE, 50, 50)]
+    sprites += [(main.TRIANGLE_IMAGE, w, h) for w in range(45, 76, 10) for h in range(60, 111, 10)]
+
+    def load_all(cache_folder):
+        manager = assets.AssetManager(cache_folder=cache_folder)  # A new one remembers nothing
+        for name, w, h in sprites:
+            manager.scaled(name, w, h)
+        return manager
+
+    with tempfile.TemporaryDirectory() as folder:
+        load_all(folder)  # Fill the disk cache
+        cold = time_per_call(lambda: load_all(None), repeats) / 1000
+        warm = time_per_call(lambda: load_all(folder), repeats) / 1000
+    print(f"{len(sprites)} sprites  no disk cache: {cold:.1f} ms  disk cache: {warm:.1f} ms")
+
+
+def bench_reach(spawns=2000, speeds=(450, 700, 900)):
+    """
+    Generate lots of chunks and time the check that each one can be cleared
+    (see reach.py), at the normal game speed and at faster ones.
+    "spikes only" packs spikes much closer together, so lots of them need moving.
+    """
+    class Nowhere:
+        def add(self, kind, x, y, w, h):
+            pass  # Only the checking is being timed
+
+    normal = main.GameObject.speed
+    print(f"{'speed':>6} {'pattern':>12} {'us per check':>13} {'moved':>6} {'left out':>9}")
+    try:
+        for speed in speeds:
+            for pattern in ("normal", "spikes only"):
+                main.GameObject.speed = speed
+                manager = main.ObjectManager(rng=random.Random(1))
+                if pattern == "spikes only":
+                    manager.pattern = deque(["spike"])
+                    manager.min_gap_time /= 4
+                for _ in range(spawns):
+                    manager.spawn_next(Nowhere())
+                    manager.timer = 0.0
+                print(f"{speed:>6} {pattern:>12} {manager.check_seconds / manager.checks * 1_000_000:>13.1f} "
+                      f"{manager.fixed:>6} {manager.dropped:>9}")
+    finally:
+        main.GameObject.speed = normal
+
+
+BENCHMARKS = {
+    "collisions": bench_collisions,
+    "memory": bench_memory,
+    "startup": bench_startup,
+    "reach": bench_reach,
+}
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        print(f"===== {name} =====")
+        BENCHMARKS[name]()
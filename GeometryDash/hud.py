@@ -0,0 +1,83 @@
+import pygame  # For fonts and surfaces
+from collections import OrderedDict  # A dictionary that remembers the order things were used in
+
+# ============================================================================
+# TEXT CACHE
+# ============================================================================
+class TextCache:
+    """
+    Remembers fonts and text we have already rendered.
+
+    Making a font and rendering text is slow, but most of our text is the same
+    from one frame to the next ("Best: 120" doesn't change very often).
+    So the first time we render some text we keep the picture, keyed by
+    (text, size, color), and next time we just hand the same picture back.
+
+    Only the max_items most recently used pictures are kept. When the cache is
+    full, the one that was used longest ago is thrown away ("LRU" =
+    Least Recently Used), so old scores don't pile up in memory forever.
+    """
+    def __init__(self, max_items=64, font_name=None):
+        self.max_items = max_items
+        self.font_name = font_name  # None = pygame's default font
+        self.fonts = {}  # size -> Font (there are only a few sizes, so keep them all)
+        self.images = OrderedDict()  # (text, size, color) -> rendered Surface
+        self.hits = 0  # How many times we could reuse a picture
+        self.misses = 0  # How many times we had to render a new one
+
+    def font(self, size):
+        if size not in self.fonts:
+            self.fonts[size] = pygame.font.SysFont(self.font_name, size)
+        return self.fonts[size]
+
+    def render(self, text, size, color):
+        key = (text, size, tuple(color))
+        image = self.images.get(key)
+        if image is not None:
+            self.hits += 1
+            self.images.move_to_end(key)  # Mark as the most recently used
+            return image
+        self.misses += 1
+        image = self.font(size).render(text, True, color)
+        self.images[key] = image
+        if len(self.images) > self.max_items:
+            self.images.popitem(last=False)  # Throw away the least recently used
+        return image
+
+    def clear(self):
+        self.fonts.clear()
+        self.images.clear()
+
+
+# ============================================================================
+# HUD (Heads Up Display)
+# ============================================================================
+class HUD:
+    """
+    The text drawn on top of the game.
+
+    Static lines (like the instructions) never change, so each one is
+    rendered once on the first draw and then simply copied to the screen.
+    Changing lines (like the score) go through the TextCache, so they are
+    only rendered again when their text actually changes.
+    """
+    def __init__(self, cache):
+        self.cache = cache
+        self.static_lines = []  # (text, (x, y), size, color)
+        self.static_images = None  # Rendered on the first draw (fonts need pygame.init)
+
+    def add_static(self, text, pos, size=24, color=(255, 255, 255)):
+        self.static_lines.append((text, pos, size, color))
+        self.static_images = None  # Render again next time we draw
+
+    def draw(self, surf, lines=()):
+        # --- lines = the changing text for this frame: (text, (x, y), size, color) --- #
+        if self.static_images is None:
+            self.static_images = [(self.cache.font(size).render(text, True, color), pos)
+                                  for text, pos, size, color in self.static_lines]
+        rects = []  # Where we drew, so a renderer can update just those parts
+        for image, pos in self.static_images:
+            rects.append(surf.blit(image, pos))
+        for text, pos, size, color in lines:
+            rects.append(surf.blit(self.cache.render(text, size, color), pos))
+        return rects
@@ -0,0 +1,172 @@
+import mmap  # Memory mapping - lets us read a file as if it was already in memory
+import os  # To move a finished level file into place
+import struct  # Packs numbers into bytes (and back again)
+import numpy as np  # To look at the bytes of the file as an array of records
+
+# ============================================================================
+# LEVEL FILE FORMAT
+# ============================================================================
+# A level file (.gdl) is made of three parts, one after the other:
+#
+# 1. HEADER - what is in the file
+#       magic        4 bytes   b"GDLV" so we know it really is a level file
+#       version      2 bytes
+#       generator    2 bytes   which version of main.ObjectManager made the level
+#       seed         8 bytes   the random seed the level was made from
+#       seconds      4 bytes   how many seconds of level were asked for (with the
+#                              seed, what main.generate_level was given)
+#       chunk_length 4 bytes   how many pixels of level go in one chunk
+#       length       4 bytes   how long the whole level is, in pixels, up to where
+#                              it starts again (a little past the last object)
+#       chunk_count  4 bytes
+#       record_count 4 bytes
+#
+# 2. CHUNK INDEX - (chunk_count + 1) numbers. Chunk i is made of records
+#    index[i] up to (but not including) index[i + 1]
+#
+# 3. RECORDS - one per object, sorted from left to right, 11 bytes each:
+#       x (4 bytes), y (2), width (2), height (2), kind (1)
+#    x is measured from the start of the level, so an object appears on the
+#    screen at x - (how far the player has travelled).
+MAGIC = b"GDLV"
+VERSION = 3
+HEADER = struct.Struct("<4sHHQfffII")
+RECORD = np.dtype([("x", "<f4"), ("y", "<i2"), ("w", "<u2"), ("h", "<u2"), ("kind", "u1")])
+DEFAULT_CHUNK_LENGTH = 2000.0  # About 4 seconds of level at normal speed
+
+
+# ============================================================================
+# WRITING LEVELS
+# ============================================================================
+class Recorder:
+    """
+    Looks like a World to the ObjectManager, but instead of putting objects on
+    the screen it writes down where they should go along the level.
+    Set offset to how far along the level we are before each spawn.
+    """
+    def __init__(self):
+        self.offset = 0.0
+        self.records = []  # (x along the level, y, w, h, kind)
+
+    def add(self, kind, x, y, w, h):
+        self.records.append((x + self.offset, y, w, h, kind))
+
+
+def write_level(path, records, seed, seconds, length, generator, chunk_length=DEFAULT_CHUNK_LENGTH):
+    # --- Save (x, y, w, h, kind) records as a level file split into chunks --- #
+    data = np.array(sorted(records), dtype=[("x", "f8"), ("y", "f8"), ("w", "f8"),
+                                              ("h", "f8"), ("kind", "i8")]).astype(RECORD)
+    chunk_count = max(1, int(np.ceil(length / chunk_length)))
+    # Chunk i holds every record with i * chunk_length <= x < (i + 1) * chunk_length
+    # (records past the end go in the last chunk)
+    edges = np.arange(1, chunk_count) * chunk_length
+    index = np.concatenate(([0], np.searchsorted(data["x"], edges), [len(data)])).astype("<u4")
+    # Write to a temporary name first and then move it into place, so another process
+    # opening the level never maps a half-written file (reading past its end crashes)
+    partial = path + f".tmp.{os.getpid()}"
+    with open(partial, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, generator, seed, seconds, chunk_length, length, chunk_count, len(data)))
+        f.write(index.tobytes())
+        f.write(data.tobytes())
+    os.replace(partial, path)
+
+
+# ============================================================================
+# READING LEVELS
+# ============================================================================
+class LevelReader:
+    """
+    Opens a level file without reading all of it.
+
+    The file is memory mapped: the operating system only loads the parts
+    we actually look at, so a huge level costs nothing until we get to it.
+    chunk(i) gives back the records of one chunk as plain Python tuples.
+    """
+    def __init__(self, path, generator=None):
+        # With a generator given, a level made by any other version of the generator is refused
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.generator, self.seed, self.seconds, self.chunk_length, self.length, self.chunk_count, \
+            record_count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} level file")
+        if generator is not None and self.generator != generator:
+            self.close()
+            raise ValueError(f"{path} was made by level generator {self.generator}, not {generator}")
+        offset = HEADER.size
+        # np.frombuffer doesn't copy anything - these arrays look straight into the file
+        self._index = np.frombuffer(self._map, dtype="<u4", count=self.chunk_count + 1, offset=offset)
+        offset += self._index.nbytes
+        self._records = np.frombuffer(self._map, dtype=RECORD, count=record_count, offset=offset)
+
+    def __len__(self):
+        return len(self._records)
+
+    def chunk(self, i):
+        start, end = int(self._index[i]), int(self._index[i + 1])
+        return self._records[start:end].tolist()
+
+    def close(self):
+        # The arrays must be let go before the memory map can be closed
+        self._index = self._records = None
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class LevelStream:
+    """
+    Puts objects from a level file into the World as the player reaches them.
+
+    It does the same job as the ObjectManager (and has the same update method),
+    but all the random choices were already made when the level was generated,
+    so nothing is generated while the game runs. Chunks are only read from the
+    file when the player gets to them. When the level runs out it starts again
+    from the beginning, so the game never ends.
+    """
+    def __init__(self, reader, spawn_point_x, speed):
+        self.reader = reader
+        self.spawn_point_x = spawn_point_x  # Objects appear once they are this far along the screen
+        self.speed = speed
+        self.travelled = 0.0  # How many pixels of level have scrolled past
+        self.lap_offset = 0.0  # Length of every finished lap of the level
+        self.chunk_index = 0
+        self.pending = []  # Records of the current chunk we haven't added yet
+        self.next_record = 0
+
+    def update(self, dt, game):
+        # The world hasn't scrolled yet this frame, so new objects are placed where
+        # they were at the start of the frame and then scroll along with everything else
+        placed_from = self.travelled
+        self.travelled += self.speed * dt
+        reach = self.travelled + self.spawn_point_x
+        while True:
+            if self.next_record == len(self.pending):
+                if not self._load_next_chunk():
+                    return
+                continue
+            x, y, w, h, kind = self.pending[self.next_record]
+            x += self.lap_offset
+            if x > reach:
+                return  # Not there yet
+            game.world.add(kind, x - placed_from, y, w, h)
+            self.next_record += 1
+
+    def _load_next_chunk(self):
+        if self.chunk_index == self.reader.chunk_count:
+            if len(self.reader) == 0:
+                return False  # An empty level - nothing will ever come
+            # End of the level - go around again
+            self.chunk_index = 0
+            self.lap_offset += self.reader.length
+        self.pending = self.reader.chunk(self.chunk_index)
+        self.next_record = 0
+        self.chunk_index += 1
+        return True
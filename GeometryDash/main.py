@@ -2,26 +2,42 @@
 import pygame  # The game library - handles graphics, input, sound
 import random  # For random numbers (to make obstacles unpredictable)
 import sys  # For exiting the program cleanly
+import gc  # The garbage collector - cleans up objects we don't use any more
+import time  # For measuring how fast the headless simulation runs
+import os  # For building file paths
+import tempfile  # A folder where we can save generated levels
+import argparse  # Reads the options given on the command line
 from collections import deque  # Helps us alternate obstacle patterns cleanly
 from pygame import Vector2  # Vector2 stores x and y coordinates together
-
-# ---- 0: Initialise Pygame ---- #
-pygame.init() # Get pygame library to work
+import world  # Our own file (world.py) - stores every moving object in NumPy arrays
+import hud  # Our own file (hud.py) - remembers text we already rendered
+import renderer  # Our own file (renderer.py) - only redraws the parts of the screen that changed
+import levels  # Our own file (levels.py) - saves and streams pre-generated levels
+import replay  # Our own file (replay.py) - records key presses so a game can be played again
+import profiler  # Our own file (profiler.py) - times each part of a frame
+import sweep  # Our own file (sweep.py) - finds exactly when the player touches things
+import assets  # Our own file (assets.py) - loads and scales images when they are first needed
+import reach  # Our own file (reach.py) - checks that new obstacles can be jumped over
 
 # ============================================================================
 # STEP 1: SET UP THE GAME WINDOW
 # ============================================================================
 SCREEN_WIDTH = 1000  # How wide the window is (left to right)
 SCREEN_HEIGHT = 600  # How tall the window is (top to bottom)
-# Create the actual window that will show our game
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("Simple Geometry Dash - Kids Edition")  # Title at top of window
+# The actual window is only created when main() runs (see setup_display),
+# so the game can also be imported and simulated without any window at all
 
 # ============================================================================
 # STEP 2: SET UP THE GAME CLOCK
 # ============================================================================
-clock = pygame.time.Clock() # Clock - control how fast the game runs
 FPS = 60  # FPS = Frames Per Second (how many times we redraw the screen per second) -- same as our eyesight
+# The physics always moves on in steps of exactly the same size, however fast the
+# screen is redrawn. Then jumps are the same height on every computer, and a slow
+# frame can't make the player fall straight through a platform
+PHYSICS_HZ = 60  # Physics steps per second
+FIXED_DT = 1 / PHYSICS_HZ  # The time one physics step moves the game on by
+MAX_STEPS_PER_FRAME = 5  # After a very slow frame, don't try to catch up more than this
+DIRTY_RECTS = True  # Only send the parts of the screen that changed to the window (see renderer.py)
 
 # ============================================================================
 # STEP 3: DEFINE COLORS
@@ -55,40 +71,53 @@ PLATFORM_WIDTH_RANGE = (160, 240)  # Reasonable platform widths
 SPIKE_WIDTH_RANGE = (45, 75)  # Ground spike width range
 SPIKE_HEIGHT_RANGE = (60, 110)  # Ground spike height range
 MIN_GAP_BETWEEN_OBSTACLES = 200  # Minimum spacing between any two spawns (pixels)
+CHUNK_SHIFT_STEP = 15  # How far to move a chunk that can't be cleared before checking again (pixels)
+MAX_CHUNK_SHIFT = 450  # Leave the chunk out if moving it this far still doesn't help
+PLAYER_SIZE = 60  # The player is a square this many pixels wide
+PLAYER_X = 80  # How far along the screen the player stays
 
 # ============================================================================
 # STEP 5: LOAD IMAGES (OPTIONAL)
 # ============================================================================
-# Simply try to load the image and prevent an error if the image is not found
-def try_load(path):
-    try:
-        surf = pygame.image.load(path).convert_alpha()  # convert_alpha makes transparent parts work
-        return surf
-    except IOError:
-        return None # If something goes wrong (file doesn't exist), return None
-
-PLAYER_IMG = try_load("player.png")
-GROUND_IMG = try_load("ground.png")
-TRIANGLE_IMG = try_load("triangle.png")
+# Images are loaded from the GeometryDash folder the first time something is drawn
+# with them, so headless runs never load any. Each scaled copy is made only once
+# and also saved to a cache folder on disk, so the next start is quicker (see assets.py)
+PLAYER_IMAGE = "player.png"
+GROUND_IMAGE = "ground.png"
+TRIANGLE_IMAGE = "triangle.png"
 ##########################################
-JUMP_PAD_IMG = try_load("jump_pad.png")
+JUMP_PAD_IMAGE = "jump_pad.png"
 ##########################################
+ASSETS = assets.AssetManager()
+
+def setup_display():
+    # Start pygame and create the actual window
+    pygame.init() # Get pygame library to work
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption("Simple Geometry Dash - Kids Edition")  # Title at top of window
+    return screen
 
 # ============================================================================
 # STEP 6: UTILS FUNCTION
 # ============================================================================
+# Making fonts and rendering text is slow, so we keep what we already made
+TEXT_CACHE = hud.TextCache(max_items=64)
+
 def draw_text(surf, text, x, y, size=24, color=WHITE):
-    # Create a font object (the style of text)
-    font = pygame.font.SysFont(None, size)
-    # Render the text (turn it into an image we can draw)
-    img = font.render(text, True, color)
+    # Render the text (turn it into an image we can draw) - or reuse the
+    # image from last time if we already rendered this text in this size and color
+    img = TEXT_CACHE.render(text, size, color)
     # Draw it on the screen (blit = "copy pixels onto screen")
-    surf.blit(img, (x, y))
+    return surf.blit(img, (x, y))
 
 # ============================================================================
 # STEP 7: PLAYER CLASS
 # ============================================================================
 class Player:
+    # __slots__ lists every variable a Player has. Python then doesn't need a
+    # dictionary for each Player, so it is smaller and faster to create
+    __slots__ = ("pos", "size", "rect", "vel_y", "on_ground", "prev_y", "path")
+
     def __init__(self, x: int, y: int, size):
         # Store position as a Vector2 - this is like storing (x, y) together
         self.pos = Vector2(x, y)  # Current position of the player
@@ -103,14 +132,8 @@ class Player:
         self.vel_y = 0.0  # Vertical velocity (how fast moving up/down)
 
         self.on_ground = True  # Are we touching the ground? (True = yes, False = no)
-
-        # ===== IMAGE/SPRITE =====
-        # If we have an image file, use it. Otherwise, we'll draw a rectangle
-        if PLAYER_IMG:
-            # Scale the image to match the player's size
-            self.image = pygame.transform.scale(PLAYER_IMG, (size, size))
-        else:
-            self.image = None  # No image, so we'll draw a shape instead
+        self.prev_y = float(y)  # Where we were before the last update (for smooth drawing)
+        self.path = [(0.0, 0.0, float(y), 0.0, 0.0)]  # How we moved during the last step (see update)
 
     #########################################################################
     def jump(self, velocity: int):
@@ -120,202 +143,344 @@ class Player:
             self.on_ground = False  # We're now in the air
     #########################################################################
 
-    def update(self, dt, game=None, platforms=None):
-        # What we do to the player for every frame
-        # ===== APPLY GRAVITY =====
-        # Gravity pulls the player down, so we add it to velocity (it's a type of acceleration)
-        if self.on_ground == False:
-            self.vel_y += GRAVITY * dt # Apply gravity only if you are not on the ground
-
-        # todo
-
-        # ===== UPDATE POSITION =====
-        # Move the player based on velocity
-        # If vel_y is negative (going up), pos.y decreases (moves up)
-        # If vel_y is positive (going down), pos.y increases (moves down)
-        self.pos.y += self.vel_y * dt
-
-        # ===== CHECK PLATFORM COLLISIONS =====
-        # First check if we're landing on a platform
-        self.on_ground = False  # Start by assuming we're in the air
-
-        if platforms:
+    def update(self, dt, game=None, platforms=()):
+        # What we do to the player for every physics step.
+        # platforms = (x, y, w, h) of the platforms we might land on, where they are at
+        # the START of the step. They slide left at GameObject.speed during the step.
+        #
+        # Instead of moving and then checking "are we inside a platform now?", we work out
+        # exactly WHEN in the step we land (see sweep.py). Then even at a huge game speed
+        # or a long step we can never fall through a platform or miss the edge of one.
+        self.prev_y = self.pos.y
+        speed = GameObject.speed
+        left, right = self.pos.x, self.pos.x + self.size
+        platforms = list(platforms)
+        y, v, t = self.pos.y, self.vel_y, 0.0
+        self.path = []  # Pieces of our path this step: (start, end, y, v, gravity) - see sweep.py
+        self.on_ground = False
+
+        while True:
+            # ===== WHEN DO WE LAND? =====
+            # The ground is always there. A platform only counts if it is under us
+            # at the moment our feet come down to its top
+            land_in = sweep.reach_time(y + self.size, v, GRAVITY, GROUND_Y, dt - t)
+            support = None  # None = the ground
             for platform in platforms:
-                if self.rect.colliderect(platform.rect) and self.vel_y >= 0:
-                    self.vel_y = 0.0
-                    self.pos.y = platform.rect.top - self.size + 1
-                    self.on_ground = True
-                    print("Collide!")
-                    break
-
-        # ===== CHECK IF HITTING THE GROUND =====
-        # Only check ground if we're not on a platform
-        if not self.on_ground:
-            ground_top = GROUND_Y - self.size  # Top of ground minus player height
-
-            if self.pos.y >= ground_top:  # If we've fallen through or hit the ground
-                self.pos.y = ground_top
-                self.on_ground = True
-                self.vel_y = 0.0  # Stop falling
+                px, top, pw, _ = platform
+                arrive = sweep.reach_time(y + self.size, v, GRAVITY, top, dt - t)
+                if arrive is None or (land_in is not None and arrive >= land_in):
+                    continue
+                px -= speed * (t + arrive)  # Where the platform is when we get down to it
+                if px < right and px + pw > left:
+                    land_in, support = arrive, platform
+
+            if land_in is None:
+                # ===== IN THE AIR FOR THE REST OF THE STEP =====
+                # Gravity pulls the player down, so it changes the velocity (it's a type of acceleration)
+                # and the velocity changes the position (negative = up, positive = down)
+                self.path.append((t, dt, y, v, GRAVITY))
+                y, v = sweep.height(y, v, GRAVITY, dt - t), v + GRAVITY * (dt - t)
+                break
+
+            # ===== LAND ON THE GROUND OR A PLATFORM =====
+            self.path.append((t, t + land_in, y, v, GRAVITY))
+            t += land_in
+            y, v = (GROUND_Y if support is None else support[1]) - self.size, 0.0
+            self.on_ground = True
+            # The ground never ends, but a platform slides away from under us
+            # once its right edge goes past our left side
+            leave = dt if support is None else (support[0] + support[2] - left) / speed
+            if leave >= dt:
+                self.path.append((t, dt, y, 0.0, 0.0))  # Standing still until the end of the step
+                break
+            self.path.append((t, leave, y, 0.0, 0.0))
+            t = max(t, leave)  # Off the edge - start falling from here
+            self.on_ground = False
+            platforms.remove(support)  # Can't land on this one again
+
+        self.pos.y, self.vel_y = y, v
 
         # ===== UPDATE COLLISION RECTANGLE =====
         # Update the invisible collision box to match where the player actually is
         # We use int() because pygame needs whole numbers for rectangles
         self.rect.topleft = (int(self.pos.x), int(self.pos.y))
 
-    def draw(self, surf):
-        if self.image:
+    def draw(self, surf, alpha=1.0):
+        # alpha = how far we are between the last two physics steps (0 = previous, 1 = latest)
+        y = int(self.prev_y + (self.pos.y - self.prev_y) * alpha)
+        # ===== IMAGE/SPRITE =====
+        # If we have an image file, use it (scaled to the player's size). Otherwise, we'll draw a rectangle
+        image = ASSETS.scaled(PLAYER_IMAGE, self.size, self.size)
+        if image:
             # If we have an image, draw it
-            surf.blit(self.image, self.rect.topleft)
+            return surf.blit(image, (self.rect.x, y))
         else:
             # No image, so draw a colored rectangle instead
-            pygame.draw.rect(surf, OBSTACLE_COLOR, self.rect)
+            return pygame.draw.rect(surf, OBSTACLE_COLOR, (self.rect.x, y, self.size, self.size))
 
 # ============================================================================
 # STEP 8: GAME OBJECT CLASS (Parent Class)
 # ============================================================================
 class GameObject:
-    speed = GAME_SPEED
-    def __init__(self, pos: Vector2, size: Vector2, sprite):
-        self.pos = pos
-        self.size = size
-        self.sprite = sprite
-
-    def update(self, dt):
-        """
-                Move the obstacle left across the screen.
-                dt = time since last frame (for smooth movement)
-                """
-        # Move left (subtract because x decreases as we go left)
-        # Using dt ensures smooth movement at any framerate
-        self.pos.x -= self.speed * dt
-        # No rect hitbox to update; triangle points calculated on the fly
-
-    def off_screen(self):
-        return self.pos.x + self.size.x < 0  # If right edge is past left side of screen
+    """
+    Spikes, platforms and jump pads don't store their own position any more.
+    Every one of them is a row of numbers (x, y, width, height, kind) in the
+    World (see world.py), so the whole level can move in one go.
 
-    def draw(self, surf):
-        draw_x = int(self.pos.x)  # Use actual position for responsive movement
-        if type(self.sprite) == pygame.surface.Surface:
+    These classes describe a KIND of object: what number it has in the world
+    and how to draw one of them from its row.
+    """
+    speed = GAME_SPEED
+    kind = None  # Which World kind number this class draws
+    color = OBSTACLE_COLOR  # Used when there is no image
+
+    image = None  # The file name of the picture for this kind of object (if any)
+
+    @classmethod
+    def sprite(cls, w, h):
+        # --- The image scaled to (w, h), or None if there is no image --- #
+        if cls.image is None:
+            return None
+        return ASSETS.scaled(cls.image, w, h)  # Each size is only scaled once (see assets.py)
+
+    @classmethod
+    def draw(cls, surf, x, y, w, h):
+        sprite = cls.sprite(w, h)
+        if sprite:
             # Draw the image if we have one
-            surf.blit(self.sprite, (draw_x, int(self.pos.y)))
+            return surf.blit(sprite, (int(x), int(y)))
         else:
-            color = self.sprite[2]
-            # Draw the triangle
-            if self.sprite[0] == "Polygon":
-                pygame.draw.polygon(surf, color, (self.sprite[1]))
-            elif self.sprite[0] == "Rectangle":
-                rect = self.sprite[1]
-                pygame.draw.rect(surf, color, rect)
+            return pygame.draw.rect(surf, cls.color, (int(x), int(y), int(w), int(h)))
 
 # ============================================================================
 # STEP 9: SPIKE CLASS
 # ============================================================================
 class Spike(GameObject):
-    def __init__(self, x, width, height):
-        if TRIANGLE_IMG:
-            self.image = pygame.transform.scale(TRIANGLE_IMG, (width, height))
-        else:
-            # Draw a triangle using three points
-            # Point 1: Top center (the spike point)
-            p1 = (int(self.pos.x + self.size.x / 2), int(self.pos.y))
-            # Point 2: Bottom left corner
-            p2 = (int(self.pos.x), int(self.pos.y + self.size.y))
-            # Point 3: Bottom right corner
-            p3 = (int(self.pos.x + self.size.x), int(self.pos.y + self.size.y))
-            self.image = ["Polygon", (p1, p2, p3), OBSTACLE_COLOR]
-        super().__init__(Vector2(x, GROUND_Y - height), Vector2(width, height), self.image)
+    kind = world.SPIKE
+    image = TRIANGLE_IMAGE
 
+    @staticmethod
+    def points(x, y, w, h):
         # # ===== HITBOX =====
         # Triangle hitbox points for accurate collision
-        self.get_p1 = lambda: (int(self.pos.x + self.size.x / 2), int(self.pos.y))  # top
-        self.get_p2 = lambda: (int(self.pos.x), int(self.pos.y + self.size.y))  # bottom left
-        self.get_p3 = lambda: (int(self.pos.x + self.size.x), int(self.pos.y + self.size.y))  # bottom right
+        return ((int(x + w / 2), int(y)),  # top
+                (int(x), int(y + h)),  # bottom left
+                (int(x + w), int(y + h)))  # bottom right
+
+    @classmethod
+    def draw(cls, surf, x, y, w, h):
+        if cls.sprite(w, h):
+            return super().draw(surf, x, y, w, h)
+        else:
+            # Draw a triangle using the three hitbox points
+            return pygame.draw.polygon(surf, cls.color, cls.points(x, y, w, h))
 
 # ============================================================================
 # STEP 10: PLATFORM CLASS
 # ============================================================================
 class Platform(GameObject):
-    def __init__(self, x, y, width, height):
-        self.rect = pygame.Rect(int(x), int(y), width, height) # Hitbox
-        super().__init__(Vector2(x, y), Vector2(width, height), ["Rectangle", self.rect, GROUND_COLOR])
-
-    def update(self, dt):
-        super().update(dt) # don't override
-        self.rect.x = int(self.pos.x)
+    kind = world.PLATFORM
+    color = GROUND_COLOR
 
 ##########################################################################################
 class JumpPad(GameObject):
-    def __init__(self, pos: Vector2, size: Vector2):
-        self.rect = pygame.Rect(int(pos.x), int(pos.y), size.x, size.y)  # Hitbox
-        # Use image if found otherwise create a rectangle
-        if JUMP_PAD_IMG:
-            image = pygame.transform.scale(JUMP_PAD_IMG, (size.x, size.y))
-        else:
-            image = ["Rectangle", self.rect, YELLOW]
-        super().__init__(pos, size, image)
-
-    def update(self, dt):
-        super().update(dt) # don't override
-        self.rect.x = int(self.pos.x)
+    kind = world.JUMP_PAD
+    color = YELLOW
+    image = JUMP_PAD_IMAGE  # Use image if found otherwise draw a rectangle
 ##########################################################################################
 
 # ============================================================================
 # STEP 11: MANAGING GAME OBJECTS
 # ============================================================================
+# Goes up whenever ObjectManager makes different levels from the same seed, so
+# saved levels (and replays recorded on them) from an older version aren't used
+LEVEL_GENERATOR = 3  # 2: chunks are moved or dropped so they can always be cleared
+                     # 3: the level is long enough to loop back to its start
+
 class ObjectManager:
-    def __init__(self):
+    def __init__(self, rng=random):
+        # rng is where the random numbers come from. Give it random.Random(seed)
+        # and the same seed will always make the same level
+        self.rng = rng
         self.pattern = deque(["spike", "platform"])  # simple alternating pattern
         self.min_gap_time = MIN_GAP_BETWEEN_OBSTACLES / GAME_SPEED
         self.timer = 0.0  # spawn immediately when the game starts
+        self.wait = 0.0  # What the timer was set to at the last spawn
         self.spawn_point_x = SCREEN_WIDTH + 50
+        # Checks that every chunk can be cleared (see _make_clearable)
+        speed = GameObject.speed
+        self.solver = reach.Solver(reach.tables_for(GRAVITY, JUMP_VELOCITY, JUMP_PAD_VELOCITY, speed,
+                                                    PLAYER_SIZE, speed * FIXED_DT),
+                                   GROUND_Y, Spike.kind, Platform.kind, JumpPad.kind)
+        self.previous = []  # Recent objects, measured from the spawn point at the last spawn
+        self.route = []  # One way through them (see reach.Solver)
+        self.travelled = 0.0  # How far the level has moved since we started
+        self.fixed = 0  # How many chunks had to be moved along
+        self.dropped = 0  # How many had to be left out
+        self.checks = 0
+        self.check_seconds = 0.0  # Time spent checking chunks
 
     def update(self, dt, game):
         # --- Check whether the game has started --- #
         self.timer -= dt
         if self.timer > 0:
             return  # Greater than 0 so don't run the game
+        self.spawn_next(game.world)
+
+    def spawn_next(self, level):
         # --- Alternate spikes and platform --- #
         next_type = self.pattern[0]
         self.pattern.rotate(-1)  # alternate spike -> platform -> spike ...
         if next_type == "spike":
             ################################################################
-            game.game_objects["obstacles"].append(self._spawn_spike())
+            chunk = self._spike_chunk()
         else:
-            platform_obj, spike_obj, jump_pad_obj = self._spawn_platform()
-            game.game_objects["platforms"].append(platform_obj)
-            game.game_objects["obstacles"].append(spike_obj)
-            game.game_objects["jump_pads"].append(jump_pad_obj)
+            chunk = self._platform_chunk()
             ################################################################
+        # --- Make sure the chunk can be cleared, moving it further along if not --- #
+        shift = self._make_clearable(chunk)
+        if shift is not None:
+            for kind, x, y, w, h in chunk:
+                level.add(kind, self.spawn_point_x + x + shift, y, w, h)
         # --- Reset timer with a little randomness but never below the minimum gap --- #
-        extra_time = random.uniform(0.1, 0.5) * self.min_gap_time
-        self.timer = self.min_gap_time + extra_time
+        extra_time = self.rng.uniform(0.1, 0.5) * self.min_gap_time
+        self.timer = self.wait = self.min_gap_time + extra_time + (shift or 0) / GameObject.speed
 
-    def _spawn_spike(self, width=-1, height=-1):
+    def _spike_chunk(self, width=-1, height=-1):
         # Randomise the width and height of the spike if it is not under the platform using random.randint(number_range)
-        width = random.randint(*SPIKE_WIDTH_RANGE) if width == -1 else width
-        height = random.randint(*SPIKE_HEIGHT_RANGE) if height == -1 else height
-        x = SCREEN_WIDTH + 50  # spawn just off the right edge
-        return Spike(self.spawn_point_x, width, height)
-
-    def _spawn_platform(self):
-        width = random.randint(*PLATFORM_WIDTH_RANGE) # Randomise the width of the platform
+        width = self.rng.randint(*SPIKE_WIDTH_RANGE) if width == -1 else width
+        height = self.rng.randint(*SPIKE_HEIGHT_RANGE) if height == -1 else height
+        # spawn just off the right edge
+        # (x is measured from the spawn point - see spawn_next)
+        return [(Spike.kind, 0, GROUND_Y - height, width, height)]
+
+    def _platform_chunk(self):
+        width = self.rng.randint(*PLATFORM_WIDTH_RANGE) # Randomise the width of the platform
         spike_width, spike_height = 50, 50 # Set the width and height of the spike
-        spike_x = self.spawn_point_x + int(width * 0.45) # Set the spawn point of the spike underneath the platform
+        spike_x = int(width * 0.45) # Set the spawn point of the spike underneath the platform
         #######################################################################################
-        return Platform(self.spawn_point_x, GROUND_Y - 90, width, PLATFORM_HEIGHT), \
-               Spike(spike_x, spike_width, spike_height), JumpPad(Vector2(self.spawn_point_x - 30, GROUND_Y - 10), Vector2(40, 10))
+        return [(Platform.kind, 0, GROUND_Y - 90, width, PLATFORM_HEIGHT),
+                (Spike.kind, spike_x, GROUND_Y - spike_height, spike_width, spike_height),
+                (JumpPad.kind, -30, GROUND_Y - 10, 40, 10)]
         ########################################################################################
 
+    # ===== CAN THE PLAYER GET PAST IT? =====
+    # Random gaps sometimes make something impossible, like a tall spike right
+    # where you come down off a platform. We remember one way through everything
+    # made so far (the route), and check that it can carry on through each new
+    # chunk (see reach.py). If it can't, the chunk is moved further along a bit
+    # at a time, and if even that doesn't help it is left out
+    def _make_clearable(self, chunk):
+        # --- Returns how far the chunk was moved, or None if it was left out --- #
+        started = time.perf_counter()
+        # Everything we remember was measured from the spawn point at the last
+        # spawn, and the level has moved on since then
+        moved = (self.wait - self.timer) * GameObject.speed
+        self.travelled += moved
+        # The player is PLAYER_X along the screen, so the physics steps start when it is here
+        phase = PLAYER_X - self.spawn_point_x - self.travelled
+        behind = -2 * SCREEN_WIDTH  # Well behind the player - forget it
+        previous = [(kind, x - moved, y, w, h) for kind, x, y, w, h in self.previous
+                    if x + w - moved > behind]
+        route = [(u - moved, None if on is None else (on[0] - moved, on[1]))
+                 for u, on in self.route if u - moved > behind]
+        jump_length = self.solver.tables.land(reach.JUMP, 0)
+        shift = 0
+        while shift <= MAX_CHUNK_SHIFT:
+            shifted = [(kind, x + shift, y, w, h) for kind, x, y, w, h in chunk]
+            first = min(x for kind, x, y, w, h in shifted)
+            # Carry on from the last place on the route that the new chunk can't have changed
+            kept = [stop for stop in route if stop[0] + PLAYER_SIZE < first]
+            if kept:
+                start, on = kept[-1]
+                kept.pop()
+            else:
+                # Nothing yet - start on the ground a whole jump before everything
+                start = min(x for kind, x, y, w, h in previous + shifted) - PLAYER_SIZE - jump_length
+                on = None
+            objects = [obj for obj in previous if obj[1] + obj[3] > start] + shifted
+            if self.solver.can_clear(objects, start, on, phase):
+                break
+            shift += CHUNK_SHIFT_STEP
+        else:
+            shift, shifted = None, []
+        if shift is not None:
+            self.route = kept + self.solver.route
+        else:
+            self.route = route
+        self.previous = previous + shifted
+        self.fixed += shift is not None and shift > 0
+        self.dropped += shift is None
+        self.check_seconds += time.perf_counter() - started
+        self.checks += 1
+        return shift
+
+# ===== PRE-GENERATED LEVELS =====
+# Instead of rolling random numbers while the game runs, we can make the whole
+# level in advance from a seed and save it to a file (see levels.py).
+# The same seed always gives the same level, so levels can be shared and replayed.
+def generate_level(path, seed, seconds=600):
+    # --- Run the ObjectManager ahead of time and write down where everything goes --- #
+    manager = ObjectManager(rng=random.Random(seed))
+    recorder = levels.Recorder()
+    t = 0.0  # Seconds since the start of the level
+    first_spawn = None  # How many records the first spawn made
+    while t < seconds:
+        recorder.offset = t * GAME_SPEED  # How far the level has scrolled by then
+        manager.spawn_next(recorder)
+        if first_spawn is None:
+            first_spawn = len(recorder.records)
+        wait = manager.timer
+        t += wait  # Jump straight to the next spawn
+        manager.timer -= wait  # ...as if that much time had gone by
+    levels.write_level(path, recorder.records, seed, seconds,
+                       length=_loop_length(manager, recorder.records, first_spawn, t), generator=LEVEL_GENERATOR)
+    return path
+
+def _loop_length(manager, records, first_spawn, t):
+    # --- How long the level is: where its first chunk comes round again after the last one --- #
+    # The level repeats (see levels.LevelStream), so the first chunk is spawned
+    # once more as if it came next: at least MIN_GAP_BETWEEN_OBSTACLES after the
+    # end of the last object, and moved along until it can be cleared from there
+    if not records:
+        return t * GAME_SPEED
+    first_chunk = [(kind, x - manager.spawn_point_x, y, w, h) for x, y, w, h, kind in records[:first_spawn]]
+    tail = max(x + w for x, y, w, h, kind in records)
+    head = min(x for x, y, w, h, kind in records[:first_spawn])
+    short = tail + MIN_GAP_BETWEEN_OBSTACLES - (t * GAME_SPEED + head)
+    if short > 0:
+        # Wait a little longer before the next spawn
+        manager.wait += short / GAME_SPEED
+        t += short / GAME_SPEED
+    while True:
+        shift = manager._make_clearable(first_chunk)
+        if shift is not None:
+            return t * GAME_SPEED + shift
+        # Even moving it along didn't help - try again one gap further on
+        manager.timer, manager.wait = 0.0, manager.min_gap_time
+        t += manager.min_gap_time
+
+def open_level(seed, seconds=600):
+    # --- The level for a seed, generated the first time we need it --- #
+    path = os.path.join(tempfile.gettempdir(),
+                        f"geometry_dash_seed_{seed}_{seconds:g}s_gen{LEVEL_GENERATOR}.gdl")
+    if os.path.exists(path):
+        try:
+            return levels.LevelReader(path, generator=LEVEL_GENERATOR)
+        except ValueError:
+            pass  # Not a level this version of the game made: make it again
+    generate_level(path, seed, seconds)
+    return levels.LevelReader(path, generator=LEVEL_GENERATOR)
+
 
 # ============================================================================
 # STEP 12: GROUND DRAWING
 # ============================================================================
 def draw_ground(surf):
-    if GROUND_IMG:
+    # Scale the ground tile image
+    tile = ASSETS.scaled(GROUND_IMAGE, 150, 150)
+    if tile:
         # --- Draw Repeating Tiles --- #
-        # Scale the ground tile image
-        tile = pygame.transform.scale(GROUND_IMG, (150, 150))
         tile_w = tile.get_width()  # How wide one tile is
         x = 0 # Set the spawn point
         # Draw repeating tiles
@@ -327,6 +492,14 @@ def draw_ground(surf):
         pygame.draw.rect(surf, GROUND_COLOR,
                          (0, GROUND_Y, SCREEN_WIDTH, SCREEN_HEIGHT - GROUND_Y))
 
+def make_background():
+    # --- The sky and the ground never move, so draw them once onto their own surface --- #
+    # The renderer copies this onto the screen instead of drawing the ground every frame
+    background = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)).convert()
+    background.fill(SKY_BLUE)
+    draw_ground(background)  # The ground tiles are scaled and laid out only this once
+    return background
+
 # ============================================================================
 # STEP 13: GAME CLASS
 # ============================================================================
@@ -342,211 +515,420 @@ class Game:
 
     Think of it as the "manager" that coordinates everything.
     """
-    def __init__(self):
+    def __init__(self, level=None):
+        # level = a levels.LevelReader to play a pre-generated level,
+        # or None to make obstacles up randomly while we play
+        self.level = level
+
         # Create the player at position (80, GROUND_Y - 60) with size 60
-        self.player = Player(80, GROUND_Y - 60, 60)
-        self.all_objs = []
+        self.player = Player(PLAYER_X, GROUND_Y - PLAYER_SIZE, PLAYER_SIZE)
 
         ########################################################
-        # Collections that store everything moving in the level
-        self.game_objects = {
-            "obstacles": [], # ground spikes/triangles
-            "platforms": [],  # floating bars the player can land on
-            "jump_pads": []  # The point for the player to jump
-        } # Store all game objects
+        # One store for everything moving in the level:
+        # ground spikes/triangles, floating platforms and jump pads
+        self.world = world.World()
         ########################################################
 
         # Dedicated manager that keeps spawn spacing fair
-        self.obstacle_manager = ObjectManager()
+        self.obstacle_manager = self.new_obstacle_manager()
 
         # Game state
         self.running = True  # Is the game currently running? (False = player died)
         self.show_hitboxes = True  # Show collision boxes? (like practice mode in real Geometry Dash)
 
+        # Times each part of update() - main() swaps in a real FrameProfiler
+        self.profiler = profiler.NULL
+
         # Scoring
         self.score = 0  # Current score (increases over time)
         self.best = 0  # Best score this session
+        self.last_dt = 0.0  # The dt of the last update (for smooth drawing)
+
+        # Text on top of the game - the instructions never change, so render them only once
+        self.hud = hud.HUD(TEXT_CACHE)
+        self.hud.add_static("Space to jump • R to restart after death • H to toggle hitboxes",
+                            (12, SCREEN_HEIGHT - 28), size=18, color=WHITE)
 
     def reset(self):
         # --- Reset the game when 'r' is pressed --- #
         # Create a new player
-        self.player = Player(80, GROUND_Y - 60, 60)
+        self.player = Player(PLAYER_X, GROUND_Y - PLAYER_SIZE, PLAYER_SIZE)
         # Clear all obstacles and platforms
         ########################################################
-        self.game_objects = {
-            "obstacles": [],  # ground spikes/triangles
-            "platforms": [],  # floating bars the player can land on
-            "jump_pads": []  # The point for the player to jump
-        }  # Store all game objects
+        self.world.clear()
         ########################################################
         # Reset score and spawn logic
         self.score = 0
-        self.obstacle_manager = ObjectManager()
+        self.obstacle_manager = self.new_obstacle_manager()
+
+    def new_obstacle_manager(self):
+        if self.level is None:
+            return ObjectManager()
+        # Play the level from the start - reading it in from the file as we go
+        return levels.LevelStream(self.level, SCREEN_WIDTH + 50, GameObject.speed)
 
     def update(self, dt):
         # --- Update the game on every frame --- #
         # ===== UPDATE PLAYER =====
         # Update player's physics (gravity, movement, etc.)
         # Pass platforms so player can land on them
-        self.player.update(dt, game=self, platforms=self.game_objects["platforms"])
+        # (only the ones that reach the player during this step - see World.near)
+        left, right = self.player.rect.left, self.player.rect.right
+        platforms = [(x, y, w, h) for kind, x, y, w, h in self.world.near(left, right + GameObject.speed * dt)
+                     if kind == Platform.kind]
+        self.player.update(dt, game=self, platforms=platforms)
+        self.profiler.mark("player")
 
         # ===== SPAWN LOGIC MANAGED IN ONE PLACE =====
         # The obstacle manager handles alternating spike / platform spawns
         self.obstacle_manager.update(dt, self)
+        self.profiler.mark("spawn")
 
         ######################################################
         # ===== UPDATE ALL OBSTACLES =====
-        self.all_objs = [
-            element
-            for value in self.game_objects.values()  # Iterate through all values
-            if isinstance(value, list)  # Filter to include only lists
-            for element in value  # Flatten the list and get each element
-        ]
-
-        # Move each object left across the screen
-        for obj in self.all_objs:
-            obj.update(dt)
+        # Move every object left across the screen with one subtraction
+        # Using dt ensures smooth movement at any framerate
+        self.world.scroll(GameObject.speed * dt)
+        self.profiler.mark("scroll")
 
         # ===== REMOVE OFF-SCREEN OBJECTS =====
-        # If an obstacle has left the screen, remove it from the list
-        # This keeps our list small and prevents lag
-        for li in self.game_objects.values():
-            # 2. Inner Loop: Iterate through the elements of the list
-            for obj in li:
-                if obj.off_screen():
-                    li.remove(obj)
-
-        # # Remove off-screen platforms too
-        # self.platforms = [p for p in self.platforms if not p.off_screen()]
-        # # This is a "list comprehension" - it's like a for loop that creates a new list
-        # # It keeps only obstacles/platforms that are still on screen
+        # Every object whose right edge is past the left side of the screen
+        # is removed in one go. This keeps the world small and prevents lag
+        self.world.cull()
+        self.profiler.mark("cull")
 
         # ===== CHECK COLLISIONS =====
-        # Check if player hit any obstacle
-        for ob in self.game_objects["obstacles"]:
-            px, py = self.player.rect.centerx, self.player.rect.bottom
-            x1, y1 = ob.get_p1()
-            x2, y2 = ob.get_p2()
-            x3, y3 = ob.get_p3()
-            # Reduce hitbox width for spikes (narrower detection)
-            margin = (x3 - x2) * 0.15
-            if (x2 + margin) <= px <= (x3 - margin):
-                # Linear interpolation spike top line
-                slope = (y3 - y1) / (x3 - x1)
-                spike_top_y = slope * (px - x1) + y1
-                # Make spike collision more forgiving (top 10% safe)
-                if py > spike_top_y + (y2 - y1) * 0.15:
-                    self.best = max(self.best, self.score)
-                    self.running = False
-                    return
+        # Only objects that overlap the player from left to right at some time during
+        # this step can touch it, so we never have to look at the rest of the level.
+        # The world has already scrolled, so each object started the step this far to the right
+        back = GameObject.speed * dt
+        player = self.player
+        left, right = player.rect.left, player.rect.right
+        near = self.world.near(left - back, right)
+        # Check if player hit any obstacle at any moment of the step (see sweep.py)
+        for kind, x, y, w, h in near:
+            if kind == Spike.kind and sweep.spike_time(player.path, player.size, player.pos.x,
+                                                       (x + back, y, w, h), GameObject.speed) is not None:
+                self.best = max(self.best, self.score)
+                self.running = False
+                self.profiler.mark("collisions")
+                return
 
         # Check for jump pad collision
-        for jp in self.game_objects["jump_pads"]:
-            if self.player.rect.colliderect(jp.rect):
-                self.player.jump(JUMP_PAD_VELOCITY)
+        for kind, x, y, w, h in near:
+            if kind == JumpPad.kind and sweep.box_time(player.path, player.size, player.pos.x,
+                                                       (x + back, y, w, h), GameObject.speed) is not None:
+                player.jump(JUMP_PAD_VELOCITY)
+        self.profiler.mark("collisions")
         ####################################################
 
         # ===== UPDATE SCORE =====
         # Score increases over time (survive longer = higher score)
         self.score += dt * 100  # Multiply by 100 to make numbers bigger
+        self.last_dt = dt
 
-    def draw(self, surf):
+    def draw(self, surf, alpha=1.0):
         """
         Draw everything on the screen.
 
         Order matters! We draw in this order:
-        1. Ground (back)
+        1. Ground (back) - already there, it is part of the background (see make_background)
         2. Platforms (middle-back)
         3. Ground spikes/obstacles (middle-front)
         4. Player (front)
         5. UI text (very front)
 
         This way the player appears on top of everything.
+        Returns a list of every rectangle we drew on, so the renderer
+        knows which parts of the screen changed.
+
+        alpha = how far the screen is between the last two physics steps
+        (0 = the previous step, 1 = the latest one). Drawing things part way
+        between them keeps movement smooth when the screen is redrawn more
+        or less often than the physics runs.
         """
-        # Draw ground first (it's in the background)
-        draw_ground(surf)
+        rects = []
+        if not self.running:
+            alpha = 1.0  # Nothing is moving, so draw everything where it is
+        # Every object scrolls at the same speed, so it was this much further right last step
+        behind = GameObject.speed * self.last_dt * (1.0 - alpha)
 
         #######################################################
-        # Draw all objects
-        for obj in self.all_objs:
-            obj.draw(surf)
+        # Draw all objects, one kind at a time
+        for kind in (Spike, Platform, JumpPad):
+            for x, y, w, h in self.world.boxes(kind.kind):
+                rects.append(kind.draw(surf, x + behind, y, w, h))
         #######################################################
 
         # Draw player last (so it appears on top)
-        self.player.draw(surf)
+        rects.append(self.player.draw(surf, alpha))
 
         # ===== DRAW UI (User Interface) =====
-        # Score display (top left)
-        draw_text(surf, f"Score: {int(self.score)}", 12, 12, size=28)
+        # Instructions (bottom left) are drawn by the HUD as a static line
+        rects += self.hud.draw(surf, [
+            # Score display (top left)
+            (f"Score: {int(self.score)}", (12, 12), 28, WHITE),
+            # Best score display
+            (f"Best: {int(self.best)}", (12, 44), 20, WHITE),
+        ])
+        return rects
 
-        # Best score display
-        draw_text(surf, f"Best: {int(self.best)}", 12, 44, size=20)
+# ============================================================================
+# STEP 14: HANDLING KEY PRESSES
+# ============================================================================
+def handle_key(game, key):
+    # --- Shared by the real game loop and the headless simulation --- #
+    if key == pygame.K_SPACE:
+        # Space bar = jump!
+        #############################################
+        game.player.jump(JUMP_VELOCITY)
+        #############################################
+    elif key == pygame.K_h:
+        # H key = toggle hitboxes (show/hide collision boxes)
+        game.show_hitboxes = not game.show_hitboxes
+    elif key == pygame.K_r:
+        # R key = restart
+        game.reset()  # Reset everything
+        game.running = True  # Start the game again
+
+# ============================================================================
+# STEP 15: HEADLESS SIMULATION (NO WINDOW)
+# ============================================================================
+class HeadlessRunner:
+    """
+    Runs the game without a window, a clock or any sleeping.
+
+    Every step uses the same fixed dt, so the same inputs and the same seed
+    always play out exactly the same way. This is useful for testing levels
+    and physics thousands of times faster than a real 60 FPS window.
+    The steps are the same FIXED_DT steps that main() uses, so a headless
+    run behaves exactly like the real game.
 
-        # Instructions (bottom left)
-        draw_text(surf, "Space to jump • R to restart after death • H to toggle hitboxes",
-                  12, SCREEN_HEIGHT - 28, size=18)
+    Inputs can be given as:
+    - a dict {frame_number: [keys pressed on that frame]}
+    - a function(frame_number, game) that returns the keys for that frame
+    """
+    def __init__(self, game=None, dt=FIXED_DT, seed=None):
+        if seed is not None:
+            random.seed(seed)  # Same seed = same obstacles every run
+        self.game = game if game is not None else Game()
+        self.dt = dt
+        self.frame = 0  # How many steps we have simulated so far
+
+    def step(self, keys=()):
+        # --- Simulate exactly one frame --- #
+        for key in keys:
+            handle_key(self.game, key)
+        if self.game.running:
+            self.game.update(self.dt)
+        self.frame += 1
+
+    def run(self, steps, inputs=None, stop_on_death=False):
+        # --- Simulate many frames as fast as possible and report the speed --- #
+        start = time.perf_counter()
+        done = 0
+        for _ in range(steps):
+            if inputs is None:
+                keys = ()
+            elif callable(inputs):
+                keys = inputs(self.frame, self.game)
+            else:
+                keys = inputs.get(self.frame, ())
+            self.step(keys)
+            done += 1
+            if stop_on_death and not self.game.running:
+                break
+        elapsed = time.perf_counter() - start
+        return {
+            "steps": done,
+            "seconds": elapsed,
+            "steps_per_second": done / elapsed if elapsed > 0 else float("inf"),
+            "score": int(self.game.score),
+            "best": int(max(self.game.best, self.game.score)),
+            "running": self.game.running,
+        }
 
 # ============================================================================
-# STEP 14: MAIN GAME LOOP
+# STEP 16: MAIN GAME LOOP
 # ============================================================================
-def main():
-    game = Game() # Create a new Game object
-    # Delta time - tracks how much time passed since last frame
-    dt = 0.0  # Start at 0
+def draw_profiler_overlay(surf, stats):
+    # --- A table of how long each part of the frame takes (press F3 to show it) --- #
+    rects = [draw_text(surf, "phase          p50    p95    p99 (ms)", SCREEN_WIDTH - 300, 12, size=20)]
+    for row, (phase, (p50, p95, p99)) in enumerate(stats.items()):
+        rects.append(draw_text(surf, f"{phase:<12} {p50:6.2f} {p95:6.2f} {p99:6.2f}",
+                               SCREEN_WIDTH - 300, 32 + row * 18, size=20))
+    return rects
+
+def main(dirty_rects=DIRTY_RECTS, level=None, record=None, playback=None, profile=None):
+    """
+    Play the game in a window.
+    record = a file name to save a replay of this game to when it closes
+    playback = a replay.Replay to watch instead of playing (the keyboard is ignored)
+    profile = a .csv or .json file name to save the time of every frame to when it closes
+    """
+    screen = setup_display()  # Open the window
+    clock = pygame.time.Clock() # Clock - control how fast the game runs
+    if playback is not None:
+        level = open_level(playback.seed, playback.level_seconds)
+    elif level is None:
+        # Make a level from a random seed before the game starts
+        level = open_level(random.randrange(2 ** 32))
+    recording = replay.Replay(level.seed, level.seconds, level.generator) if record else None
+    playback_keys = playback.inputs() if playback is not None else {}
+    step = 0  # How many physics steps we have done (replays count these)
+    pending_keys = []  # Keys pressed since the last physics step
+    accumulator = 0.0  # Time that has passed but hasn't been simulated yet
+    # Draws each frame on top of the sky and ground, which are only drawn once
+    screen_renderer = renderer.Renderer(screen, make_background(), dirty_rects=dirty_rects)
+    # Everything made so far lives for the whole game, so tell the garbage collector
+    # to stop checking it - this keeps its clean ups short during long sessions
+    gc.freeze()
+    game = Game(level) # Create a new Game object
+    # Time every part of every frame, so we can find the slow ones - but only when
+    # asked to (--profile, or F3), because otherwise it is just extra work
+    timings = profiler.FrameProfiler() if profile is not None else None
+    frame_profiler = game.profiler = timings or profiler.NULL
+    show_profiler = False  # F3 shows the timings on screen
+    profiler_stats = {}
+
+    def quit_game():
+        if profile is not None:
+            timings.export(profile)
+        if recording is not None:
+            # Save the replay before we go
+            recording.frames = step
+            recording.score = int(max(game.best, game.score))
+            recording.save(record)
+        pygame.quit()  # Shut down pygame
+        sys.exit()  # Exit the program
 
     # ===== THE GAME LOOP =====
     while True:
+        frame_profiler.begin_frame()
         # ===== STEP 1: HANDLE INPUTS =====
         # Events are things that happen - like pressing a key or closing the window
         for event in pygame.event.get():
             # Check what type of event it is
             if event.type == pygame.QUIT:
                 # Player clicked the X button to close window
-                pygame.quit()  # Shut down pygame
-                sys.exit()  # Exit the program
+                quit_game()
             elif event.type == pygame.KEYDOWN:
                 # Player pressed a key
                 if event.key == pygame.K_ESCAPE:
                     # Escape key = quit game
-                    pygame.quit()
-                    sys.exit()
-                elif event.key == pygame.K_SPACE:
-                    # Space bar = jump!
-                    #############################################
-                    game.player.jump(JUMP_VELOCITY)
-                    #############################################
-                elif event.key == pygame.K_h:
-                    # H key = toggle hitboxes (show/hide collision boxes)
-                    game.show_hitboxes = not game.show_hitboxes
-                elif event.key == pygame.K_r:
-                    # R key = restart
-                    game.reset()  # Reset everything
-                    game.running = True  # Start the game again
+                    quit_game()
+                elif event.key == pygame.K_F3:
+                    # F3 = show/hide the frame timings (and only time frames while they show,
+                    # unless --profile is saving them)
+                    show_profiler = not show_profiler
+                    if show_profiler and timings is None:
+                        timings = profiler.FrameProfiler()
+                    timed = show_profiler or profile is not None
+                    frame_profiler = game.profiler = timings if timed else profiler.NULL
+                elif playback is None:
+                    # Space, H and R happen on the next physics step (see handle_key)
+                    pending_keys.append(event.key)
+            elif event.type in (pygame.WINDOWEXPOSED, pygame.WINDOWRESTORED):
+                # The window was covered up or minimised, so draw all of it again
+                screen_renderer.redraw_all()
+        frame_profiler.mark("input")
 
         # ===== STEP 2: UPDATE GAME =====
-        if game.running:
-            # Game is running, so update everything
-            # Calculate delta time (how many seconds since last frame)
-            dt = clock.tick(FPS) / 1000.0  # tick() returns milliseconds, divide by 1000 for seconds
-            game.update(dt)  # Update the game state
-        else:
-            # Game is paused (player died), but we still need to tick the clock
-            # Otherwise things might break
-            dt = clock.tick(FPS) / 1000.0
+        # Calculate delta time (how many seconds since last frame)
+        dt = clock.tick(FPS) / 1000.0  # tick() returns milliseconds, divide by 1000 for seconds
+        frame_profiler.mark("wait")
+        # Add the time that passed, but never more than MAX_STEPS_PER_FRAME steps' worth,
+        # so one slow frame can't make the next one slow too
+        accumulator = min(accumulator + dt, MAX_STEPS_PER_FRAME * FIXED_DT)
+        # Run as many fixed size physics steps as fit in the time that has passed
+        while accumulator >= FIXED_DT:
+            if playback is not None:
+                if step >= playback.frames:
+                    quit_game()  # The replay is over
+                # When watching a replay, press the keys the player pressed on this step
+                pending_keys = playback_keys.get(step, [])
+            for key in pending_keys:
+                handle_key(game, key)
+                if recording is not None:
+                    recording.press(step, key)
+            pending_keys = []
+            if game.running:
+                # Game is running, so update everything
+                game.update(FIXED_DT)  # Update the game state
+            step += 1
+            accumulator -= FIXED_DT
 
         # ===== STEP 3: DRAW EVERYTHING =====
-        screen.fill(SKY_BLUE) # Clear old frame
-        game.draw(screen) # Show everything on the frame
+        # Draw part way between the last two physics steps (see Game.draw)
+        alpha = accumulator / FIXED_DT
+        screen_renderer.begin_frame() # Clear old frame
+        rects = game.draw(screen, alpha) # Show everything on the frame
 
         # ===== STEP 4: GAME OVER MESSAGE =====
         if not game.running:
-            draw_text(screen, "You Died! Press R to restart",
-                      SCREEN_WIDTH // 2 - 160, SCREEN_HEIGHT // 2 - 20,
-                      size=34, color=BLACK)
-
-        pygame.display.flip()  # Update the frame
-
-# STEP 15: START THE GAME
+            rects.append(draw_text(screen, "You Died! Press R to restart",
+                                   SCREEN_WIDTH // 2 - 160, SCREEN_HEIGHT // 2 - 20,
+                                   size=34, color=BLACK))
+
+        # ===== STEP 5: FRAME TIMINGS =====
+        if show_profiler:
+            if timings.frame % 30 == 0 or not profiler_stats:
+                profiler_stats = timings.percentiles()  # Work them out twice a second
+            rects += draw_profiler_overlay(screen, profiler_stats)
+        frame_profiler.mark("draw")
+
+        screen_renderer.end_frame(rects)  # Update the frame
+        frame_profiler.mark("present")
+        frame_profiler.end_frame()
+
+def run_headless(steps):
+    # --- Simulate without a window and print how fast it went --- #
+    # Jump every half second so the player actually does something
+    jump_every = int(PHYSICS_HZ / 2)
+    runner = HeadlessRunner(seed=0)
+    stats = runner.run(steps, inputs=lambda frame, game: (
+        [pygame.K_SPACE] if frame % jump_every == 0 else
+        [pygame.K_r] if not game.running else []))
+    print(f"{stats['steps']} steps in {stats['seconds']:.3f}s "
+          f"= {stats['steps_per_second']:.0f} steps/second (best score {stats['best']})")
+
+# STEP 17: START THE GAME
 # This code only runs if we run this file directly (not if we import it)
+# Run "python main.py --help" to see every option, for example:
+#   python main.py --headless 100000         simulate 100000 frames with no window
+#   python main.py --full-redraw             send the whole screen to the window every frame
+#   python main.py --make-level my.gdl --seed 42    save the level made from seed 42
+#   python main.py --level my.gdl            play a saved level
+#   python main.py --record run.gdr          save a replay of your game
+#   python main.py --replay run.gdr          watch a replay
+#   python main.py --profile frames.csv      save how long every frame took (F3 shows it in game)
 if __name__ == "__main__":
-    main()  # Start the game!
+    parser = argparse.ArgumentParser(description="Simple Geometry Dash")
+    parser.add_argument("--headless", type=int, nargs="?", const=100000, metavar="STEPS",
+                        help="simulate STEPS frames without a window and print the speed")
+    parser.add_argument("--full-redraw", action="store_true",
+                        help="update the whole window every frame instead of only what changed")
+    parser.add_argument("--level", help="play a level file made with --make-level")
+    parser.add_argument("--make-level", metavar="PATH", help="generate a level file and exit")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for --make-level")
+    parser.add_argument("--seconds", type=float, default=600, help="length of the level for --make-level")
+    parser.add_argument("--record", metavar="PATH", help="save a replay of the game when it closes")
+    parser.add_argument("--replay", metavar="PATH", help="watch a replay made with --record")
+    parser.add_argument("--profile", metavar="PATH",
+                        help="save the time of each part of every frame to a .csv or .json file on exit")
+    args = parser.parse_args()
+
+    if args.make_level:
+        generate_level(args.make_level, args.seed, args.seconds)
+    elif args.headless is not None:
+        run_headless(args.headless)
+    else:
+        # Levels and replays from an older level generator are refused: the same seed
+        # makes a different level now, so they wouldn't play back the same
+        try:
+            level = levels.LevelReader(args.level, generator=LEVEL_GENERATOR) if args.level else None
+            playback = replay.Replay.load(args.replay, generator=LEVEL_GENERATOR) if args.replay else None
+        except ValueError as error:
+            parser.error(str(error))
+        main(dirty_rects=not args.full_redraw, level=level,
+             record=args.record, playback=playback, profile=args.profile)  # Start the game!
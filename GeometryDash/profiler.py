@@ -0,0 +1,100 @@
+import csv  # For saving samples as a spreadsheet file
+import json  # For saving samples as a JSON file
+import time  # For the timer
+
+import numpy as np  # For working out percentiles
+
+# ============================================================================
+# FRAME PROFILER
+# ============================================================================
+# The parts of a frame, in the order they happen
+PHASES = ("input", "wait", "player", "spawn", "scroll", "cull", "collisions", "draw", "present")
+PHASE_INDEX = {phase: i for i, phase in enumerate(PHASES)}
+
+
+class FrameProfiler:
+    """
+    Times how long each part (phase) of every frame takes.
+
+    Call begin_frame() at the start of a frame, mark("phase") straight after
+    each phase finishes, and end_frame() at the end. Each mark measures the
+    time since the previous one, so the phases add up to the whole frame.
+
+    The last `window` frames are used for the rolling percentiles
+    (p50 = a normal frame, p99 = one of the worst frames in a hundred),
+    and the last `max_samples` frames can be saved with export().
+    The times go into one NumPy array made at the start and used round and
+    round (a "ring buffer"), so timing a frame doesn't make any new objects
+    for the garbage collector to look after.
+    """
+    def __init__(self, window=600, max_samples=100_000):
+        self.window = window
+        self.max_samples = max_samples
+        self.times = np.zeros((max_samples, len(PHASES)), dtype=np.float64)  # ms, one row per frame
+        self.frames = np.zeros(max_samples, dtype=np.int64)  # the frame number of each row
+        self.frame = 0  # Number of the frame being timed
+        self._row = None  # The row of times for the frame being timed
+        self._last = 0.0
+
+    def begin_frame(self):
+        self._row = self.times[self.frame % self.max_samples]
+        self._row[:] = 0.0
+        self._last = time.perf_counter()
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        if self._row is not None:
+            self._row[PHASE_INDEX[phase]] += (now - self._last) * 1000  # Milliseconds
+        self._last = now
+
+    def end_frame(self):
+        if self._row is None:
+            return  # Switched on part way through this frame
+        self.frames[self.frame % self.max_samples] = self.frame
+        self.frame += 1
+        self._row = None
+
+    def recent(self, count=None):
+        # --- (frame numbers, times) of the last `count` finished frames (all kept ones if None), oldest first --- #
+        kept = min(self.frame, self.max_samples)
+        count = kept if count is None else min(count, kept)
+        rows = np.arange(self.frame - count, self.frame) % self.max_samples
+        return self.frames[rows], self.times[rows]
+
+    def percentiles(self, qs=(50, 95, 99)):
+        # --- {phase: [p50, p95, p99]} over the last `window` frames, in milliseconds --- #
+        _, times = self.recent(self.window)
+        if not len(times):
+            return {}
+        result = {phase: np.percentile(times[:, i], qs).tolist() for i, phase in enumerate(PHASES)}
+        result["total"] = np.percentile(times.sum(axis=1), qs).tolist()
+        return result
+
+    def export(self, path):
+        # --- Save every kept frame; .json makes a JSON list, anything else a CSV file --- #
+        fields = ("frame",) + PHASES + ("total",)
+        frames, times = self.recent()
+        rows = [dict(zip(fields, [frame] + row + [sum(row)])) for frame, row in zip(frames.tolist(), times.tolist())]
+        if path.endswith(".json"):
+            with open(path, "w") as f:
+                json.dump(rows, f)
+        else:
+            with open(path, "w", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=fields)
+                writer.writeheader()
+                writer.writerows(rows)
+
+
+class NullProfiler:
+    """Does nothing - used when we aren't profiling so the game code doesn't need any ifs."""
+    def begin_frame(self):
+        pass
+
+    def mark(self, phase):
+        pass
+
+    def end_frame(self):
+        pass
+
+
+NULL = NullProfiler()
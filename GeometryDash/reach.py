@@ -0,0 +1,223 @@
+import functools  # For remembering the tables once they are made
+import math  # For rounding up
+import numpy as np  # To build the lookup tables quickly
+
+import sweep  # The same maths the game uses to find when the player touches a spike
+
+# ============================================================================
+# CAN THIS BE CLEARED? - a jump-arc solver for newly generated obstacles
+# ============================================================================
+# The ObjectManager picks obstacles and gaps at random, so sometimes it makes
+# something nobody could get past (say a tall spike right where you land off a
+# platform). This file checks every new chunk of obstacles as it is made, and
+# the ObjectManager moves the chunk further along until it can be cleared.
+#
+# The game's jumps always have exactly the same shape, because the physics
+# follows the exact parabola (see sweep.py). So we work out every jump ONCE and
+# keep the answers in tables: how far each kind of jump goes before it comes
+# down onto something at any height. Whether a spike gets the player during a
+# jump is one small sum (the same as sweep.py uses), so checking a chunk is a
+# few table look-ups and sums - quick enough to do while the game is running.
+#
+# Positions are measured along the level in pixels, using the LEFT side of the
+# player (so "the player is at u" means its box goes from u to u + size).
+# Heights are measured UP from the ground.
+JUMP, PAD, FALL = 0, 1, 2  # The three ways to leave the ground: jump, jump pad, walk off an edge
+
+
+class JumpTables:
+    """
+    Every jump worked out in advance from the game's physics settings.
+
+    velocities are the starting vertical speeds of a JUMP, a jump PAD and a
+    FALL (negative = up, like the game). `step` is how far the level moves in
+    one physics step: the player can only jump that often.
+    """
+    def __init__(self, gravity, jump_velocity, pad_velocity, speed, player_size, step, lowest=-500,
+                 spike_margin=0.15, spike_safe_top=0.15):
+        self.speed = speed
+        self.size = player_size
+        self.step = step
+        self.lowest = lowest  # How far below where it started we follow a jump
+        self.spike_margin = spike_margin  # The same forgiving spike hitbox as sweep.spike_time
+        self.spike_safe_top = spike_safe_top
+        self.curves = []  # (a, b) for each way of leaving: height after d pixels = a*d*d + b*d
+        self.apex = []  # The highest point of each (rounded down)
+        self.landing = []  # landing[kind][r - lowest] = how far it goes before coming DOWN to height r
+        for velocity in (jump_velocity, pad_velocity, 0.0):
+            # Moving d pixels along takes d / speed seconds
+            a, b = -0.5 * gravity / speed ** 2, -velocity / speed
+            self.curves.append((a, b))
+            # Follow the jump until it is far below the start (gravity*t*t/2 + velocity*t = -lowest)
+            t_end = (-velocity + np.sqrt(velocity ** 2 - 2 * gravity * lowest)) / gravity
+            d = np.arange(0, int(np.ceil(t_end * speed)) + 2)
+            height = a * d * d + b * d
+            top = int(np.argmax(height))
+            self.apex.append(int(height[top]))
+            # After the top of the jump the height only goes down, so a binary search
+            # finds the first pixel at or below each height
+            falling = -height[top:]
+            rs = np.arange(lowest, int(height[top]) + 1)
+            self.landing.append((top + np.searchsorted(falling, -rs, side="left")).tolist())
+
+    def land(self, kind, rel):
+        # --- How far a jump goes before it comes down onto something rel pixels above where it started --- #
+        if rel > self.apex[kind] or rel < self.lowest:
+            return None
+        return self.landing[kind][rel - self.lowest]
+
+    def first_hit(self, kind, base, spike, o, distance):
+        """
+        How far into a jump (of this kind, from height `base`) a spike = (w, h)
+        standing on the ground o pixels ahead first gets the player, or None if it
+        doesn't within `distance` pixels. Solved exactly the same way as sweep.py,
+        but along the level instead of through time.
+        """
+        w, h = spike
+        a, b = self.curves[kind]
+        half, margin = self.size / 2, w * self.spike_margin
+        top = h * (1 - self.spike_safe_top) - base  # How high the (safe) tip is above where we started
+        steep = 2 * h / w  # How much each sloping side drops per pixel
+        # The middle of the player's feet is at d + half - o pixels from the spike's left corner
+        rules = (
+            (0.0, 1.0, half - o - margin),  # Past the (narrowed) left corner
+            (0.0, -1.0, w - margin - half + o),  # Not past the right corner
+            (-a, steep - b, top - steep * w / 2 + steep * (half - o)),  # Below the left slope
+            (-a, -steep - b, top + steep * w / 2 - steep * (half - o)),  # Below the right slope
+        )
+        return sweep.first_time(rules, distance)
+
+
+@functools.lru_cache(maxsize=None)
+def tables_for(gravity, jump_velocity, pad_velocity, speed, player_size, step):
+    # --- The tables for these settings (only worked out the first time) --- #
+    return JumpTables(gravity, jump_velocity, pad_velocity, speed, player_size, step)
+
+
+class Solver:
+    """
+    Looks for a way through a list of obstacles (kind, x, y, w, h), where kind is
+    one of the World kind numbers. Obstacles are given in level positions and
+    the player starts standing at `start` - on the ground, or on the platform
+    whose (left, top) is given as `on`. Physics steps start when the player is
+    at `phase` plus a whole number of steps, and it can only jump then.
+
+    When there is a way through, `route` lists the places the player stands on
+    along it: (u, None) on the ground or (u, (left, top)) on a platform.
+    """
+    def __init__(self, tables, ground_y, spike, platform, jump_pad):
+        self.tables = tables
+        self.ground_y = ground_y
+        self.kinds = (spike, platform, jump_pad)
+        self.route = []
+
+    def can_clear(self, objects, start, on=None, phase=0.0):
+        spike, platform, jump_pad = self.kinds
+        self.phase = phase  # The player is at phase + (a whole number of steps) when each step starts
+        ground_y = self.ground_y
+        # Heights are measured up from the ground, so turn each object round
+        self.spikes = [(x, w, h) for kind, x, y, w, h in objects if kind == spike]
+        self.pads = [(x, w) for kind, x, y, w, h in objects if kind == jump_pad]
+        # Surface 0 is the ground, the rest are platforms: (left, right, height of the top)
+        self.surfaces = [(float("-inf"), float("inf"), 0)]
+        self.surfaces += [(x, x + w, int(round(ground_y - y))) for kind, x, y, w, h in objects
+                          if kind == platform]
+        self.end = max((x + w for kind, x, y, w, h in objects), default=start)
+        self.seen = set()
+        self.route = []
+        surface = 0
+        if on is not None:
+            for i, (left, right, top) in enumerate(self.surfaces):
+                if i and top == on[1] and abs(left - on[0]) < 1e-6:
+                    surface = i
+        found = self._stand(surface, start)
+        self.route.reverse()  # It was written down from the end backwards
+        return found
+
+    # ===== STANDING ON SOMETHING =====
+    def _stand(self, surface, u):
+        # --- Standing on a surface at u: is there a way to the end from here? --- #
+        if not self._way_on(surface, u):
+            return False
+        left, right, top = self.surfaces[surface]
+        self.route.append((u, None if surface == 0 else (left, top)))
+        return True
+
+    def _way_on(self, surface, u):
+        key = (surface, int(u))
+        if key in self.seen:
+            return False  # Already tried (and it didn't work, or we would have stopped)
+        self.seen.add(key)
+        tables = self.tables
+        half = tables.size / 2
+        left, right, base = self.surfaces[surface]
+        if u >= self.end:
+            return True  # Past everything
+        # --- How far can we walk before something happens? --- #
+        limit, forced = right, FALL  # Walking off the end of a platform
+        for x, w, h in self.spikes:
+            reach = self._deadly_columns(x, w, h, base)
+            if reach is None or x + reach[1] < u + half:
+                continue  # Too low to hurt us up here, or already behind us
+            if x + reach[0] <= u + half:
+                return False  # We are standing in it
+            if x + reach[0] - half < limit:
+                limit, forced = x + reach[0] - half, None  # Can't walk any further than this
+        if surface == 0:
+            for x, w in self.pads:
+                if u <= x + w:
+                    # A pad throws us up at the start of the step after we touch it
+                    at = self._next_step(max(u, x - tables.size))
+                    if at < limit:
+                        limit, forced = at, PAD
+        if limit == float("inf"):
+            return True  # Nothing left on the ground ahead of us
+        # --- Try the forced move first, then jumping as late as possible --- #
+        if forced is not None and self._launch(forced, base, limit):
+            return True
+        # We can only jump at the start of a physics step. Walking into a spike is
+        # too late, but jumping just as a pad would throw us is fine
+        first = self._next_step(u)
+        steps = (limit - first) / tables.step
+        last = round(steps) if forced == PAD else math.ceil(steps) - 1
+        for k in range(last, -1, -1):
+            if self._launch(JUMP, base, first + k * tables.step):
+                return True
+        return False
+
+    def _next_step(self, u):
+        # --- Where the player is at the start of the first physics step at or after u --- #
+        step = self.tables.step
+        return self.phase + math.ceil((u - self.phase) / step - 1e-9) * step
+
+    def _deadly_columns(self, x, w, h, base):
+        # --- The part of a spike (from x) where standing at height `base` gets you hurt --- #
+        tables = self.tables
+        top = h * (1 - tables.spike_safe_top) - base
+        if top < 0:
+            return None
+        half_width = min(w / 2, top / (2 * h / w))  # The sides go down by 2h/w per pixel
+        lo = max(w * tables.spike_margin, w / 2 - half_width)
+        hi = min(w - w * tables.spike_margin, w / 2 + half_width)
+        return (lo, hi) if lo <= hi else None
+
+    # ===== IN THE AIR =====
+    def _launch(self, kind, base, u0):
+        # --- Leave the surface at u0: where do we land, and does a spike get us first? --- #
+        tables = self.tables
+        size = tables.size
+        land_at, land_on = None, None
+        for surface, (left, right, top) in enumerate(self.surfaces):
+            d = tables.land(kind, top - base)
+            if d is None or (land_at is not None and d >= land_at):
+                continue
+            if u0 + d + size > left and u0 + d < right:
+                land_at, land_on = d, surface
+        if land_at is None:
+            return False  # Off the bottom of the tables - can't happen above the ground
+        for x, w, h in self.spikes:
+            if x + w < u0 or x > u0 + land_at + size:
+                continue  # Nowhere near this jump
+            if tables.first_hit(kind, base, (w, h), x - u0, land_at) is not None:
+                return False
+        return self._stand(land_on, u0 + land_at)
@@ -0,0 +1,48 @@
+import pygame  # For drawing to the window
+
+# ============================================================================
+# RENDERER
+# ============================================================================
+class Renderer:
+    """
+    Draws every frame on top of a background that was drawn only once.
+
+    The sky and the ground never change, so they live on their own surface
+    (the background). Each frame we:
+    1. begin_frame(): copy the background over the screen
+    2. draw the moving things (player, obstacles, text)
+    3. end_frame(rects): show the new frame in the window
+
+    With dirty_rects=True, step 1 only covers the places where something
+    was drawn last frame, and step 3 only sends the changed rectangles to
+    the window with pygame.display.update(rects) instead of the whole screen.
+    Most of the screen is sky that never changes, so this is much less work.
+    """
+    def __init__(self, screen, background, dirty_rects=True):
+        self.screen = screen
+        self.background = background
+        self.dirty_rects = dirty_rects
+        self.last_rects = []  # Where we drew last frame (these need clearing)
+        self.full_frame = True  # The first frame always draws everything
+
+    def redraw_all(self):
+        # --- Draw the whole screen next frame (e.g. after the window was covered up) --- #
+        self.full_frame = True
+
+    def begin_frame(self):
+        if self.dirty_rects and not self.full_frame:
+            # Rub out last frame's drawing by copying those bits of background back
+            for rect in self.last_rects:
+                self.screen.blit(self.background, rect, rect)
+        else:
+            self.screen.blit(self.background, (0, 0))  # Clear old frame
+
+    def end_frame(self, rects):
+        # --- rects = every rectangle we drew on this frame --- #
+        if self.dirty_rects and not self.full_frame:
+            # Things that moved must be updated where they were AND where they are now
+            pygame.display.update(self.last_rects + rects)
+        else:
+            pygame.display.flip()  # Update the whole frame
+        self.last_rects = rects
+        self.full_frame = False
@@ -0,0 +1,198 @@
+# ============================================================================
+# REPLAYS - record a game, watch it again, or check a high score
+# ============================================================================
+# A replay doesn't store any pictures or positions. Because the physics always
+# moves on in steps of the same size (main.FIXED_DT) and the level comes from a
+# seed, the seed and the steps where keys were pressed are enough to play the
+# whole game again exactly the same way. ("Frame" below means one physics step.)
+#
+# Run these from inside the GeometryDash folder:
+#     python main.py --record my_run.gdr      play and save a replay
+#     python main.py --replay my_run.gdr      watch it again
+#     python replay.py my_run.gdr other.gdr   check the scores in many replays
+#
+# Checking a replay plays the whole game again without drawing it, which takes
+# about 0.8 seconds for a 10-minute run (see simulate).
+import argparse  # Reads the options given on the command line
+import multiprocessing  # Checks lots of replays on every CPU core at once
+import struct  # Packs numbers into bytes (and back again)
+import time  # To measure how fast checking goes
+
+import pygame  # Only for the key codes
+
+# ============================================================================
+# REPLAY FILE FORMAT
+# ============================================================================
+# HEADER:
+#       magic          4 bytes   b"GDRP"
+#       version        2 bytes
+#       generator      2 bytes   which version of the level generator made the level
+#                                (main.LEVEL_GENERATOR when it was recorded)
+#       seed           8 bytes   the seed the level was made from
+#       level_seconds  4 bytes   how long the level was (see main.generate_level)
+#       frames         4 bytes   how many frames the game lasted
+#       score          4 bytes   the best score the player says they got
+#       event_count    4 bytes
+# EVENTS: one small number per key press (a "varint": 7 bits per byte, and the
+#       top bit says whether another byte follows). The number is
+#       (frames since the last key press) * 4 + (which key: 0 = Space, 1 = R, 2 = H)
+#       so a jump a second after the last one takes just 2 bytes.
+MAGIC = b"GDRP"
+VERSION = 4  # Goes up whenever the game rules change, so old replays are not wrongly trusted
+HEADER = struct.Struct("<4sHHQfIII")
+KEYS = (pygame.K_SPACE, pygame.K_r, pygame.K_h)  # The only keys that change the game
+VERIFY_TIMEOUT = 600  # Seconds to wait for one replay to be checked before giving up on it
+
+
+class Replay:
+    def __init__(self, seed, level_seconds, generator, frames=0, score=0, events=None):
+        self.seed = seed
+        self.level_seconds = level_seconds
+        self.generator = generator  # The level generator that made the level it was played on
+        self.frames = frames  # Total number of frames played
+        self.score = score  # The claimed best score
+        self.events = events if events is not None else []  # (frame, key) in order
+
+    def press(self, frame, key):
+        # --- Remember a key press (keys that don't matter to the game are ignored) --- #
+        if key in KEYS:
+            self.events.append((frame, key))
+
+    def inputs(self):
+        # --- {frame: [keys]} - the inputs format of main.HeadlessRunner --- #
+        by_frame = {}
+        for frame, key in self.events:
+            by_frame.setdefault(frame, []).append(key)
+        return by_frame
+
+    def to_bytes(self):
+        out = bytearray(HEADER.pack(MAGIC, VERSION, self.generator, self.seed, self.level_seconds,
+                                    self.frames, int(self.score), len(self.events)))
+        last = 0
+        for frame, key in self.events:
+            value = (frame - last) * 4 + KEYS.index(key)
+            last = frame
+            while value >= 0x80:
+                out.append((value & 0x7F) | 0x80)
+                value >>= 7
+            out.append(value)
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data, generator=None):
+        # With a generator given, a replay of a level made by any other version of the generator is refused
+        if len(data) < HEADER.size:
+            raise ValueError(f"not a version {VERSION} replay")
+        magic, version, level_generator, seed, level_seconds, frames, score, event_count = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"not a version {VERSION} replay")
+        if generator is not None and level_generator != generator:
+            raise ValueError(f"recorded on a level from level generator {level_generator}, not {generator}")
+        events = []
+        pos, frame = HEADER.size, 0
+        for _ in range(event_count):
+            value, shift = 0, 0
+            while True:
+                byte = data[pos]
+                pos += 1
+                value |= (byte & 0x7F) << shift
+                shift += 7
+                if byte < 0x80:
+                    break
+            frame += value >> 2
+            events.append((frame, KEYS[value & 3]))
+        return cls(seed, level_seconds, level_generator, frames, score, events)
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path, generator=None):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read(), generator)
+
+
+# ============================================================================
+# CHECKING REPLAYS
+# ============================================================================
+def simulate(replay):
+    """
+    Play the replay as fast as possible with no window and return the best score.
+
+    Every frame the player is alive is still a full physics step (about 20
+    microseconds), so a 10-minute run takes around 0.8 seconds - some 750 times
+    faster than playing it, but not instant. Frames spent dead are skipped.
+    verify_many checks one replay per CPU core at a time.
+    """
+    import main  # Imported here because main imports this file too
+    if replay.generator != main.LEVEL_GENERATOR:
+        # Today's generator would make a different level from the same seed
+        raise ValueError(f"recorded on a level from level generator {replay.generator}, "
+                         f"not {main.LEVEL_GENERATOR}")
+    game = main.Game(main.open_level(replay.seed, replay.level_seconds))
+    runner = main.HeadlessRunner(game=game)
+    inputs = replay.inputs()
+    frame = 0
+    for key_frame in sorted(inputs) + [replay.frames]:
+        # Play every frame up to the next key press. Nothing happens while the player
+        # is dead until R is pressed, so those frames are skipped straight away
+        while frame < key_frame and game.running:
+            runner.step()
+            frame += 1
+        frame = key_frame
+        if frame < replay.frames:
+            runner.step(inputs[frame])
+            frame += 1
+    return int(max(game.best, game.score))
+
+
+def verify(path):
+    # --- Does the replay really get the score it claims? Returns (path, claimed, actual) --- #
+    replay = Replay.load(path)
+    return path, replay.score, simulate(replay)
+
+
+def verify_many(paths, workers=None, timeout=VERIFY_TIMEOUT):
+    """
+    Check lots of replays, spread over every CPU core. A replay that can't be
+    checked (its worker crashed, raised an error or took longer than timeout
+    seconds) comes back with None as its actual score instead of holding up
+    the rest.
+    """
+    import main  # Imported here because main imports this file too
+    replays = [Replay.load(path) for path in paths]
+    # Make each level once here, before the workers start, so they never race to write the same file
+    # (replays from another level generator can't be checked, see simulate)
+    for seed, seconds in sorted({(replay.seed, replay.level_seconds) for replay in replays
+                                 if replay.generator == main.LEVEL_GENERATOR}):
+        main.open_level(seed, seconds).close()
+    with multiprocessing.Pool(workers) as pool:
+        pending = [pool.apply_async(verify, (path,)) for path in paths]
+        results = []
+        for path, replay, result in zip(paths, replays, pending):
+            try:
+                results.append(result.get(timeout))
+            except Exception:  # Includes multiprocessing.TimeoutError when a worker died
+                results.append((path, replay.score, None))
+        return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check that replays really get the scores they claim")
+    parser.add_argument("replays", nargs="+", help="replay files made with main.py --record")
+    parser.add_argument("--workers", type=int, default=None, help="processes to use (default: every core)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = verify_many(args.replays, args.workers)
+    elapsed = time.perf_counter() - start
+    bad = 0
+    for path, claimed, actual in results:
+        ok = claimed == actual
+        bad += not ok
+        if actual is None:
+            print(f"FAIL {path}: claimed {claimed}, could not be checked")
+        else:
+            print(f"{'OK  ' if ok else 'FAIL'} {path}: claimed {claimed}, re-simulated {actual}")
+    print(f"checked {len(results)} replays in {elapsed:.2f}s, {bad} failed")
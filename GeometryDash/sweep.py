@@ -0,0 +1,146 @@
+import math  # For square roots
+
+# ============================================================================
+# SWEPT COLLISIONS - WHEN during a step does the player touch something?
+# ============================================================================
+# Checking "are they touching right now?" once per step misses things when the
+# game is fast: in one step the player can fall straight through a thin
+# platform, or a spike can slide from one side of the player to the other.
+# So instead we work out the exact TIME in the step when they first touch.
+#
+# During one step everything follows a simple path:
+#   - the player's height is a parabola   y(t) = y + v*t + g*t*t/2
+#   - every object slides left            x(t) = x - speed*t
+# so every rule like "the player's bottom is below the spike's edge" turns
+# into "is a*t*t + b*t + c >= 0?", and solving that quadratic tells us exactly
+# when the rule is true. When all the rules of a shape are true at the same
+# time, the player is touching it.
+#
+# A player's path is a list of pieces (start, end, y, v, g): from time start
+# to end (seconds into the step) the top of the player starts at height y
+# with speed v and falls with gravity g (0 while standing on something).
+EPSILON = 1e-6  # Heights closer than this count as touching (floats are never exact)
+
+
+def height(y, v, g, t):
+    # --- Where something starting at height y with speed v is after t seconds --- #
+    return y + v * t + 0.5 * g * t * t
+
+
+def reach_time(bottom, v, g, top, duration):
+    """
+    How long until a falling bottom edge (at height `bottom`, speed v, gravity g)
+    comes down onto the height `top`, or None if it doesn't within `duration`.
+    Something already resting on top (and not going up) reaches it straight away.
+    Things below the top can never land on it - platforms are only solid from above.
+    """
+    gap = top - bottom  # How far is left to fall
+    if gap < -EPSILON:
+        return None
+    if gap <= EPSILON:
+        return 0.0 if v >= 0 else None
+    if g == 0:
+        if v <= 0:
+            return None
+        t = gap / v
+    else:
+        # The positive root of g/2*t*t + v*t - gap = 0, written so that
+        # it doesn't lose precision when v is big
+        t = 2 * gap / (v + math.sqrt(v * v + 2 * g * gap))
+    return t if t <= duration else None
+
+
+def _roots(a, b, c):
+    # --- Real solutions of a*t*t + b*t + c = 0 --- #
+    if abs(a) < EPSILON:
+        return [-c / b] if b != 0 else []
+    disc = b * b - 4 * a * c
+    if disc < 0:
+        return []
+    q = -0.5 * (b + math.copysign(math.sqrt(disc), b))
+    return [q / a, c / q] if q != 0 else [0.0]
+
+
+def when_true(a, b, c, start, end):
+    # --- The times from start to end when a*t*t + b*t + c >= 0, as a list of (from, to) --- #
+    cuts = sorted([start, end] + [t for t in _roots(a, b, c) if start < t < end])
+    spans = []
+    for lo, hi in zip(cuts, cuts[1:]):
+        mid = (lo + hi) / 2  # The sign can only change at a root, so testing the middle is enough
+        if a * mid * mid + b * mid + c >= 0:
+            if spans and spans[-1][1] == lo:
+                spans[-1] = (spans[-1][0], hi)  # Join on to the span before
+            else:
+                spans.append((lo, hi))
+    if start == end and a * start * start + b * start + c >= 0:
+        spans.append((start, end))
+    return spans
+
+
+def _overlap(spans_a, spans_b):
+    # --- The parts of time that are in both lists of spans --- #
+    result = []
+    for a_lo, a_hi in spans_a:
+        for b_lo, b_hi in spans_b:
+            lo, hi = max(a_lo, b_lo), min(a_hi, b_hi)
+            if lo <= hi:
+                result.append((lo, hi))
+    return result
+
+
+def first_time(rules, duration):
+    # --- The earliest time in 0..duration when every (a, b, c) rule is >= 0, or None --- #
+    spans = [(0.0, duration)]
+    for a, b, c in rules:
+        spans = _overlap(spans, when_true(a, b, c, 0.0, duration))
+        if not spans:
+            return None
+    return spans[0][0]
+
+
+def box_time(path, size, left, box, speed):
+    """
+    First time the player (a size x size square at x = left, moving along `path`)
+    overlaps box = (x, y, w, h), which is where the box is at the start of the step.
+    """
+    x, top, w, h = box
+    for start, end, y, v, g in path:
+        bx = x - speed * start  # Where the box is when this piece of the path starts
+        rules = (
+            (0.0, speed, left + size - bx),  # Our right side is past its left side
+            (0.0, -speed, bx + w - left),  # Its right side is past our left side
+            (0.5 * g, v, y + size - top),  # Our bottom is below its top
+            (-0.5 * g, -v, top + h - y),  # Our top is above its bottom
+        )
+        t = first_time(rules, end - start)
+        if t is not None:
+            return start + t
+    return None
+
+
+def spike_time(path, size, left, spike, speed, margin=0.15, safe_top=0.15):
+    """
+    First time the middle of the player's bottom edge goes inside a spike, or None.
+    spike = (x, y, w, h) at the start of the step. To be fair to the player the
+    spike is made narrower by `margin` of its width on each side and its tip
+    (the top `safe_top` of its height) doesn't count.
+    """
+    x, top, w, h = spike
+    foot = left + size / 2  # The point of the player that can be spiked
+    steep = 2 * h / w  # How much each sloping side drops per pixel
+    safe = safe_top * h
+    for start, end, y, v, g in path:
+        sx = x - speed * start  # Where the spike is when this piece of the path starts
+        bottom = y + size
+        rules = (
+            (0.0, speed, foot - sx - margin * w),  # Right of the spike's (narrowed) left corner
+            (0.0, -speed, sx + w - margin * w - foot),  # Left of its right corner
+            # Below the left slope: it goes down by `steep` for every pixel left of the tip
+            (0.5 * g, v + steep * speed, bottom - top - h + steep * (foot - sx) - safe),
+            # Below the right slope
+            (0.5 * g, v - steep * speed, bottom - top - h + steep * (sx + w - foot) - safe),
+        )
+        t = first_time(rules, end - start)
+        if t is not None:
+            return start + t
+    return None
@@ -0,0 +1,22 @@
+# Run with: python -m pytest GeometryDash
+import os
+
+import pytest
+
+import levels
+import main
+
+
+@pytest.mark.parametrize("seed", range(12))
+def test_level_loops_with_a_gap(tmp_path, seed):
+    # When the level starts again, its first object must come at least the
+    # minimum gap after the end of the last one (see main._loop_length)
+    path = os.path.join(tmp_path, "level.gdl")
+    main.generate_level(path, seed, seconds=60)
+    with levels.LevelReader(path) as level:
+        records = [record for i in range(level.chunk_count) for record in level.chunk(i)]
+        tail = max(x + w for x, y, w, h, kind in records)
+        head = min(x for x, y, w, h, kind in records)
+        # The file keeps positions as 4-byte floats, so allow for their rounding
+        assert head + level.length - tail >= main.MIN_GAP_BETWEEN_OBSTACLES - 0.01
+        assert level.seconds == 60
@@ -0,0 +1,141 @@
+# ============================================================================
+# AI TRAINER - teach bots to play by evolution
+# ============================================================================
+# Each bot is a tiny neural network. Every frame it looks at the next few
+# obstacles and decides "jump or not". We play lots of bots at once (on every
+# CPU core), keep the ones that survived longest, and make new bots from them
+# with small random changes. Repeat for many generations and the bots improve.
+#
+# Run it from inside the GeometryDash folder:
+#     python trainer.py --population 64 --generations 20
+import argparse  # Reads the options given on the command line
+import multiprocessing  # Runs games on every CPU core at the same time
+import os  # How many CPU cores there are
+import time  # To measure how fast training goes
+
+import numpy as np  # Fast maths for the neural networks
+
+import main  # The game itself (importing it does not open a window)
+
+OBSTACLES_SEEN = 3  # How many of the next obstacles a bot can see
+INPUTS = 3 + OBSTACLES_SEEN * 5  # Player height, speed, on ground + 5 numbers per obstacle
+HIDDEN = 8  # Size of the hidden layer
+GENOME_SIZE = INPUTS * HIDDEN + HIDDEN + HIDDEN + 1  # Every weight and bias in one list
+JUMP = [main.pygame.K_SPACE]
+NO_KEYS = []
+
+
+def observe(game):
+    # --- Turn the game into a list of numbers the network can read (roughly -1 to 1) --- #
+    player = game.player
+    obs = [(main.GROUND_Y - player.pos.y) / 200, player.vel_y / 1500, 1.0 if player.on_ground else 0.0]
+    ahead = game.world.ahead(player.rect.left, OBSTACLES_SEEN)
+    for kind, x, y, w, h in ahead:
+        obs += [(x - player.rect.right) / main.SCREEN_WIDTH, (main.GROUND_Y - y) / 200,
+                w / 200, h / 200, kind / 2]
+    obs += [1.0, 0.0, 0.0, 0.0, -1.0] * (OBSTACLES_SEEN - len(ahead))  # Nothing there
+    return obs
+
+
+class Policy:
+    """A tiny neural network: inputs -> hidden layer (tanh) -> one number. Positive = jump."""
+    def __init__(self, genome):
+        genome = np.asarray(genome, dtype=np.float64)
+        split = np.cumsum([INPUTS * HIDDEN, HIDDEN, HIDDEN])
+        w1, b1, w2, b2 = np.split(genome, split)
+        self.w1 = w1.reshape(INPUTS, HIDDEN)
+        self.b1, self.w2, self.b2 = b1, w2, b2[0]
+
+    def wants_jump(self, game):
+        hidden = np.tanh(np.dot(observe(game), self.w1) + self.b1)
+        return float(np.dot(hidden, self.w2)) + self.b2 > 0
+
+    def __call__(self, frame, game):
+        # Works as the inputs of a HeadlessRunner
+        return JUMP if game.player.on_ground and self.wants_jump(game) else NO_KEYS
+
+
+def evaluate(job):
+    # --- Play one bot on every seed and return (average score, frames simulated) --- #
+    # This runs inside a worker process, so it only gets plain data
+    genome, seeds, max_steps = job
+    policy = Policy(genome)
+    total_score, total_steps = 0, 0
+    for seed in seeds:
+        runner = main.HeadlessRunner(seed=seed)  # Same seed = same obstacles for every bot
+        stats = runner.run(max_steps, inputs=policy, stop_on_death=True)
+        total_score += stats["score"]
+        total_steps += stats["steps"]
+    return total_score / len(seeds), total_steps
+
+
+def next_generation(rng, population, fitness, elite=4, mutation=0.1):
+    # --- Keep the best bots and fill the rest with mutated children of good bots --- #
+    order = np.argsort(fitness)[::-1]
+    parents = population[order[:max(elite, len(population) // 4)]]
+    children = [population[i] for i in order[:elite]]  # The best survive unchanged
+    while len(children) < len(population):
+        mum, dad = parents[rng.integers(len(parents), size=2)]
+        mix = rng.random(GENOME_SIZE) < 0.5  # Each weight comes from mum or dad
+        child = np.where(mix, mum, dad) + rng.normal(0, mutation, GENOME_SIZE)
+        children.append(child)
+    return np.array(children)
+
+
+def train(population_size=64, generations=20, seeds=(0, 1, 2), seconds=30,
+          workers=None, rng_seed=0, report=print):
+    """
+    Evolve jump policies and return the best genome found.
+    Each bot plays every seed for up to `seconds` of game time.
+    report is called with the stats of each generation.
+    """
+    rng = np.random.default_rng(rng_seed)
+    population = rng.normal(0, 1, (population_size, GENOME_SIZE))
+    max_steps = int(seconds * main.PHYSICS_HZ)
+    best_genome, best_fitness = None, float("-inf")
+    with multiprocessing.Pool(workers) as pool:
+        chunksize = max(1, population_size // ((workers or os.cpu_count()) * 4))
+        for generation in range(generations):
+            start = time.perf_counter()
+            jobs = [(genome, tuple(seeds), max_steps) for genome in population]
+            results = pool.map(evaluate, jobs, chunksize=chunksize)
+            elapsed = time.perf_counter() - start
+            fitness = np.array([score for score, _ in results])
+            steps = sum(s for _, s in results)
+            if fitness.max() > best_fitness:
+                best_fitness = float(fitness.max())
+                best_genome = population[int(fitness.argmax())].copy()
+            runs = len(jobs) * len(seeds)
+            report({
+                "generation": generation,
+                "best": float(fitness.max()),
+                "mean": float(fitness.mean()),
+                "runs": runs,
+                "seconds": elapsed,
+                "runs_per_minute": runs / elapsed * 60,
+                "steps_per_second": steps / elapsed,
+            })
+            population = next_generation(rng, population, fitness)
+    return best_genome, best_fitness
+
+
+def print_report(stats):
+    print(f"gen {stats['generation']:>3}  best {stats['best']:>8.0f}  mean {stats['mean']:>8.0f}  "
+          f"{stats['runs_per_minute']:>9.0f} runs/min  {stats['steps_per_second']:>10.0f} steps/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evolve bots that play Geometry Dash")
+    parser.add_argument("--population", type=int, default=64)
+    parser.add_argument("--generations", type=int, default=20)
+    parser.add_argument("--seeds", type=int, default=3, help="how many levels each bot plays")
+    parser.add_argument("--seconds", type=float, default=30, help="longest a run can last (game time)")
+    parser.add_argument("--workers", type=int, default=None, help="processes to use (default: every core)")
+    parser.add_argument("--save", metavar="PATH", help="save the best genome with numpy.save")
+    args = parser.parse_args()
+
+    genome, fitness = train(args.population, args.generations, tuple(range(args.seeds)),
+                            args.seconds, args.workers, report=print_report)
+    print(f"best average score: {fitness:.0f}")
+    if args.save:
+        np.save(args.save, genome)
@@ -0,0 +1,135 @@
+import numpy as np  # NumPy - fast arrays of numbers that we can change all at once
+
+# ============================================================================
+# KINDS OF OBJECT
+# ============================================================================
+# Every object in the world is just a row of numbers, so we use a small
+# number to remember what kind of object each row is
+SPIKE = 0
+PLATFORM = 1
+JUMP_PAD = 2
+
+
+# ============================================================================
+# THE WORLD STORE
+# ============================================================================
+class World:
+    """
+    Stores every moving object in the level as rows in a few NumPy arrays.
+
+    Instead of a list of objects that each have their own x, y, width and height,
+    we keep one array per value (this is called "struct of arrays"):
+        x    = [ 1050.0,  980.0,  1020.0, ... ]
+        y    = [  380.0,  360.0,   440.0, ... ]
+        kind = [ SPIKE, PLATFORM, JUMP_PAD, ... ]
+    Row number i in every array describes the same object.
+    (x, y, w and h are the four columns of one table called xywh, so we can
+    also read a whole row at once.)
+
+    This means we can move every object with one subtraction and remove
+    every off-screen object in one go, even when there are thousands of them.
+
+    The rows are always kept sorted from left to right (by x). Every object
+    scrolls at the same speed, so scrolling never changes that order. This lets
+    us find the few objects near the player with a quick binary search
+    (see near) instead of checking every object in the level.
+    """
+    # The arrays are made once and rows are reused after objects leave the screen,
+    # so spawning and removing objects doesn't create any new Python objects
+    __slots__ = ("count", "max_width", "xywh", "kind", "x", "y", "w", "h")
+
+    def __init__(self, capacity=256):
+        self.count = 0  # How many rows are actually in use
+        self.max_width = 0.0  # Widest object ever added (used by near)
+        self._allocate(np.zeros((capacity, 4), dtype=np.float64),
+                       np.zeros(capacity, dtype=np.int8))
+
+    def _allocate(self, xywh, kind):
+        self.xywh = xywh
+        self.kind = kind
+        # x, y, w and h are "views" - they share their numbers with xywh
+        self.x, self.y, self.w, self.h = (xywh[:, i] for i in range(4))
+
+    def __len__(self):
+        return self.count
+
+    def add(self, kind, x, y, w, h):
+        # --- Put a new object in its place in the left-to-right order --- #
+        if self.count == len(self.x):
+            self._grow()
+        n = self.count
+        if n == 0 or x >= self.x[n - 1]:
+            i = n  # New objects nearly always spawn on the right, so they go at the end
+        else:
+            # Find where it belongs and slide the rows after it one place along
+            i = int(np.searchsorted(self.x[:n], x, side="right"))
+            self.xywh[i + 1:n + 1] = self.xywh[i:n]
+            self.kind[i + 1:n + 1] = self.kind[i:n]
+        self.xywh[i] = (x, y, w, h)
+        self.kind[i] = kind
+        self.count += 1
+        self.max_width = max(self.max_width, w)
+        return i
+
+    def _grow(self):
+        # --- Out of rows, so make every array twice as long --- #
+        new_capacity = max(1, len(self.x) * 2)
+        xywh = np.zeros((new_capacity, 4), dtype=np.float64)
+        kind = np.zeros(new_capacity, dtype=np.int8)
+        xywh[:self.count] = self.xywh[:self.count]
+        kind[:self.count] = self.kind[:self.count]
+        self._allocate(xywh, kind)
+
+    def scroll(self, dx):
+        # --- Move every object left by dx pixels in a single subtraction --- #
+        self.x[:self.count] -= dx
+
+    def cull(self):
+        # --- Remove every object whose right edge has gone past the left of the screen --- #
+        n = self.count
+        # Only objects that start left of the screen (x < 0) can be gone, and because
+        # the rows are sorted by x they are all at the front. Most frames there are none
+        first_on_screen = int(self.x[:n].searchsorted(0.0))
+        if first_on_screen == 0:
+            return 0  # Nothing left the screen this frame
+        front = slice(0, first_on_screen)
+        keep = self.x[front] + self.w[front] >= 0  # Wide objects may still be poking onto the screen
+        kept_front = int(np.count_nonzero(keep))
+        # Slide the rows we keep to the front of each array (order stays the same)
+        for arr in (self.xywh, self.kind):
+            arr[:kept_front] = arr[front][keep]
+            arr[kept_front:n - first_on_screen + kept_front] = arr[first_on_screen:n]
+        self.count = n - first_on_screen + kept_front
+        return first_on_screen - kept_front
+
+    def clear(self):
+        self.count = 0
+        self.max_width = 0.0
+
+    def boxes(self, kind):
+        # --- (x, y, w, h) of every object of one kind, as plain Python numbers --- #
+        return self.xywh[:self.count][self.kind[:self.count] == kind].tolist()
+
+    def ahead(self, left, count):
+        # --- The next count objects (kind, x, y, w, h) whose right edge is past left --- #
+        x = self.x[:self.count]
+        lo = int(x.searchsorted(left - self.max_width, side="left"))
+        found = []
+        while lo < self.count and len(found) < count:
+            hi = lo + count  # Look at a few rows at a time - we usually only need the first ones
+            for kind, box in zip(self.kind[lo:hi].tolist(), self.xywh[lo:hi].tolist()):
+                if box[0] + box[2] >= left:
+                    found.append((kind, *box))
+            lo = hi
+        return found[:count]
+
+    def near(self, left, right):
+        # --- (kind, x, y, w, h) of every object whose x-span touches left..right (the "broadphase") --- #
+        # Because the rows are sorted by x, binary search finds the first row that could
+        # reach left (no object is wider than max_width) and the last row starting before right
+        x = self.x[:self.count]
+        lo = int(x.searchsorted(left - self.max_width, side="left"))
+        hi = int(x.searchsorted(right, side="right"))
+        return [(kind, *box)
+                for kind, box in zip(self.kind[lo:hi].tolist(), self.xywh[lo:hi].tolist())
+                if box[0] + box[2] >= left]
@@ -0,0 +1,163 @@
+import multiprocessing
+
+import numpy as np
+
+from game import LEVEL, Game
+
+#####
+# Pac-Man as a reinforcement learning environment (no window, no pygame)
+#
+#     env = PacManEnv()
+#     obs, info = env.reset()
+#     obs, reward, terminated, truncated, info = env.step(action)
+#
+# VectorEnv runs n games in lockstep and takes/returns one row per game.
+# Finished games start again by themselves. With workers=k the games are
+# split between k processes, each stepping its share at the same time.
+#
+# Actions: 0 keep going, 1 up, 2 left, 3 down, 4 right (like pressing the key
+# in the real game, a turn waits until that way is open - see Game.turn).
+# Observation: the maze as a rows x cols grid of EMPTY, WALL, PELLET, GHOST, PAC.
+# Reward: +1 for each pellet, -1 for being caught.
+#####
+
+EMPTY, WALL, PELLET, GHOST, PAC = range(5)
+ACTIONS = 5
+
+
+class VectorEnv:
+    def __init__(self, n, workers=None, max_steps=1000, autoreset=True, maze=LEVEL, ghosts=None):
+        self.n = n
+        self.max_steps = max_steps
+        self.autoreset = autoreset
+        self.rows, self.cols = maze.rows, maze.cols
+        self.workers = None
+        if workers and workers > 1:
+            # Each process gets its own share of the games and a pipe to talk over
+            shares = [len(share) for share in np.array_split(np.arange(n), workers) if len(share)]
+            self.splits = np.cumsum(shares)[:-1]
+            self.workers = []
+            for share in shares:
+                conn, child = multiprocessing.Pipe()
+                process = multiprocessing.Process(
+                    target=_serve, args=(child, share, max_steps, autoreset, maze, ghosts), daemon=True)
+                process.start()
+                child.close()
+                self.workers.append((conn, process))
+            return
+        self.game = Game(n, maze, ghosts)
+        self.rng = np.random.default_rng()
+        # Walls and pellets of every game, kept up to date as pellets are eaten,
+        # so an observation is one copy plus the ghosts and pac-man drawn on top
+        walls = np.frombuffer(self.game.nav.open, dtype=np.uint8) == 0
+        self.fresh = np.where(walls, WALL, np.where(self.game.layout == 1, PELLET, EMPTY)).astype(np.int8)
+        self.board = np.tile(self.fresh, (n, 1))
+
+    def observe(self):
+        game = self.game
+        obs = self.board.copy()
+        obs[game.owner, game.ghosts.cell[:len(game.ghosts)]] = GHOST
+        obs[np.arange(self.n), game.pac] = PAC
+        return obs.reshape(self.n, self.rows, self.cols)
+
+    def reset(self, seed=None):
+        if self.workers:
+            for i, (conn, _) in enumerate(self.workers):
+                conn.send(("reset", None if seed is None else seed + i))
+            return _join([conn.recv() for conn, _ in self.workers])
+        self.rng = np.random.default_rng(seed)
+        self.game.reset()
+        self.board[:] = self.fresh
+        return self.observe(), {"score": self.game.score.copy()}
+
+    def step(self, actions):
+        actions = np.broadcast_to(np.asarray(actions, dtype=np.int64), (self.n,))
+        if self.workers:
+            for (conn, _), share in zip(self.workers, np.split(actions, self.splits)):
+                conn.send(("step", share))
+            return _join([conn.recv() for conn, _ in self.workers])
+        game = self.game
+        game.turn(actions - 1)
+        game.tick(self.rng)
+        self.board[game.eaten, game.pac[game.eaten]] = EMPTY
+        reward = game.eaten.astype(np.float32) - game.dead
+        terminated = game.dead | (game.left == 0)
+        truncated = ~terminated & (game.ticks >= self.max_steps)
+        info = {"score": game.score.copy()}  # For finished games, the score they finished with
+        if self.autoreset:
+            done = terminated | truncated
+            if done.any():
+                game.reset(done)  # The finished games start again straight away
+                self.board[done] = self.fresh
+        return self.observe(), reward, terminated, truncated, info
+
+    def close(self):
+        if self.workers:
+            for conn, process in self.workers:
+                conn.send(("close", None))
+                process.join()
+            self.workers = None
+
+
+class PacManEnv:
+    # One game on its own. It does not start again by itself: call reset() once it is over
+    def __init__(self, max_steps=1000, **options):
+        self.vector = VectorEnv(1, max_steps=max_steps, autoreset=False, **options)
+
+    def reset(self, seed=None):
+        obs, info = self.vector.reset(seed)
+        return obs[0], {key: value[0] for key, value in info.items()}
+
+    def step(self, action):
+        obs, reward, terminated, truncated, info = self.vector.step([action])
+        return (obs[0], float(reward[0]), bool(terminated[0]), bool(truncated[0]),
+                {key: value[0] for key, value in info.items()})
+
+    def close(self):
+        self.vector.close()
+
+
+def _serve(conn, n, max_steps, autoreset, maze, ghosts):
+    # Runs in a worker process: step its share of the games whenever the main process asks
+    env = VectorEnv(n, max_steps=max_steps, autoreset=autoreset, maze=maze, ghosts=ghosts)
+    while True:
+        command, value = conn.recv()
+        if command == "reset":
+            conn.send(env.reset(value))
+        elif command == "step":
+            conn.send(env.step(value))
+        else:
+            break
+
+
+def _join(results):
+    # Stick the workers' shares back together, in order
+    joined = []
+    for parts in zip(*results):
+        if isinstance(parts[0], dict):
+            joined.append({key: np.concatenate([part[key] for part in parts]) for key in parts[0]})
+        else:
+            joined.append(np.concatenate(parts))
+    return tuple(joined)
+
+
+if __name__ == "__main__":
+    # How many steps per second? Random actions in lots of games at once
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Time the Pac-Man environment")
+    parser.add_argument("--games", type=int, default=1024, help="games stepped in lockstep")
+    parser.add_argument("--workers", type=int, default=None, help="processes to split the games between")
+    parser.add_argument("--steps", type=int, default=500)
+    args = parser.parse_args()
+
+    vector = VectorEnv(args.games, workers=args.workers)
+    vector.reset(seed=0)
+    actions = np.random.default_rng(0).integers(0, ACTIONS, (args.steps, args.games))
+    start = time.perf_counter()
+    for action in actions:
+        vector.step(action)
+    elapsed = time.perf_counter() - start
+    vector.close()
+    print(f"{args.games} games x {args.steps} steps: {args.games * args.steps / elapsed:,.0f} steps/s")
@@ -0,0 +1,224 @@
+import numpy as np
+
+from ghosts import CHASE, REVERSE, SCATTER, GhostSwarm
+from maze import PELLET, Maze
+from nav import DIRECTIONS, Navigator
+
+#####
+# The rules of the game, with no window and no pygame
+#
+# Game runs n separate games of Pac-Man side by side. Everything about them is
+# kept in NumPy arrays with one row per game, so a tick moves every Pac-Man and
+# every ghost in every game with a handful of array operations. The window in
+# main.py is just one of these games (n = 1); env.py uses lots of them at once.
+#
+# Directions are indexes into nav.DIRECTIONS: 0 up, 1 left, 2 down, 3 right.
+#####
+
+TICK_RATE = 10  # game ticks per second (pac-man and the ghosts move a tile a tick)
+TURN_BUFFER = 2  # turns that can wait for the way to open, per game
+UP, LEFT, DOWN, RIGHT = range(4)
+
+#####
+# . - Dots
+# # - Walls
+# b - Gate
+MAZE = [
+    ["#", "#", "#", "#", "#", "#", "#", "#", "#", "#", "#", "#", "#", "#", "#", "#", "#", "#", "#", "#", "#"],
+    ["#", ".", ".", ".", ".", ".", ".", ".", ".", ".", "#", ".", ".", ".", ".", ".", ".", ".", ".", ".", "#"],
+    ["#", ".", "#", "#", "#", ".", "#", "#", "#", ".", "#", ".", "#", "#", "#", ".", "#", "#", "#", ".", "#"],
+    ["#", ".", "#", " ", "#", ".", "#", " ", "#", ".", "#", ".", "#", " ", "#", ".", "#", " ", "#", ".", "#"],
+    ["#", ".", "#", "#", "#", ".", "#", "#", "#", ".", "#", ".", "#", "#", "#", ".", "#", "#", "#", ".", "#"],
+    ["#", ".", ".", ".", ".", ".", ".", ".", ".", ".", ".", ".", ".", ".", ".", ".", ".", ".", ".", ".", "#"],
+    ["#", ".", "#", "#", "#", ".", "#", ".", "#", "#", "#", "#", "#", ".", "#", ".", "#", "#", "#", ".", "#"],
+    ["#", ".", "#", "#", "#", ".", "#", ".", "#", "#", "#", "#", "#", ".", "#", ".", "#", "#", "#", ".", "#"],
+    ["#", ".", ".", ".", ".", ".", "#", ".", ".", ".", "#", ".", ".", ".", "#", ".", ".", ".", ".", ".", "#"],
+    ["#", "#", "#", "#", "#", ".", "#", "#", "#", ".", "#", ".", "#", "#", "#", ".", "#", "#", "#", "#", "#"],
+    [" ", " ", " ", " ", "#", ".", "#", " ", " ", " ", " ", " ", " ", " ", "#", ".", "#", " ", " ", " ", " "],
+    [" ", " ", " ", " ", "#", ".", "#", " ", "#", "b", "b", "b", "#", " ", "#", ".", "#", " ", " ", " ", " "],
+    ["#", "#", "#", "#", "#", ".", "#", " ", "#", " ", " ", " ", "#", " ", "#", ".", "#", "#", "#", "#", "#"],
+    ["#", ".", ".", ".", ".", ".", " ", " ", "#", " ", " ", " ", "#", " ", " ", ".", ".", ".", ".", ".", "#"],
+    ["#", "#", "#", "#", "#", ".", "#", " ", "#", " ", " ", " ", "#", " ", "#", ".", "#", "#", "#", "#", "#"],
+    [" ", " ", " ", " ", "#", ".", "#", " ", "#", "#", "#", "#", "#", " ", "#", ".", "#", " ", " ", " ", " "],
+    [" ", " ", " ", " ", "#", ".", "#", " ", " ", " ", " ", " ", " ", " ", "#", ".", "#", " ", " ", " ", " "],
+    ["#", "#", "#", "#", "#", ".", "#", "#", "#", ".", "#", ".", "#", "#", "#", ".", "#", "#", "#", "#", "#"],
+    ["#", ".", ".", ".", ".", ".", "#", ".", ".", ".", "#", ".", ".", ".", "#", ".", ".", ".", ".", ".", "#"],
+    ["#", ".", "#", "#", "#", ".", "#", ".", "#", "#", "#", "#", "#", ".", "#", ".", "#", "#", "#", ".", "#"],
+    ["#", ".", "#", "#", "#", ".", "#", ".", "#", "#", "#", "#", "#", ".", "#", ".", "#", "#", "#", ".", "#"],
+    ["#", ".", ".", ".", ".", ".", ".", ".", ".", ".", ".", ".", ".", ".", ".", ".", ".", ".", ".", ".", "#"],
+    ["#", ".", "#", "#", "#", ".", "#", "#", "#", ".", "#", ".", "#", "#", "#", ".", "#", "#", "#", ".", "#"],
+    ["#", ".", "#", " ", "#", ".", "#", " ", "#", ".", "#", ".", "#", " ", "#", ".", "#", " ", "#", ".", "#"],
+    ["#", ".", "#", "#", "#", ".", "#", "#", "#", ".", "#", ".", "#", "#", "#", ".", "#", "#", "#", ".", "#"],
+    ["#", ".", ".", ".", ".", ".", ".", ".", ".", ".", "#", ".", ".", ".", ".", ".", ".", ".", ".", ".", "#"],
+    ["#", "#", "#", "#", "#", "#", "#", "#", "#", "#", "#", "#", "#", "#", "#", "#", "#", "#", "#", "#", "#"]
+]
+
+START = (10, 21)  # pac-man's tile at the start
+LEVEL = Maze.from_rows(MAZE, start=START, ghosts=[(10, 10), (9, 12)])
+
+
+def ghosts_for(maze, extra=0):
+    """
+    The ghosts for a maze, as (col, row, scatter corner, tiles in front of
+    pac-man it chases, sprite). The first is red and aims straight at pac-man,
+    the second pink, 4 tiles in front of him. `extra` more (for swarm stress
+    tests) take turns starting from the maze's ghost starts.
+    """
+    corners = [(maze.cols - 2, 0), (1, 0), (maze.cols - 2, maze.rows - 1), (1, maze.rows - 1)]
+    spawns = maze.ghosts or [maze.start]
+    count = len(maze.ghosts) + extra
+    return [spawns[i % len(spawns)] + (corners[i % 4], (0, 4, 2)[i % 3], i % 5) for i in range(count)]
+
+
+# Ghosts take turns heading for their corners (scatter) and hunting pac-man (chase).
+# (mode, how many seconds it lasts) - the last one lasts for ever
+MODES = [(SCATTER, 7), (CHASE, 20), (SCATTER, 7), (CHASE, 20), (SCATTER, 5), (CHASE, 20), (SCATTER, 5), (CHASE, None)]
+MODE_ENDS = np.cumsum([length for mode, length in MODES[:-1]])
+MODE_KINDS = np.array([mode for mode, length in MODES], dtype=np.int8)
+
+_navigators = {}
+
+
+def navigator(maze):
+    # Compiling a maze takes a moment, so every Game with the same maze shares one Navigator
+    key = maze.key()
+    if key not in _navigators:
+        _navigators[key] = Navigator(maze)
+    return _navigators[key]
+
+
+class Game:
+    def __init__(self, n=1, maze=LEVEL, ghosts=None, tick_rate=TICK_RATE):
+        self.n = n
+        self.tick_rate = tick_rate
+        self.mode_ends = MODE_ENDS * tick_rate  # the tick each mode ends on
+        self.maze = maze
+        self.rows, self.cols = maze.rows, maze.cols
+        self.nav = navigator(maze)
+        self.start = maze.start[1] * self.cols + maze.start[0]
+        ghosts = ghosts_for(maze) if ghosts is None else ghosts
+
+        self.layout = (maze.grid == PELLET[0]).astype(np.uint8).ravel()  # 1 where a pellet starts
+
+        # One row per game
+        self.pellets = np.zeros((n, self.rows * self.cols), dtype=np.uint8)  # 1 = pellet still there
+        self.left = np.zeros(n, dtype=np.int64)  # pellets still to eat
+        self.pac = np.zeros(n, dtype=np.int64)  # pac-man's tile
+        self.pac_dir = np.zeros(n, dtype=np.int64)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.ticks = np.zeros(n, dtype=np.int64)
+        self.dead = np.zeros(n, dtype=bool)
+        self.eaten = np.zeros(n, dtype=bool)  # ate a pellet on the last tick
+        self.turns = np.full((n, TURN_BUFFER), -1, dtype=np.int64)  # turns waiting, oldest first (-1 = none)
+        self.turned = np.zeros(n, dtype=bool)  # took a waiting turn on the last tick
+        self.caught_by = np.full(n, -1, dtype=np.int64)  # the swarm row of the ghost that caught pac-man, or -1
+
+        # Every game's ghosts sit next to each other in one swarm: game i has rows
+        # i * per_game to (i + 1) * per_game
+        self.per_game = len(ghosts)
+        self.ghosts = GhostSwarm(self.nav, capacity=max(1, n * self.per_game))
+        for _ in range(n):
+            for col, row, scatter, ahead, kind in ghosts:
+                self.ghosts.add(col, row, scatter, ahead=ahead, kind=kind)
+        self.owner = np.repeat(np.arange(n), self.per_game)  # which game each ghost is in
+        self._ghost_start = self.ghosts.cell[:len(self.ghosts)].copy()
+        self._ghost_start_dir = self.ghosts.dir[:len(self.ghosts)].copy()
+        self.neighbour = self.nav.neighbour
+
+        # Occupancy grids, one row per game, for working out who met whom on a tick.
+        # Only the tiles the ghosts are on get written, and they are cleared again
+        # straight after, so a tick costs the same however big the maze is
+        self.occupant = np.full((n, self.rows * self.cols), -1, dtype=np.int32)  # a ghost on the tile, or -1
+        self.leaving = np.zeros((n, self.rows * self.cols), dtype=np.uint8)  # bit d: a ghost left the tile going d
+        self.reset()
+
+    def reset(self, which=None):
+        # Start again (every game, or only the games where `which` is True)
+        games = np.arange(self.n) if which is None else np.flatnonzero(which)
+        self.pellets[games] = self.layout
+        self.left[games] = int(self.layout.sum())
+        self.pac[games] = self.start
+        self.pac_dir[games] = RIGHT  # start off right first
+        self.score[games] = 0
+        self.ticks[games] = 0
+        self.dead[games] = False
+        self.eaten[games] = False
+        self.turns[games] = -1
+        self.turned[games] = False
+        self.caught_by[games] = -1
+        rows = (games[:, None] * self.per_game + np.arange(self.per_game)).ravel()
+        self.ghosts.cell[rows] = self._ghost_start[rows]
+        self.ghosts.dir[rows] = self._ghost_start_dir[rows]
+
+    def turn(self, directions):
+        # Ask pac-man to turn (-1 = nothing new). The turn waits until that way is open,
+        # so a key pressed before a junction still works when he gets there. If
+        # TURN_BUFFER turns are already waiting the oldest is forgotten
+        directions = np.broadcast_to(np.asarray(directions), (self.n,))
+        games = np.flatnonzero(directions >= 0)
+        waiting = (self.turns[games] >= 0).sum(axis=1)
+        full = waiting == TURN_BUFFER
+        self.turns[games[full]] = np.roll(self.turns[games[full]], -1, axis=1)
+        self.turns[games, np.minimum(waiting, TURN_BUFFER - 1)] = directions[games]
+
+    def _take_turns(self, playing):
+        # The oldest waiting turn that is open now is taken, and any older ones dropped
+        turns = self.turns
+        ok = (turns >= 0) & (self.neighbour[self.pac[:, None], np.maximum(turns, 0)] >= 0)
+        self.turned = playing & ok.any(axis=1)
+        games = np.flatnonzero(self.turned)
+        first = ok[games].argmax(axis=1)
+        self.pac_dir[games] = turns[games, first]
+        keep = np.arange(TURN_BUFFER) + first[:, None] + 1
+        turns[games] = np.where(keep < TURN_BUFFER,
+                                np.take_along_axis(turns[games], np.minimum(keep, TURN_BUFFER - 1), axis=1), -1)
+
+    def tick(self, rng=None):
+        playing = ~self.dead
+        games = np.arange(self.n)
+        self._take_turns(playing)
+
+        # Ghosts first, with each game's own mode
+        mode = MODE_KINDS[np.searchsorted(self.mode_ends, self.ticks, side="right")]
+        self.ghosts.mode[:len(self.ghosts)] = mode[self.owner]
+        pac_dir = np.array(DIRECTIONS)[self.pac_dir]
+        ghosts_before = self.ghosts.cell[:len(self.ghosts)].copy()
+        self.ghosts.step(self.pac[self.owner], (pac_dir[self.owner, 0], pac_dir[self.owner, 1]), rng)
+
+        # Then pac-man moves a tile, if that way is open
+        pac_before = self.pac.copy()
+        nxt = self.neighbour[self.pac, self.pac_dir]
+        moving = playing & (nxt >= 0)
+        self.pac[moving] = nxt[moving]
+
+        self.eaten = playing & (self.pellets[games, self.pac] == 1)
+        self.pellets[games[self.eaten], self.pac[self.eaten]] = 0
+        self.left -= self.eaten
+        self.score += self.eaten
+
+        caught_by = self._meet(ghosts_before, pac_before, moving)
+        caught = playing & (caught_by >= 0)
+        self.caught_by[caught] = caught_by[caught]
+        self.dead |= caught
+        self.ticks += playing
+
+    def _meet(self, ghosts_before, pac_before, moving):
+        # The ghost each pac-man ran into this tick (-1 for none): one on the tile he is on
+        # now, or one that went the other way along the same step (they swapped tiles)
+        games = np.arange(self.n)
+        cells = self.ghosts.cell[:len(self.ghosts)]
+        ids = np.arange(len(self.ghosts), dtype=np.int32)
+        self.occupant[self.owner, cells] = ids
+        direction = self.ghosts.dir[:len(self.ghosts)]
+        for d in range(4):
+            went = (direction == d) & (cells != ghosts_before)
+            self.leaving[self.owner[went], ghosts_before[went]] |= 1 << d
+
+        caught_by = self.occupant[games, self.pac].astype(np.int64)
+        swapped = moving & (caught_by < 0) & (self.leaving[games, self.pac] & (1 << REVERSE[self.pac_dir]) != 0)
+        # The one that swapped is now on pac-man's old tile
+        caught_by[swapped] = self.occupant[swapped.nonzero()[0], pac_before[swapped]]
+
+        self.occupant[self.owner, cells] = -1
+        self.leaving[self.owner, ghosts_before] = 0
+        return caught_by
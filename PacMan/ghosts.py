@@ -0,0 +1,183 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from nav import DIRECTIONS, FAR
+
+#####
+# All the ghosts at once
+#
+# Instead of one Python object per ghost, every ghost is a row in a few NumPy
+# arrays (its tile, direction, mode, ...). Each tick all of them choose and
+# move together with a handful of array operations, so a swarm of thousands
+# of ghosts costs about the same Python work as two.
+#
+# Moves are looked up in tables made once from the Navigator (nav.py):
+#   neighbour[cell, d] = the tile one step in direction d, or -1 for a wall
+# and the distance of any tile to a target comes from the Navigator's cached
+# node distances (see step below).
+#####
+
+SCATTER, CHASE, FRIGHTENED = 0, 1, 2
+DENSE_NODES = 4096  # Mazes with up to this many nodes keep whole rows of distances
+
+REVERSE = np.array([DIRECTIONS.index((-dx, -dy)) for dx, dy in DIRECTIONS])
+
+
+class GhostSwarm:
+    def __init__(self, nav, capacity=16, cache_size=128):
+        self.nav = nav
+        self.cols = nav.cols
+        self.count = 0
+        self.cache_size = cache_size
+        self._tables = OrderedDict()  # node -> the nodes its search reached (sorted) and their distances
+
+        self.neighbour = nav.neighbour
+        # Where each tile sits in the junction graph. A node is its own both ends with offset 0
+        node_of = np.frombuffer(nav.node_of, dtype=np.int64)
+        self.edge = np.frombuffer(nav.edge_of, dtype=np.int64)
+        edges = np.array(nav.edges, dtype=np.int64).reshape(-1, 3)
+        if not len(edges):
+            edges = np.zeros((1, 3), dtype=np.int64)
+        along = edges[np.maximum(self.edge, 0)]
+        is_node = node_of != -1
+        self.end_a = np.where(is_node, node_of, along[:, 0])
+        self.end_b = np.where(is_node, node_of, along[:, 1])
+        self.length = np.where(is_node, 0, along[:, 2]).astype(np.float64)
+        self.offset = np.where(is_node, 0, np.frombuffer(nav.offset, dtype=np.int64)).astype(np.float64)
+        self.node_cells = np.frombuffer(nav.nodes, dtype=np.int64)
+        self.snap = np.frombuffer(nav.snap, dtype=np.int64)
+
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        self.cell = np.zeros(capacity, dtype=np.int64)  # the tile each ghost is on
+        self.dir = np.zeros(capacity, dtype=np.int8)  # index into DIRECTIONS
+        self.mode = np.zeros(capacity, dtype=np.int8)  # SCATTER, CHASE or FRIGHTENED
+        self.scatter = np.zeros(capacity, dtype=np.int64)  # its corner tile for scatter mode
+        self.ahead = np.zeros(capacity, dtype=np.int64)  # chase: tiles in front of pac-man to aim for
+        self.kind = np.zeros(capacity, dtype=np.int16)  # which sprite to draw it with
+
+    def __len__(self):
+        return self.count
+
+    def add(self, col, row, scatter, ahead=0, kind=0, direction=(1, 0)):
+        if self.count == len(self.cell):
+            self._grow()
+        i = self.count
+        self.cell[i] = row * self.cols + col
+        self.dir[i] = DIRECTIONS.index(direction)
+        self.mode[i] = SCATTER
+        self.scatter[i] = self.nav.target(*scatter)
+        self.ahead[i] = ahead
+        self.kind[i] = kind
+        self.count += 1
+        return i
+
+    def _grow(self):
+        old = (self.cell, self.dir, self.mode, self.scatter, self.ahead, self.kind)
+        self._allocate(len(self.cell) * 2)
+        for new, values in zip((self.cell, self.dir, self.mode, self.scatter, self.ahead, self.kind), old):
+            new[:self.count] = values[:self.count]
+
+    # ----- choosing moves -----
+    def _table(self, node):
+        # The Navigator's search from one node as arrays, for looking up lots at once: a
+        # row of every node's distance on a small maze, or the nodes it reached (sorted)
+        # and their distances on a big one
+        table = self._tables.get(node)
+        if table is not None:
+            self._tables.move_to_end(node)
+            return table
+        field = self.nav.node_field(node)
+        keys = np.fromiter(field.keys(), dtype=np.int64, count=len(field))
+        values = np.fromiter(field.values(), dtype=np.float64, count=len(field))
+        if len(self.node_cells) <= DENSE_NODES:
+            table = np.full(len(self.node_cells), np.inf)
+            table[keys] = values
+        else:
+            order = np.argsort(keys)
+            table = (keys[order], values[order])
+        self._tables[node] = table
+        if len(self._tables) > self.cache_size:
+            self._tables.popitem(last=False)
+        return table
+
+    def _tables_for(self, ends):
+        # The searches from every node in `ends`, stuck together into one table
+        tables = [self._table(end) for end in ends.tolist()]
+        if len(self.node_cells) <= DENSE_NODES:
+            return np.stack(tables)
+        # Node m in the search from ends[j] is stored under the key j * (number of nodes) + m
+        size = len(self.node_cells)
+        keys = np.concatenate([keys + j * size for j, (keys, values) in enumerate(tables)])
+        values = np.concatenate([values for keys, values in tables])
+        return keys, values
+
+    def _lookup(self, tables, which, nodes):
+        # Distance to node nodes[i, d] in search which[i] (inf if it wasn't reached)
+        if len(self.node_cells) <= DENSE_NODES:
+            return tables[which[:, None], nodes]
+        keys, values = tables
+        want = which[:, None] * len(self.node_cells) + nodes
+        i = np.minimum(np.searchsorted(keys, want), len(keys) - 1)
+        return np.where(keys[i] == want, values[i], np.inf)
+
+    def targets(self, pac_cell, pac_dir):
+        # The tile every ghost is heading for
+        n = self.count
+        pac_col, pac_row = pac_cell % self.cols, pac_cell // self.cols
+        ahead = self.ahead[:n]
+        col = np.clip(pac_col + pac_dir[0] * ahead, 0, self.cols - 1)
+        row = np.clip(pac_row + pac_dir[1] * ahead, 0, self.nav.rows - 1)
+        chase = self.snap[row * self.cols + col]
+        return np.where(self.mode[:n] == SCATTER, self.scatter[:n], chase)
+
+    def step(self, pac_cell, pac_dir, rng=None):
+        n = self.count
+        if n == 0:
+            return
+        cell, direction = self.cell[:n], self.dir[:n]
+        nxt = self.neighbour[cell]  # (ghosts, 4)
+
+        # Legal moves: not into a wall, and not turning back unless that is the only way
+        legal = nxt >= 0
+        legal[np.arange(n), REVERSE[direction]] &= legal.sum(axis=1) == 1
+
+        # Distance from each possible next tile to the ghost's target. The target's
+        # corridor has two end nodes, and the searches from those (see nav.py) give
+        # the distance of any node, plus the straight-line distance for nodes the
+        # searches didn't reach - for every ghost at once
+        target = self.targets(pac_cell, pac_dir)
+        safe = np.where(legal, nxt, 0)
+        k, length = self.offset[safe], self.length[safe]
+        ends, which = np.unique(np.concatenate([self.end_a[target], self.end_b[target]]), return_inverse=True)
+        tables = self._tables_for(ends)
+        extra_a = self.offset[target][:, None]
+        extra_b = self.length[target][:, None] - extra_a
+        target_row, target_col = (target // self.cols)[:, None], (target % self.cols)[:, None]
+        to_ends = []
+        for nodes in (self.end_a[safe], self.end_b[safe]):
+            d = np.minimum(self._lookup(tables, which[:n], nodes) + extra_a,
+                           self._lookup(tables, which[n:], nodes) + extra_b)
+            # Further than the search went: score it by the straight-line distance
+            cells = self.node_cells[nodes]
+            far = FAR + np.abs(cells // self.cols - target_row) + np.abs(cells % self.cols - target_col)
+            to_ends.append(np.where(np.isinf(d), far, d))
+        distance = np.minimum(k + to_ends[0], length - k + to_ends[1])
+        # Straight along the corridor the target is in
+        same = (self.edge[safe] == self.edge[target][:, None]) & (self.edge[safe] != -1)
+        distance = np.where(same, np.minimum(distance, np.abs(k - self.offset[target][:, None])), distance)
+
+        frightened = self.mode[:n] == FRIGHTENED
+        if frightened.any():
+            rng = rng or np.random.default_rng()
+            distance[frightened] = rng.random((int(frightened.sum()), 4))
+
+        distance = np.where(legal, distance, np.inf)
+        # argmin picks the first of equal moves, and the columns are in DIRECTIONS order,
+        # so when two moves are equally good a ghost prefers up, then left, down, right
+        choice = np.argmin(distance, axis=1)
+        moving = legal.any(axis=1)  # A walled-in tile has nowhere to go
+        direction[moving] = choice[moving]
+        cell[moving] = nxt[np.arange(n), choice][moving]
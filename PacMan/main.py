@@ -1,217 +1,190 @@
-import pygame
+import argparse
+import os
 import sys
-import random
-from pygame import Vector2
+import time
 
-pygame.init()
+import numpy as np
+import pygame
 
-TILE_SIZE = 24
-ROWS, COLS = 27, 21
-WIDTH, HEIGHT = COLS * TILE_SIZE, ROWS * TILE_SIZE
+from game import DOWN, LEFT, LEVEL, RIGHT, TICK_RATE, UP, Game, ghosts_for
+from maze import Maze, generate
+from render import TILE_SIZE, Board, Camera
 
-# Set up screen
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Pac-Man")
+FPS = 60  # frames drawn per second; the game itself moves at TICK_RATE
+MAX_CATCH_UP = 5  # most ticks run in one frame after a stall, so it never falls further and further behind
+VIEW_COLS, VIEW_ROWS = 33, 27  # the most tiles the window shows; bigger mazes scroll
 
-clock = pygame.time.Clock()
-FPS = 10
+HERE = os.path.dirname(os.path.abspath(__file__))
+GHOST_IMAGES = ['red_ghost.png', 'pink_ghost.png', 'blue_ghost.png', 'green_ghost.png', 'yellow_ghost.png']
 
-start_x = 10
-start_y = 21
+KEYS = {pygame.K_w: UP, pygame.K_a: LEFT, pygame.K_s: DOWN, pygame.K_d: RIGHT}
 
-pac = pygame.Rect(start_x * 24, start_y * 24, 24, 24)
-pacGrid = [start_x, start_y]
-pacPosit = [pac.x, pac.y]
-#####
-pacCurrentDir = Vector2(1, 0) # start off right first
-RED_GHOST_IMAGE = pygame.image.load('red_ghost.png').convert_alpha()
-PINK_GHOST_IMAGE = pygame.image.load('pink_ghost.png').convert_alpha()
-#####
-# . - Dots
-# # - Walls
-# b - Gate
-maze = [
-    ["#", "#", "#", "#", "#", "#", "#", "#", "#", "#", "#", "#", "#", "#", "#", "#", "#", "#", "#", "#", "#"],
-    ["#", ".", ".", ".", ".", ".", ".", ".", ".", ".", "#", ".", ".", ".", ".", ".", ".", ".", ".", ".", "#"],
-    ["#", ".", "#", "#", "#", ".", "#", "#", "#", ".", "#", ".", "#", "#", "#", ".", "#", "#", "#", ".", "#"],
-    ["#", ".", "#", " ", "#", ".", "#", " ", "#", ".", "#", ".", "#", " ", "#", ".", "#", " ", "#", ".", "#"],
-    ["#", ".", "#", "#", "#", ".", "#", "#", "#", ".", "#", ".", "#", "#", "#", ".", "#", "#", "#", ".", "#"],
-    ["#", ".", ".", ".", ".", ".", ".", ".", ".", ".", ".", ".", ".", ".", ".", ".", ".", ".", ".", ".", "#"],
-    ["#", ".", "#", "#", "#", ".", "#", ".", "#", "#", "#", "#", "#", ".", "#", ".", "#", "#", "#", ".", "#"],
-    ["#", ".", "#", "#", "#", ".", "#", ".", "#", "#", "#", "#", "#", ".", "#", ".", "#", "#", "#", ".", "#"],
-    ["#", ".", ".", ".", ".", ".", "#", ".", ".", ".", "#", ".", ".", ".", "#", ".", ".", ".", ".", ".", "#"],
-    ["#", "#", "#", "#", "#", ".", "#", "#", "#", ".", "#", ".", "#", "#", "#", ".", "#", "#", "#", "#", "#"],
-    [" ", " ", " ", " ", "#", ".", "#", " ", " ", " ", " ", " ", " ", " ", "#", ".", "#", " ", " ", " ", " "],
-    [" ", " ", " ", " ", "#", ".", "#", " ", "#", "b", "b", "b", "#", " ", "#", ".", "#", " ", " ", " ", " "],
-    ["#", "#", "#", "#", "#", ".", "#", " ", "#", " ", " ", " ", "#", " ", "#", ".", "#", "#", "#", "#", "#"],
-    ["#", ".", ".", ".", ".", ".", " ", " ", "#", " ", " ", " ", "#", " ", " ", ".", ".", ".", ".", ".", "#"],
-    ["#", "#", "#", "#", "#", ".", "#", " ", "#", " ", " ", " ", "#", " ", "#", ".", "#", "#", "#", "#", "#"],
-    [" ", " ", " ", " ", "#", ".", "#", " ", "#", "#", "#", "#", "#", " ", "#", ".", "#", " ", " ", " ", " "],
-    [" ", " ", " ", " ", "#", ".", "#", " ", " ", " ", " ", " ", " ", " ", "#", ".", "#", " ", " ", " ", " "],
-    ["#", "#", "#", "#", "#", ".", "#", "#", "#", ".", "#", ".", "#", "#", "#", ".", "#", "#", "#", "#", "#"],
-    ["#", ".", ".", ".", ".", ".", "#", ".", ".", ".", "#", ".", ".", ".", "#", ".", ".", ".", ".", ".", "#"],
-    ["#", ".", "#", "#", "#", ".", "#", ".", "#", "#", "#", "#", "#", ".", "#", ".", "#", "#", "#", ".", "#"],
-    ["#", ".", "#", "#", "#", ".", "#", ".", "#", "#", "#", "#", "#", ".", "#", ".", "#", "#", "#", ".", "#"],
-    ["#", ".", ".", ".", ".", ".", ".", ".", ".", ".", ".", ".", ".", ".", ".", ".", ".", ".", ".", ".", "#"],
-    ["#", ".", "#", "#", "#", ".", "#", "#", "#", ".", "#", ".", "#", "#", "#", ".", "#", "#", "#", ".", "#"],
-    ["#", ".", "#", " ", "#", ".", "#", " ", "#", ".", "#", ".", "#", " ", "#", ".", "#", " ", "#", ".", "#"],
-    ["#", ".", "#", "#", "#", ".", "#", "#", "#", ".", "#", ".", "#", "#", "#", ".", "#", "#", "#", ".", "#"],
-    ["#", ".", ".", ".", ".", ".", ".", ".", ".", ".", "#", ".", ".", ".", ".", ".", ".", ".", ".", ".", "#"],
-    ["#", "#", "#", "#", "#", "#", "#", "#", "#", "#", "#", "#", "#", "#", "#", "#", "#", "#", "#", "#", "#"]
-]
-
-
-class pellet(pygame.sprite.Sprite):
-    def __init__(self, col, x, y):
-        super().__init__()
-        self.image = pygame.Surface((5, 5))
-        self.image.fill(col)
-        self.rect = self.image.get_rect()
-        self.rect.center = (x, y)
-
-
-pellets = pygame.sprite.Group()
-
-class Ghost:
-    ghosts = []
-
-    directions = [
-        (1, 0),
-        (-1, 0),
-        (0, 1),
-        (0, -1)
-    ]
-
-    def __init__(self, sprite, x, y):
-        self.sprite = pygame.transform.scale(sprite, (TILE_SIZE, TILE_SIZE))
-        self.x = x
-        self.y = y
-        self.grid = [x // TILE_SIZE, y // TILE_SIZE]  # grid coords
-        self.dir = (1, 0)  # move right by default
-        self.rect = pygame.Rect(self.x, self.y, TILE_SIZE, TILE_SIZE)
-        Ghost.ghosts.append(self)  # append into instance class
-
-    # Check which directions are available
-    def available_moves(self, maze):
-        moves = []
-        for dx, dy in Ghost.directions:
-            nx, ny = self.grid[0] + dx, self.grid[1] + dy
-
-            if maze[ny][nx] != "#":
-                moves.append((dx, dy))
-
-        return moves
-
-    # Choosing which moves using available_moves
-    def choose_move(self, maze):
-        moves = self.available_moves(maze)
-
-        reverse = (-self.dir[0], -self.dir[1])
-        if reverse in moves and len(moves) > 1:
-            moves.remove(reverse)
-
-        # Update direction
-        self.dir = random.choice(moves)
-
-    # Updating instance info to actually move
-    def move(self):
-        self.grid[0] += self.dir[0]
-        self.grid[1] += self.dir[1]
-        self.x = self.grid[0] * TILE_SIZE
-        self.y = self.grid[1] * TILE_SIZE
-        self.rect.topleft = (self.x, self.y)
 
 #####
-    def draw(self):
-        screen.blit(self.sprite, (self.x, self.y), area=(0, 0, TILE_SIZE, TILE_SIZE))
-#####
-
-def DisplayMaze():
-    for row in range(len(maze)):
-        for col in range(len(maze[row])):
-            tile = maze[row][col]
-            x, y = col * TILE_SIZE, row * TILE_SIZE
-            if tile == '#':
-                # wall
-                pygame.draw.rect(screen, (52, 52, 255), (x, y, TILE_SIZE, TILE_SIZE))
-            elif tile == '.':
-                # pellet
-                pel = pellet("white", x + (TILE_SIZE // 2), y + (TILE_SIZE // 2))
-                pellets.add(pel)
-                pellets.update(pac, maze)
-                pellets.draw(screen)
-            elif tile == 'b':
-                # Gate
-                pygame.draw.rect(screen, (52, 52, 255), (x, y + 7.5, TILE_SIZE, TILE_SIZE - 15))
-
-
-# Game Loop
-ghosts = [
-    Ghost(RED_GHOST_IMAGE, 10 * TILE_SIZE, 10 * TILE_SIZE),
-    Ghost(PINK_GHOST_IMAGE, 9 * TILE_SIZE, 12 * TILE_SIZE)
-]
-while True:
-    screen.fill((0, 0, 0))
-    for pel in pellets:
-        pel.kill()
-    DisplayMaze()
-
-    for ghost in ghosts:
-        if ghost.x % TILE_SIZE == 0 and ghost.y % TILE_SIZE == 0:
-            ghost.choose_move(maze)
-
-        ghost.move()
-
-    for ghost in ghosts:
-        ghost.draw()
-        #pygame.draw.rect(screen, (255, 0, 0), (ghost.x, ghost.y, TILE_SIZE, TILE_SIZE))
-
-######
-    # Input
-    for event in pygame.event.get():
-        if event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_ESCAPE:
-                sys.exit()
-            elif event.key == pygame.K_a:
-                if maze[pacGrid[1]][pacGrid[0] - 1] != "#":
-                    pacCurrentDir = Vector2(-1, 0)
-            elif event.key == pygame.K_s:
-                if maze[pacGrid[1] + 1][pacGrid[0]] != "#":
-                    pacCurrentDir = Vector2(0, 1)
-            elif event.key == pygame.K_w:
-                if maze[pacGrid[1] - 1][pacGrid[0]] != "#":
-                    pacCurrentDir = Vector2(0, -1)
-            elif event.key == pygame.K_d:
-                if maze[pacGrid[1]][pacGrid[0] + 1] != "#":
-                    pacCurrentDir = Vector2(1, 0)
-        elif event.type == pygame.QUIT:
-            sys.exit()
-
-    # player movement
-
-    if maze[pacGrid[1] + int(pacCurrentDir.y)][pacGrid[0] + int(pacCurrentDir.x)] != "#":
-        pacPosit[1] += int(24*pacCurrentDir.y)
-        pacGrid[1] += int(pacCurrentDir.y)
-        pacGrid[0] += int(pacCurrentDir.x)
-        pacPosit[0] += int(24*pacCurrentDir.x)
+# Ticks and frames
+#
+# The game moves in whole tiles, TICK_RATE times a second. The screen is drawn
+# FPS times a second, and in between two ticks everything is drawn part of the
+# way from the tile it was on to the tile it is on now, so it glides instead
+# of jumping. A key press is queued in the game straight away and used at the
+# next tick the way is open (see Game.turn).
 #####
 
-    pac.y = pacPosit[1]
-    pac.x = pacPosit[0]
-
-    if maze[pacGrid[1]][pacGrid[0]] == ".":
-        maze[pacGrid[1]][pacGrid[0]] = " "
-
-    for ghost in ghosts:
-        if pac.colliderect(ghost.rect):
-            print("GAME OVER")
-            pygame.quit()
-            sys.exit()
-
-    # Other process
-    # Display scene
-    # Game over condition
-
-    pygame.draw.rect(screen, (255, 255, 0), pac)
-    pygame.display.flip()
-    clock.tick(FPS)
+class Ticker:
+    # Says how many game ticks are due each frame, and how far (0 to 1) the frame is past the last one
+    def __init__(self, rate):
+        self.step = 1 / rate
+        self.last = time.perf_counter()
+        self.owed = 0.0
+
+    def due(self):
+        now = time.perf_counter()
+        self.owed += now - self.last
+        self.last = now
+        ticks = int(self.owed / self.step)
+        self.owed -= ticks * self.step
+        return min(ticks, MAX_CATCH_UP)
+
+    def between(self):
+        return self.owed / self.step
+
+
+class Latency:
+    # Time from a key press to the first frame on screen drawn from a tick that had seen it
+    def __init__(self):
+        self.pressed = []  # key presses no tick has seen yet
+        self.ticked = []  # seen by a tick, not on screen yet
+        self.times = []
+
+    def press(self):
+        self.pressed.append(time.perf_counter())
+
+    def tick(self):
+        self.ticked += self.pressed
+        self.pressed = []
+
+    def shown(self):
+        now = time.perf_counter()
+        self.times += [now - pressed for pressed in self.ticked]
+        self.ticked = []
+
+    def report(self):
+        if not self.times:
+            return "input latency: no key presses"
+        times = sorted(self.times)
+        return (f"input latency over {len(times)} key presses: mean {1000 * sum(times) / len(times):.0f} ms, "
+                f"95% {1000 * times[int(0.95 * (len(times) - 1))]:.0f} ms, max {1000 * times[-1]:.0f} ms")
+
+
+def glide(before, after, cols, part):
+    # (col, row) part of the way from tile `before` to tile `after`. A jump of more than a tile isn't glided
+    before_row, before_col = np.divmod(before, cols)
+    after_row, after_col = np.divmod(after, cols)
+    part = np.where(np.abs(after_col - before_col) + np.abs(after_row - before_row) > 1, 1.0, part)
+    return before_col + (after_col - before_col) * part, before_row + (after_row - before_row) * part
+
+
+def main():
+    # python main.py                        the normal maze
+    # python main.py --maze big.pmz         a maze saved by maze.py (or a .txt one)
+    # python main.py --generate 1000 1000   a new random maze
+    # python main.py --ghosts 1000          a swarm of extra ghosts (stress test)
+    # python main.py --tick-rate 15 --fps 144
+    parser = argparse.ArgumentParser(description="Pac-Man")
+    parser.add_argument("--maze", help="maze file to play (.txt or .pmz)")
+    parser.add_argument("--generate", type=int, nargs=2, metavar=("COLS", "ROWS"), help="play a new random maze")
+    parser.add_argument("--seed", type=int, default=None, help="seed for --generate")
+    parser.add_argument("--ghosts", type=int, default=0, help="extra ghosts for a swarm stress test")
+    parser.add_argument("--tick-rate", type=int, default=TICK_RATE, help="game ticks (tiles moved) per second")
+    parser.add_argument("--fps", type=int, default=FPS, help="frames drawn per second")
+    args = parser.parse_args()
+
+    if args.maze:
+        maze = Maze.load(args.maze)
+    elif args.generate:
+        maze = generate(*args.generate, seed=args.seed)
+    else:
+        maze = LEVEL
+
+    pygame.init()
+
+    # Set up screen
+    width = min(maze.cols, VIEW_COLS) * TILE_SIZE
+    height = min(maze.rows, VIEW_ROWS) * TILE_SIZE
+    screen = pygame.display.set_mode((width, height))
+    pygame.display.set_caption("Pac-Man")
+    clock = pygame.time.Clock()
+
+    ghost_sprites = [pygame.transform.scale(pygame.image.load(os.path.join(HERE, name)).convert_alpha(),
+                                            (TILE_SIZE, TILE_SIZE)) for name in GHOST_IMAGES]
+
+    # The rules all live in game.py - this is one game (n = 1) with a window on it
+    game = Game(maze=maze, ghosts=ghosts_for(maze, args.ghosts), tick_rate=args.tick_rate)
+    ghosts = game.ghosts
+    camera = Camera(maze, width, height)
+    board = Board(maze, game.pellets[0])
+    ticker = Ticker(args.tick_rate)
+    latency = Latency()
+
+    def quit_game(message=None):
+        if message:
+            print(message)
+        print(latency.report())
+        pygame.quit()
+        sys.exit()
+
+    pac_before = game.pac.copy()
+    ghosts_before = ghosts.cell[:len(ghosts)].copy()
+    eaten = None  # the tile of the pellet pac-man is gliding onto
+
+    # Game Loop
+    while True:
+        # Input
+        for event in pygame.event.get():
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    quit_game()
+                elif event.key in KEYS:
+                    game.turn(KEYS[event.key])
+                    latency.press()
+            elif event.type == pygame.QUIT:
+                quit_game()
+
+        for _ in range(ticker.due()):
+            pac_before = game.pac.copy()
+            ghosts_before = ghosts.cell[:len(ghosts)].copy()
+            if eaten is not None:
+                board.eat(*eaten)  # he has finished gliding onto it
+                eaten = None
+            game.tick()
+            latency.tick()
+            if game.eaten[0]:
+                eaten = divmod(int(game.pac[0]), maze.cols)[::-1]
+            if game.dead[0]:
+                quit_game("GAME OVER")
+
+        part = ticker.between()
+        pac_col, pac_row = glide(pac_before, game.pac, maze.cols, part)
+        pac_col, pac_row = float(pac_col[0]), float(pac_row[0])
+        camera.follow((pac_col + 0.5) * TILE_SIZE, (pac_row + 0.5) * TILE_SIZE)
+        board.draw(screen, camera)
+
+        # Only the ghosts the camera can see are drawn
+        cols, rows = glide(ghosts_before, ghosts.cell[:len(ghosts)], maze.cols, part)
+        first_col, first_row, last_col, last_row = camera.tiles()
+        seen = (cols > first_col - 1) & (cols < last_col + 1) & (rows > first_row - 1) & (rows < last_row + 1)
+        screen.blits([(ghost_sprites[kind], (round(col * TILE_SIZE) - camera.x, round(row * TILE_SIZE) - camera.y))
+                      for kind, col, row in zip(ghosts.kind[:len(ghosts)][seen].tolist(),
+                                                cols[seen].tolist(), rows[seen].tolist())],
+                     doreturn=False)
+
+        pygame.draw.rect(screen, (255, 255, 0),
+                         (round(pac_col * TILE_SIZE) - camera.x, round(pac_row * TILE_SIZE) - camera.y,
+                          TILE_SIZE, TILE_SIZE))
+        pygame.display.flip()
+        latency.shown()
+        clock.tick(args.fps)
+
+
+if __name__ == "__main__":
+    main()
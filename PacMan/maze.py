@@ -0,0 +1,194 @@
+import struct
+
+import numpy as np
+
+#####
+# Mazes: loading, saving and making new ones
+#
+# A maze is one byte per tile in a bytearray, using the same characters as
+# the level in game.py ('#' wall, '.' pellet, ' ' empty, 'b' gate). NumPy
+# looks at the same bytes as a rows x cols grid, so nothing is copied and a
+# 1000 x 1000 maze is just 1 MB.
+#
+# Files:
+#   text (.txt)   one line per row of tiles, plus 'P' for pac-man's start
+#                 and 'G' for each ghost's start (both are empty tiles)
+#   binary (.pmz) a small header and then 2 bits per tile
+#
+#     python maze.py generate 1000 1000 big.pmz --seed 1
+#     python main.py --maze big.pmz
+#####
+
+WALL, PELLET, EMPTY, GATE = b"#", b".", b" ", b"b"
+CODES = (EMPTY, WALL, PELLET, GATE)  # the 2-bit number of each tile in a binary file
+
+MAGIC = b"PMAZ"
+VERSION = 1
+HEADER = struct.Struct("<4sHIIIII")  # magic, version, cols, rows, start col, start row, ghost count
+
+
+class Maze:
+    def __init__(self, tiles, rows, cols, start, ghosts):
+        self.tiles = tiles  # bytearray, row * cols + col
+        self.rows = rows
+        self.cols = cols
+        self.grid = np.frombuffer(self.tiles, dtype=np.uint8).reshape(rows, cols)
+        self.start = tuple(start)  # pac-man's (col, row)
+        self.ghosts = [tuple(spawn) for spawn in ghosts]  # each ghost's (col, row)
+
+    def __reduce__(self):
+        # Pickled (to send to another process) as the bytes, so grid is made again on the other side
+        return Maze, (self.tiles, self.rows, self.cols, self.start, self.ghosts)
+
+    def key(self):
+        # Two mazes with the same key are the same maze
+        return bytes(self.tiles), self.rows, self.cols
+
+    @classmethod
+    def from_rows(cls, rows, start=None, ghosts=None):
+        # From a list of rows, each a string or a list of one-character strings
+        ghosts = list(ghosts or [])
+        cols = max(len(row) for row in rows)
+        tiles = bytearray()
+        for r, row in enumerate(rows):
+            line = "".join(row).ljust(cols)
+            for c, char in enumerate(line):
+                if char == "P":
+                    start = (c, r)
+                elif char == "G":
+                    ghosts.append((c, r))
+            tiles += line.replace("P", " ").replace("G", " ").encode("ascii")
+        if start is None:
+            raise ValueError("the maze has no start for pac-man")
+        return cls(tiles, len(rows), cols, start, ghosts)
+
+    # ----- files -----
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        if data.startswith(MAGIC):
+            return cls.from_bytes(data)
+        return cls.from_rows(data.decode("ascii").splitlines())
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            if path.endswith(".txt"):
+                f.write(self.to_text().encode("ascii"))
+            else:
+                f.write(self.to_bytes())
+
+    def to_text(self):
+        lines = [bytearray(self.tiles[r * self.cols:(r + 1) * self.cols]) for r in range(self.rows)]
+        for col, row in self.ghosts:
+            lines[row][col] = ord("G")
+        lines[self.start[1]][self.start[0]] = ord("P")
+        return "\n".join(line.decode("ascii") for line in lines) + "\n"
+
+    def to_bytes(self):
+        codes = np.zeros(256, dtype=np.uint8)
+        for number, char in enumerate(CODES):
+            codes[char[0]] = number
+        values = codes[np.frombuffer(self.tiles, dtype=np.uint8)]
+        values = np.concatenate([values, np.zeros(-len(values) % 4, dtype=np.uint8)]).reshape(-1, 4)
+        packed = values[:, 0] << 6 | values[:, 1] << 4 | values[:, 2] << 2 | values[:, 3]
+        header = HEADER.pack(MAGIC, VERSION, self.cols, self.rows, *self.start, len(self.ghosts))
+        spawns = np.array(self.ghosts, dtype="<u4").tobytes()
+        return header + spawns + packed.astype(np.uint8).tobytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, version, cols, rows, start_col, start_row, count = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"not a version {VERSION} maze file")
+        pos = HEADER.size
+        ghosts = np.frombuffer(data, dtype="<u4", count=2 * count, offset=pos).reshape(-1, 2).tolist()
+        pos += 8 * count
+        packed = np.frombuffer(data, dtype=np.uint8, offset=pos)
+        values = np.stack([packed >> 6, packed >> 4 & 3, packed >> 2 & 3, packed & 3], axis=1).ravel()
+        chars = np.frombuffer(b"".join(CODES), dtype=np.uint8)
+        tiles = bytearray(chars[values[:rows * cols]].tobytes())
+        return cls(tiles, rows, cols, (start_col, start_row), ghosts)
+
+
+def generate(cols, rows, seed=None, loops=0.1, ghosts=4):
+    """
+    A new random maze. It starts as a "perfect" maze (exactly one way between
+    any two places) carved by a random walk, and then `loops` of the walls
+    left between two corridors are knocked out, so there are loops to run
+    round like a real Pac-Man maze. Every open tile starts with a pellet.
+    """
+    rng = np.random.default_rng(seed)
+    # Rooms are on the odd tiles. Walk from room to room, knocking out the
+    # wall between, and go back along the walk when there is nowhere new to go
+    room_cols, room_rows = (cols - 1) // 2, (rows - 1) // 2
+    if room_cols < 1 or room_rows < 1:
+        raise ValueError("a maze needs to be at least 3 x 3")
+    grid = np.full((rows, cols), WALL[0], dtype=np.uint8)
+    visited = bytearray(room_cols * room_rows)
+    steps = ((1, 0), (-1, 0), (0, 1), (0, -1))
+    order = rng.integers(0, 24, size=room_cols * room_rows)  # a random order of the 4 steps for each room
+    orders = _permutations(steps)
+    stack = [0]
+    visited[0] = 1
+    grid[1, 1] = PELLET[0]
+    while stack:
+        room = stack[-1]
+        rc, rr = room % room_cols, room // room_cols
+        for dx, dy in orders[order[room]]:
+            nc, nr = rc + dx, rr + dy
+            if 0 <= nc < room_cols and 0 <= nr < room_rows and not visited[nr * room_cols + nc]:
+                visited[nr * room_cols + nc] = 1
+                grid[2 * rr + 1 + dy, 2 * rc + 1 + dx] = PELLET[0]
+                grid[2 * nr + 1, 2 * nc + 1] = PELLET[0]
+                stack.append(nr * room_cols + nc)
+                break
+        else:
+            stack.pop()
+
+    # Knock out some of the walls that sit between two corridors to make loops
+    inner = grid[1:-1, 1:-1]
+    walls = inner == WALL[0]
+    across = (grid[1:-1, :-2] != WALL[0]) & (grid[1:-1, 2:] != WALL[0])
+    down = (grid[:-2, 1:-1] != WALL[0]) & (grid[2:, 1:-1] != WALL[0])
+    knock = walls & (across ^ down) & (rng.random(inner.shape) < loops)
+    inner[knock] = PELLET[0]
+
+    # Pac-Man starts in the room nearest the middle, ghosts in random rooms
+    # (not too close to him, if the maze is big enough)
+    start = (2 * (room_cols // 2) + 1, 2 * (room_rows // 2) + 1)
+    room_x, room_y = np.meshgrid(np.arange(room_cols) * 2 + 1, np.arange(room_rows) * 2 + 1)
+    far = np.abs(room_x - start[0]) + np.abs(room_y - start[1]) >= min(8, room_cols + room_rows - 2)
+    far &= (room_x != start[0]) | (room_y != start[1])
+    rooms = np.flatnonzero(far) if far.any() else np.arange(room_cols * room_rows)
+    picks = rng.choice(rooms, size=ghosts, replace=ghosts > len(rooms))
+    spawns = [(int(room_x.flat[i]), int(room_y.flat[i])) for i in picks]
+    for col, row in [start] + spawns:
+        grid[row, col] = EMPTY[0]
+    return Maze(bytearray(grid.tobytes()), rows, cols, start, spawns)
+
+
+def _permutations(items):
+    if len(items) <= 1:
+        return [tuple(items)]
+    return [(item,) + rest for i, item in enumerate(items) for rest in _permutations(items[:i] + items[i + 1:])]
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Make a random Pac-Man maze")
+    parser.add_argument("command", choices=["generate"])
+    parser.add_argument("cols", type=int)
+    parser.add_argument("rows", type=int)
+    parser.add_argument("path", help="where to save it (.txt for text, anything else for binary)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--loops", type=float, default=0.1, help="how many extra walls to knock out (0 to 1)")
+    parser.add_argument("--ghosts", type=int, default=4)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    maze = generate(args.cols, args.rows, args.seed, args.loops, args.ghosts)
+    maze.save(args.path)
+    print(f"made a {args.cols} x {args.rows} maze in {time.perf_counter() - start:.2f}s -> {args.path}")
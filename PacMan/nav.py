@@ -0,0 +1,195 @@
+import heapq
+from array import array
+from collections import OrderedDict
+
+import numpy as np
+
+from maze import WALL
+
+#####
+# Ghost navigation
+#
+# The maze never changes, so it is compiled once into a junction graph:
+#   - a node is any open tile that is NOT a plain corridor tile (so junctions,
+#     dead ends and the odd walled-in tile)
+#   - an edge is the corridor between two nodes, with its length in tiles
+#
+# Every corridor tile belongs to exactly one edge, so "how far is tile c from
+# the target?" only needs the distances of the two nodes at the ends of c's
+# corridor. Those come from a shortest-path search over the nodes only, which
+# is much smaller than the whole grid. The searches are cached per node, so
+# while Pac-Man walks along a corridor nothing has to be searched again.
+#
+# On a big maze a search only goes `radius` tiles out. Anything further away
+# is scored as FAR plus the straight-line (up/down + left/right) distance, so
+# a far-off ghost still heads the right way and the cost of a search doesn't
+# grow with the maze.
+#
+# Tiles are numbered row * cols + col, the same as the pellets in game.py.
+# The tables are arrays (not lists) so a 1000 x 1000 maze stays small.
+#####
+
+# Order ghosts prefer when two moves are equally good (up, left, down, right)
+DIRECTIONS = [(0, -1), (-1, 0), (0, 1), (1, 0)]
+INF = float("inf")
+FAR = 1_000_000_000  # Added to the distance of anything the search didn't reach
+
+
+class Navigator:
+    def __init__(self, maze, radius=128, cache_size=128):
+        self.rows, self.cols = maze.rows, maze.cols
+        self.radius = INF if radius is None else radius
+        self.cache_size = cache_size
+        rows, cols = self.rows, self.cols
+
+        is_open = maze.grid != WALL[0]
+        self.open = bytearray(is_open.astype(np.uint8).tobytes())
+
+        # neighbour[cell, d] = the tile one step from cell in DIRECTIONS[d], or -1 for a wall
+        padded = np.pad(is_open, 1)
+        cells = np.arange(rows * cols).reshape(rows, cols)
+        self.neighbour = np.full((rows * cols, 4), -1, dtype=np.int64)
+        for d, (dx, dy) in enumerate(DIRECTIONS):
+            ok = is_open & padded[1 + dy:1 + dy + rows, 1 + dx:1 + dx + cols]
+            self.neighbour[:, d] = np.where(ok, cells + dy * cols + dx, -1).ravel()
+        self._next = array("q", self.neighbour.tobytes())  # the same, flat, for quick reading one at a time
+
+        self._build_graph(is_open)
+        self._build_snap(is_open)
+        self._fields = OrderedDict()  # node -> {node: distance} for the nodes it reached
+        self.searches = 0  # How many node searches have been run (the rest came from the cache)
+
+    def exits(self, cell):
+        # The (direction, next tile) moves out of a tile
+        nxt = self._next
+        return [(DIRECTIONS[d], nxt[4 * cell + d]) for d in range(4) if nxt[4 * cell + d] >= 0]
+
+    # ----- compiling the maze -----
+    def _build_graph(self, is_open):
+        size = self.rows * self.cols
+        degree = (self.neighbour >= 0).sum(axis=1)
+        node_cells = np.flatnonzero(is_open.ravel() & (degree != 2))
+        node_of = np.full(size, -1, dtype=np.int64)
+        node_of[node_cells] = np.arange(len(node_cells))
+
+        self.node_of = array("q", node_of.tobytes())  # cell -> node number, or -1 for corridor tiles
+        self.nodes = array("q", node_cells.tobytes())  # node number -> cell
+        # A corridor tile is (edge, tiles from the edge's first node)
+        self.edge_of = array("q", np.full(size, -1, dtype=np.int64).tobytes())
+        self.offset = array("q", bytes(8 * size))
+        self.edges = []  # (first node, last node, length)
+        self.links = [[] for _ in range(len(self.nodes))]  # node -> [(other node, length)]
+        node_of, edge_of, offset, nxt = self.node_of, self.edge_of, self.offset, self._next
+
+        def walk(start, cell):
+            # Follow a corridor from a node until it reaches another node
+            path, prev = [], start
+            while node_of[cell] == -1 and edge_of[cell] == -1:
+                path.append(cell)
+                for d in range(4):
+                    n = nxt[4 * cell + d]
+                    if n >= 0 and n != prev:
+                        prev, cell = cell, n
+                        break
+                else:
+                    break  # Only happens on a loop with no node, handled below
+            return path, cell
+
+        def add_edge(a, path, b):
+            edge = len(self.edges)
+            self.edges.append((a, b, len(path) + 1))
+            for i, c in enumerate(path):
+                edge_of[c] = edge
+                offset[c] = i + 1
+            self.links[a].append((b, len(path) + 1))
+            if b != a:
+                self.links[b].append((a, len(path) + 1))
+
+        for a, cell in enumerate(self.nodes):
+            for d in range(4):
+                n = nxt[4 * cell + d]
+                if n < 0:
+                    continue
+                if node_of[n] != -1:
+                    if a < node_of[n]:
+                        add_edge(a, [], node_of[n])  # Two nodes side by side
+                elif edge_of[n] == -1:
+                    path, end = walk(cell, n)
+                    add_edge(a, path, node_of[end])
+
+        # A ring of corridor with no junction on it: make one of its tiles a node
+        left = np.flatnonzero(is_open.ravel() & (np.frombuffer(node_of, dtype=np.int64) == -1)
+                              & (np.frombuffer(edge_of, dtype=np.int64) == -1))
+        for cell in left.tolist():
+            if node_of[cell] == -1 and edge_of[cell] == -1:
+                a = node_of[cell] = len(self.nodes)
+                self.nodes.append(cell)
+                self.links.append([])
+                path, _ = walk(cell, self.exits(cell)[0][1])
+                add_edge(a, path, a)
+
+    def _build_snap(self, is_open):
+        # Targets can be inside a wall (a corner, or 4 tiles ahead of Pac-Man).
+        # snap[cell] is the nearest open tile of the biggest connected area.
+        # First find the areas by joining up the nodes at the ends of every corridor
+        parent = list(range(len(self.nodes)))
+
+        def root(a):
+            while parent[a] != a:
+                parent[a] = parent[parent[a]]
+                a = parent[a]
+            return a
+
+        for a, b, length in self.edges:
+            parent[root(a)] = root(b)
+        snap = np.full((self.rows, self.cols), -1, dtype=np.int64)
+        if len(self.nodes):
+            area_of_node = np.array([root(a) for a in range(len(self.nodes))], dtype=np.int64)
+            node_of = np.frombuffer(self.node_of, dtype=np.int64)
+            edge_of = np.frombuffer(self.edge_of, dtype=np.int64)
+            first_node = np.array([a for a, b, length in self.edges] or [0], dtype=np.int64)
+            owner = np.where(node_of != -1, node_of, first_node[np.maximum(edge_of, 0)])
+            area = np.where(is_open.ravel(), area_of_node[owner], -1)
+            biggest = np.bincount(area[area >= 0]).argmax()
+            snap.ravel()[area == biggest] = np.flatnonzero(area == biggest)
+        # Then spread outwards one tile at a time until every tile has a nearest open tile
+        while (snap == -1).any() and (snap != -1).any():
+            padded = np.pad(snap, 1, constant_values=-1)
+            grown = snap.copy()
+            for dx, dy in DIRECTIONS:
+                from_there = padded[1 + dy:1 + dy + self.rows, 1 + dx:1 + dx + self.cols]
+                take = (grown == -1) & (from_there != -1)
+                grown[take] = from_there[take]
+            snap = grown
+        self.snap = array("q", snap.tobytes())
+
+    # ----- distances -----
+    def node_field(self, node):
+        # Distances from one node to the nodes within `radius`, cached (least recently used are forgotten)
+        field = self._fields.get(node)
+        if field is not None:
+            self._fields.move_to_end(node)
+            return field
+        self.searches += 1
+        radius = self.radius
+        field = {node: 0}
+        heap = [(0, node)]
+        while heap:
+            d, a = heapq.heappop(heap)
+            if d > field[a]:
+                continue
+            for b, length in self.links[a]:
+                nd = d + length
+                if nd <= radius and nd < field.get(b, INF):
+                    field[b] = nd
+                    heapq.heappush(heap, (nd, b))
+        self._fields[node] = field
+        if len(self._fields) > self.cache_size:
+            self._fields.popitem(last=False)
+        return field
+
+    def target(self, col, row):
+        # The tile to head for, moved onto the nearest open tile if it is a wall or off the grid
+        col = min(max(col, 0), self.cols - 1)
+        row = min(max(row, 0), self.rows - 1)
+        return self.snap[row * self.cols + col]
@@ -0,0 +1,98 @@
+from collections import OrderedDict
+
+import numpy as np
+import pygame
+
+from maze import GATE, WALL
+
+#####
+# Drawing the maze through a camera
+#
+# The maze is cut into square chunks of tiles. A chunk is only drawn (walls,
+# gate and the pellets still on it) the first time the camera can see it,
+# and then kept as a Surface; eating a pellet only clears that pellet on its
+# chunk. Each frame just blits the few chunks in view, so the memory used and
+# the time a frame takes depend on the size of the window, not the maze.
+#####
+
+TILE_SIZE = 24
+WALL_COLOUR = (52, 52, 255)
+PELLET_COLOUR = (255, 255, 255)
+PELLET_SIZE = 5
+CHUNK = 16  # tiles along each side of a chunk
+
+
+def pellet_rect(col, row):
+    rect = pygame.Rect(0, 0, PELLET_SIZE, PELLET_SIZE)
+    rect.center = (col * TILE_SIZE + TILE_SIZE // 2, row * TILE_SIZE + TILE_SIZE // 2)
+    return rect
+
+
+class Camera:
+    # The part of the maze the window shows, in pixels, kept centred on a point
+    def __init__(self, maze, width, height):
+        self.width, self.height = width, height
+        self.max_x = max(0, maze.cols * TILE_SIZE - width)
+        self.max_y = max(0, maze.rows * TILE_SIZE - height)
+        self.x = self.y = 0
+
+    def follow(self, x, y):
+        self.x = min(max(int(x) - self.width // 2, 0), self.max_x)
+        self.y = min(max(int(y) - self.height // 2, 0), self.max_y)
+
+    def tiles(self):
+        # The (first col, first row, last col, last row) of the tiles in view
+        return (self.x // TILE_SIZE, self.y // TILE_SIZE,
+                (self.x + self.width - 1) // TILE_SIZE, (self.y + self.height - 1) // TILE_SIZE)
+
+
+class Board:
+    def __init__(self, maze, pellets, max_chunks=64):
+        self.maze = maze
+        self.pellets = pellets  # one byte per tile, 1 = still there (a row of Game.pellets)
+        self.max_chunks = max_chunks
+        self._chunks = OrderedDict()  # (chunk col, chunk row) -> Surface, least recently seen first
+        self.drawn = 0  # how many chunks have been drawn (the rest came from the cache)
+
+    def _draw_chunk(self, cx, cy):
+        self.drawn += 1
+        maze = self.maze
+        surface = pygame.Surface((CHUNK * TILE_SIZE, CHUNK * TILE_SIZE)).convert()
+        surface.fill((0, 0, 0))
+        col0, row0 = cx * CHUNK, cy * CHUNK
+        tiles = maze.grid[row0:row0 + CHUNK, col0:col0 + CHUNK]
+        for row, col in np.argwhere(tiles == WALL[0]).tolist():
+            # wall
+            pygame.draw.rect(surface, WALL_COLOUR, (col * TILE_SIZE, row * TILE_SIZE, TILE_SIZE, TILE_SIZE))
+        for row, col in np.argwhere(tiles == GATE[0]).tolist():
+            # Gate
+            pygame.draw.rect(surface, WALL_COLOUR, (col * TILE_SIZE, row * TILE_SIZE + 7.5, TILE_SIZE, TILE_SIZE - 15))
+        pellets = self.pellets.reshape(maze.rows, maze.cols)[row0:row0 + CHUNK, col0:col0 + CHUNK]
+        for row, col in np.argwhere(pellets == 1).tolist():
+            surface.fill(PELLET_COLOUR, pellet_rect(col, row))
+        return surface
+
+    def chunk(self, cx, cy):
+        surface = self._chunks.get((cx, cy))
+        if surface is None:
+            surface = self._chunks[cx, cy] = self._draw_chunk(cx, cy)
+            if len(self._chunks) > self.max_chunks:
+                self._chunks.popitem(last=False)  # Forget the chunk seen longest ago
+        else:
+            self._chunks.move_to_end((cx, cy))
+        return surface
+
+    def eat(self, col, row):
+        # A pellet was eaten: clear it from its chunk (if that chunk has been drawn)
+        surface = self._chunks.get((col // CHUNK, row // CHUNK))
+        if surface is not None:
+            surface.fill((0, 0, 0), pellet_rect(col % CHUNK, row % CHUNK))
+
+    def draw(self, screen, camera):
+        first_col, first_row, last_col, last_row = camera.tiles()
+        blits = []
+        for cy in range(first_row // CHUNK, last_row // CHUNK + 1):
+            for cx in range(first_col // CHUNK, last_col // CHUNK + 1):
+                blits.append((self.chunk(cx, cy),
+                              (cx * CHUNK * TILE_SIZE - camera.x, cy * CHUNK * TILE_SIZE - camera.y)))
+        screen.blits(blits, doreturn=False)
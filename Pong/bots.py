@@ -0,0 +1,158 @@
+# ============================================================================
+# COMPUTER PLAYERS - each one turns a Match into the keys it would press
+# ============================================================================
+# A bot is anything you can call as bot(match, player) that returns input
+# bits (see match.py): player 0 is red on the left, 1 is blue on the right.
+# make_bot(name, seed) makes a fresh one, so bots that use random numbers
+# always play the same way with the same seed.
+import random  # Some bots wobble or wander
+from collections import deque  # What the predictor saw over the last few frames
+
+from match import BALL_SIZE, DOWN, HEIGHT, PADDLE_H, PADDLE_STEP, PADDLE_W, UP
+
+
+def _paddle_y(match, player):
+    return match.p1y if player == 0 else match.p2y
+
+
+def _towards(match, player, target, slack):
+    # --- Keys to move the paddle's middle to height target (it stays put within slack) --- #
+    middle = _paddle_y(match, player) + PADDLE_H / 2
+    if target < middle - slack:
+        return UP
+    if target > middle + slack:
+        return DOWN
+    return 0
+
+
+def tracker(match, player):
+    # --- Keep the paddle's middle level with the ball's --- #
+    return _towards(match, player, match.ball_pos[1] + BALL_SIZE / 2, 20)
+
+
+class Lazy:
+    # Only follows the ball while it is coming towards it, aiming a little off, else goes back to the middle
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+        self.aim = 0.0
+
+    def __call__(self, match, player):
+        coming = match.speed[0] < 0 if player == 0 else match.speed[0] > 0
+        if not coming:
+            self.aim = self.rng.uniform(-60, 60)
+            return _towards(match, player, HEIGHT / 2, 30)
+        return _towards(match, player, match.ball_pos[1] + BALL_SIZE / 2 + self.aim, 20)
+
+
+class Wanderer:
+    # Holds a random key (or nothing) for a random number of frames
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+        self.keys, self.left = 0, 0
+
+    def __call__(self, match, player):
+        if self.left == 0:
+            self.keys, self.left = self.rng.choice((0, UP, DOWN)), self.rng.randint(10, 60)
+        self.left -= 1
+        return self.keys
+
+
+# ============================================================================
+# THE PREDICTOR - works out where the ball will be, instead of chasing it
+# ============================================================================
+# Between paddles the ball goes in a straight line and bounces off the top
+# and bottom walls. Bouncing off a wall is like carrying straight on into a
+# mirror image of the court, so: work out how high the ball WOULD be if there
+# were no walls, then fold that height back into the court. That takes the
+# same few sums however fast the ball is and however many times it bounces,
+# so it never has to step through the frames one by one.
+FACES = (50 + PADDLE_W, 1100)  # x of the front of the red and the blue paddle
+SPAN = HEIGHT - BALL_SIZE  # The ball's top can be anywhere from 0 to here
+
+
+def fold(y, vy):
+    # --- Put a height from the "no walls" court back into the real one (and which way it is going) --- #
+    y %= 2 * SPAN
+    if y > SPAN:
+        return 2 * SPAN - y, -vy
+    return y, vy
+
+
+def intercept(x, y, vx, vy, player, last_touch="R", multiplier=1.1):
+    """
+    (height of the ball's top, frames until then) when the ball reaches
+    player's paddle (0 = red on the left, 1 = blue on the right). If the
+    ball is going the other way it is followed to the other paddle and
+    back, as if that paddle hits it (speeding it up like Match does).
+    """
+    frames = 0.0
+    if vx == 0:
+        return fold(y, vy)[0], float("inf")
+    going = 0 if vx < 0 else 1  # which paddle the ball is heading for
+    if going != player:
+        # To the other paddle first, and back off it
+        edge = FACES[going] if going == 0 else FACES[going] - BALL_SIZE
+        t = (edge - x) / vx
+        frames += t
+        x, (y, vy) = edge, fold(y + vy * t, vy)
+        vx = -vx
+        if last_touch != "RB"[going]:
+            vx, vy = vx * multiplier, vy * multiplier
+    edge = FACES[player] if player == 0 else FACES[player] - BALL_SIZE
+    t = (edge - x) / vx
+    return fold(y + vy * t, vy)[0], frames + t
+
+
+class Predictor:
+    """
+    Moves to where the ball is going to arrive. `delay` is how many frames
+    late it sees the ball (its reaction time) and `error` is how many pixels
+    its guess can be off by (a new random miss each time the ball comes
+    towards it). With anticipate it also works out where the ball will come
+    back to while it is going away, otherwise it waits in the middle.
+    """
+    def __init__(self, seed=None, delay=0, error=0.0, anticipate=True):
+        self.rng = random.Random(seed)
+        self.seen = deque(maxlen=delay + 1)  # the ball over the last delay + 1 frames, oldest first
+        self.error = error
+        self.anticipate = anticipate
+        self.coming = None
+        self.miss = 0.0
+
+    def __call__(self, match, player):
+        self.seen.append((match.ball_pos[0], match.ball_pos[1], match.speed[0], match.speed[1], match.last_touch))
+        x, y, vx, vy, last_touch = self.seen[0]
+        coming = vx < 0 if player == 0 else vx > 0
+        if coming != self.coming:
+            self.coming = coming
+            self.miss = self.rng.gauss(0, self.error) if self.error else 0.0
+        if not coming and not self.anticipate:
+            return _towards(match, player, HEIGHT / 2, PADDLE_STEP)
+        ball_y, _ = intercept(x, y, vx, vy, player, last_touch, match.speed_multiplier)
+        return _towards(match, player, ball_y + BALL_SIZE / 2 + self.miss, PADDLE_STEP)
+
+
+# (reaction delay in frames, error in pixels, anticipate) for each difficulty
+LEVELS = {
+    "easy": (30, 50, False),
+    "medium": (15, 45, False),
+    "hard": (6, 15, True),
+    "perfect": (0, 0, True),
+}
+
+
+def _predictor(level):
+    delay, error, anticipate = LEVELS[level]
+    return lambda seed: Predictor(seed, delay, error, anticipate)
+
+
+BOTS = {
+    "tracker": lambda seed: tracker,
+    "lazy": Lazy,
+    "wanderer": Wanderer,
+}
+BOTS.update({level: _predictor(level) for level in LEVELS})
+
+
+def make_bot(name, seed=None):
+    return BOTS[name](seed)
@@ -0,0 +1,116 @@
+# ============================================================================
+# ONE MATCH OF PONG - all of its state in one object, with no window
+# ============================================================================
+# Everything that changes during a match (paddles, ball, score, ...) lives in
+# a Match, and step() moves it on by one frame given the two players' inputs.
+# Nothing else is used - no clock, no randomness, no pygame - so the same
+# match with the same inputs always comes out exactly the same. That is what
+# lets the network game (net.py) wind a match back and play it again when
+# the server says something different happened.
+import struct  # Packs numbers into bytes (and back again)
+
+from physics import move_ball
+
+# An input is a small number made of these bits, so it fits in one byte
+UP, DOWN, RESTART = 1, 2, 4
+
+WIDTH, HEIGHT = 1200, 600
+PADDLE_W, PADDLE_H = 50, 200
+BALL_SIZE = 50
+PADDLE_STEP = 5  # How far a paddle moves in one frame
+FPS = 120  # Frames per second the match is played at
+
+# paddle ys, ball x/y, speed x/y, points, last touch (0 = red, 1 = blue), game over, frame
+STATE = struct.Struct("<iiddddHHB?I")
+
+
+class Match:
+    def __init__(self, win_condition=10, speed_multiplier=1.1):
+        self.win_condition = win_condition
+        self.speed_multiplier = speed_multiplier
+        self.frame = 0  # Frames stepped so far (restarting doesn't set it back to 0)
+        self.set_up()
+
+    # Put it in the set up function so the match can be restarted
+    def set_up(self):
+        self.p1y = 300
+        self.p2y = 300
+        self.ball_pos = [600, 300]  # top-left of the ball
+        self.speed = [4, 4]
+        self.points = [0, 0]
+        self.last_touch = "R"
+        self.game_over = False
+
+    def copy(self):
+        match = Match.__new__(Match)
+        match.__dict__.update(self.__dict__)
+        match.ball_pos, match.speed, match.points = list(self.ball_pos), list(self.speed), list(self.points)
+        return match
+
+    def paddles(self):
+        # --- The paddles as (x, y, width, height): red on the left, blue on the right --- #
+        return (50, self.p1y, PADDLE_W, PADDLE_H), (1100, self.p2y, PADDLE_W, PADDLE_H)
+
+    def winner(self):
+        # --- 0 for red, 1 for blue, None while still playing --- #
+        if not self.game_over:
+            return None
+        return 0 if self.points[0] >= self.win_condition else 1
+
+    # Start and reset ball at centre, keeping the way it was going
+    def reset_ball(self):
+        self.ball_pos = [600 - BALL_SIZE // 2, 300 - BALL_SIZE // 2]
+        self.speed = [4 if self.speed[0] >= 0 else -4, 4 if self.speed[1] >= 0 else -4]
+
+    # Increase speed everytime a player touches the ball (only once per touch)
+    def touch_paddle(self, i):
+        side = "R" if i == 0 else "B"
+        if self.last_touch != side:
+            self.speed[0] *= self.speed_multiplier
+            self.speed[1] *= self.speed_multiplier
+        self.last_touch = side
+
+    def step(self, p1_input, p2_input):
+        # --- One frame, with each player's input bits --- #
+        self.frame += 1
+        if (p1_input | p2_input) & RESTART:
+            self.set_up()
+        if self.game_over:
+            return  # frozen until someone restarts
+
+        if p1_input & UP and self.p1y > 0:
+            self.p1y -= PADDLE_STEP
+        if p1_input & DOWN and self.p1y < HEIGHT - PADDLE_H:
+            self.p1y += PADDLE_STEP
+        if p2_input & UP and self.p2y > 0:
+            self.p2y -= PADDLE_STEP
+        if p2_input & DOWN and self.p2y < HEIGHT - PADDLE_H:
+            self.p2y += PADDLE_STEP
+
+        move_ball(self.ball_pos, self.speed, (BALL_SIZE, BALL_SIZE), self.paddles(), 0, HEIGHT, self.touch_paddle)
+
+        # increase point for the other side when ball moves past the player
+        scored = None
+        if self.ball_pos[0] > WIDTH:
+            scored = 0
+        elif self.ball_pos[0] < 0:
+            scored = 1
+        if scored is not None:
+            self.points[scored] += 1
+            if self.points[scored] >= self.win_condition:
+                self.game_over = True
+            else:
+                self.reset_ball()
+
+    # ----- sending it over the network -----
+    def pack(self):
+        return STATE.pack(self.p1y, self.p2y, *self.ball_pos, *self.speed, *self.points,
+                          self.last_touch == "B", self.game_over, self.frame)
+
+    def unpack(self, data, offset=0):
+        # --- Overwrite this match with one made by pack() --- #
+        (self.p1y, self.p2y, x, y, vx, vy, p1_point, p2_point,
+         blue, self.game_over, self.frame) = STATE.unpack_from(data, offset)
+        self.ball_pos, self.speed, self.points = [x, y], [vx, vy], [p1_point, p2_point]
+        self.last_touch = "B" if blue else "R"
+        return self
@@ -0,0 +1,406 @@
+# ============================================================================
+# NETWORK PONG - one server owns the match, the players never wait for it
+# ============================================================================
+# The SERVER plays the real match (match.py) at FPS frames a second, using the
+# inputs the two players send it. Every frame it sends both of them what
+# happened.
+#
+# A CLIENT doesn't wait for that. It plays the match itself straight away
+# with its own key presses, so its paddle moves on the very frame the key is
+# pressed, however slow the network is. It runs a little AHEAD of the server
+# (about one round trip) so its inputs get there just before the server needs
+# them. It has to GUESS what the other player is doing: it guesses "the same
+# as the last thing the server said they did".
+#
+# When the server's version of a frame arrives and it doesn't match the
+# guess, the client ROLLS BACK: it takes the server's match for that frame
+# and plays the frames since then again with its own inputs (which it kept).
+# Because a Match with the same inputs always comes out the same, this ends
+# up exactly where the server will be, apart from any new guesses.
+#
+# Packets are sent over UDP, so some get lost or arrive out of order. Every
+# input packet repeats the last few inputs so a lost one doesn't matter, and
+# old server packets are ignored.
+#
+#     python net.py server                              on one computer
+#     python net.py client --host 192.168.1.20          for each player
+#     python net.py client --latency 0.04 --loss 0.05   pretend the network is bad
+#     python net.py test --latency 0.04 --loss 0.1      two bots on this computer, no window
+import argparse  # Reads the options given on the command line
+import heapq  # Keeps the delayed packets in the order they are due
+import random  # Decides which packets a pretend bad network loses
+import socket  # Sends and receives packets
+import struct  # Packs numbers into bytes (and back again)
+import threading  # The test runs the server and two clients at once
+import time
+
+from bots import tracker
+from match import BALL_SIZE, DOWN, FPS, HEIGHT, RESTART, UP, WIDTH, Match
+from match import STATE as MATCH_STATE
+
+PORT = 50007
+HISTORY = 4 * FPS  # Frames of inputs and guesses a client keeps for rolling back
+REDUNDANT = 16  # Each input packet repeats this many of the newest inputs, in case some are lost
+LEAD_MARGIN = 3  # Extra frames a client runs ahead of the server, for packets that are a bit late
+MAX_CATCH_UP = 4  # Most frames a client plays in one go to catch up (unless it is very far behind)
+
+# Packets. The first byte says what kind it is. Anything on the port can send us
+# a packet, so one that is too short for its kind is ignored
+HELLO, WELCOME, INPUT, STATE = b"H", b"W", b"I", b"S"
+WELCOME_PACKET = struct.Struct("<cB")  # kind, which player you are (0 = red, 1 = blue)
+INPUT_HEAD = struct.Struct("<cBIdB")  # kind, player, newest frame, client's clock, count - then count inputs, oldest first
+STATE_HEAD = struct.Struct("<cdBB")  # kind, your clock sent back, red's input, blue's input - then Match.pack()
+
+
+class Link:
+    """
+    A UDP socket that can pretend to be a bad network: everything sent is
+    held back for `latency` seconds (plus up to `jitter` more, so packets
+    can overtake each other) and `loss` of the packets never arrive.
+    """
+    def __init__(self, sock, latency=0.0, jitter=0.0, loss=0.0, seed=None):
+        self.sock = sock
+        self.sock.setblocking(False)
+        self.latency, self.jitter, self.loss = latency, jitter, loss
+        self.rng = random.Random(seed)
+        self.queue = []  # (when to send, number, data, address)
+        self.sent = 0
+        self.lost = 0
+
+    def send(self, data, address):
+        self.sent += 1
+        if self.loss and self.rng.random() < self.loss:
+            self.lost += 1
+            return
+        if not self.latency and not self.jitter:
+            self.sock.sendto(data, address)
+            return
+        due = time.perf_counter() + self.latency + self.rng.random() * self.jitter
+        heapq.heappush(self.queue, (due, self.sent, data, address))
+
+    def flush(self):
+        # --- Really send the held-back packets that are due --- #
+        now = time.perf_counter()
+        while self.queue and self.queue[0][0] <= now:
+            _, _, data, address = heapq.heappop(self.queue)
+            self.sock.sendto(data, address)
+
+    def receive(self):
+        # --- Every packet waiting, as (data, address) --- #
+        self.flush()
+        packets = []
+        while True:
+            try:
+                packets.append(self.sock.recvfrom(2048))
+            except BlockingIOError:
+                return packets
+            except ConnectionResetError:
+                continue  # Windows says this when a packet we sent wasn't wanted
+
+
+class Server:
+    def __init__(self, link, players=2):
+        self.link = link
+        self.players = players  # With 1, blue never moves (for trying it out alone)
+        self.match = Match()
+        self.addresses = [None, None]
+        self.inputs = [{}, {}]  # each player's inputs that have arrived: {frame: input}
+        self.held = [0, 0]  # the input each player used last, used again if the next one is late
+        self.newest = [0, 0]  # the newest frame each player has sent an input for
+        self.clock = [0.0, 0.0]  # each player's clock in their newest input, sent back for the ping
+        self.late = 0  # inputs that arrived after their frame had been played
+        self.log = []  # the inputs used on every frame, to check the match plays back the same
+
+    def ready(self):
+        return all(self.addresses[:self.players])
+
+    def handle(self):
+        # --- Read every packet that has arrived --- #
+        for data, address in self.link.receive():
+            kind = data[:1]
+            if kind == HELLO:
+                if address in self.addresses:
+                    player = self.addresses.index(address)
+                elif None in self.addresses[:self.players]:
+                    player = self.addresses.index(None)
+                    self.addresses[player] = address
+                else:
+                    continue  # Full
+                self.link.send(WELCOME_PACKET.pack(WELCOME, player), address)
+            elif kind == INPUT:
+                if len(data) < INPUT_HEAD.size:
+                    continue
+                _, player, newest, clock, count = INPUT_HEAD.unpack_from(data)
+                if len(data) < INPUT_HEAD.size + count or player > 1 or self.addresses[player] != address:
+                    continue
+                for i, bits in enumerate(data[INPUT_HEAD.size:INPUT_HEAD.size + count]):
+                    frame = newest - count + 1 + i
+                    if frame > self.match.frame:
+                        self.inputs[player][frame] = bits
+                    elif frame > self.newest[player]:
+                        self.late += 1
+                if newest > self.newest[player]:
+                    self.newest[player] = newest
+                    self.clock[player] = clock
+
+    def tick(self):
+        # --- Play one frame and tell both players what happened --- #
+        frame = self.match.frame + 1
+        used = []
+        for player in (0, 1):
+            bits = self.inputs[player].pop(frame, self.held[player])
+            self.held[player] = bits & ~RESTART  # A late input only repeats the keys held, not a restart
+            used.append(bits)
+        self.match.step(*used)
+        self.log.append(tuple(used))
+        state = self.match.pack()
+        for player, address in enumerate(self.addresses):
+            if address is not None:
+                self.link.send(STATE_HEAD.pack(STATE, self.clock[player], *used) + state, address)
+
+    def run(self, stop=None):
+        # --- Play at FPS frames a second (for ever, or until stop is set) --- #
+        step = 1 / FPS
+        next_frame = time.perf_counter()
+        while stop is None or not stop.is_set():
+            self.handle()
+            now = time.perf_counter()
+            if not self.ready():
+                next_frame = now
+            elif now >= next_frame:
+                self.tick()
+                next_frame = max(next_frame + step, now - MAX_CATCH_UP * step)
+            self.link.flush()
+            time.sleep(0.001)
+
+
+class Client:
+    def __init__(self, link, address):
+        self.link = link
+        self.address = address  # the server's
+        self.player = None  # 0 = red, 1 = blue, once the server has said
+        self.match = Match()  # what we think is happening (a little ahead of the server)
+        self.server = None  # the newest Match the server sent
+        self.server_inputs = (0, 0)  # the inputs the server used on that frame
+        self.server_time = 0.0  # when it arrived
+        self.rtt = None  # round trip time in seconds
+        self.inputs = {}  # our inputs: {frame: input}
+        self.guesses = {}  # what we thought each frame would be: {frame: Match.pack()}
+        self.confirmed = 0  # server frames that matched our guess
+        self.rollbacks = 0  # server frames that didn't, so we rolled back
+        self.deepest = 0  # most frames played again in one roll back
+
+    def join(self, timeout=10.0):
+        # --- Say hello until the server says which player we are --- #
+        give_up = time.perf_counter() + timeout
+        while self.player is None:
+            if time.perf_counter() > give_up:
+                raise TimeoutError(f"no answer from a server at {self.address}")
+            self.link.send(HELLO, self.address)
+            for _ in range(20):
+                self.receive()
+                if self.player is not None:
+                    break
+                time.sleep(0.005)
+
+    def receive(self):
+        fresh = False
+        for data, _ in self.link.receive():
+            kind = data[:1]
+            if kind == WELCOME:
+                if len(data) == WELCOME_PACKET.size and data[1] <= 1:
+                    self.player = WELCOME_PACKET.unpack_from(data)[1]
+            elif kind == STATE:
+                if len(data) < STATE_HEAD.size + MATCH_STATE.size:
+                    continue
+                _, clock, red, blue = STATE_HEAD.unpack_from(data)
+                match = Match().unpack(data, STATE_HEAD.size)
+                if self.server is not None and match.frame <= self.server.frame:
+                    continue  # Older than what we have (it was overtaken on the way)
+                self.server, self.server_inputs = match, (red, blue)
+                self.server_time = time.perf_counter()
+                if clock:
+                    ping = self.server_time - clock
+                    self.rtt = ping if self.rtt is None else 0.9 * self.rtt + 0.1 * ping
+                fresh = True
+        if fresh:
+            self.roll_back()
+
+    def _guess_other(self):
+        # The other player is guessed to keep doing what the server last saw them do
+        return self.server_inputs[1 - self.player] & ~RESTART
+
+    def roll_back(self):
+        # --- The server has told us about a frame: play again from there if we guessed it wrong --- #
+        server = self.server
+        if server.frame > self.match.frame or server.frame <= self.match.frame - HISTORY:
+            self.match = server.copy()  # We are behind (or lost track): just take the server's match
+            return
+        if self.guesses.get(server.frame) == server.pack():
+            self.confirmed += 1
+            return
+        self.rollbacks += 1
+        self.deepest = max(self.deepest, self.match.frame - server.frame)
+        until = self.match.frame
+        self.match = server.copy()
+        while self.match.frame < until:
+            self._play(self.inputs.get(self.match.frame + 1, 0))
+
+    def _play(self, bits):
+        # --- One frame of our match, with our input and a guess of the other player's --- #
+        other = self._guess_other()
+        self.match.step(*((bits, other) if self.player == 0 else (other, bits)))
+        self.guesses[self.match.frame] = self.match.pack()
+        self.guesses.pop(self.match.frame - HISTORY, None)
+
+    def frames_due(self):
+        # --- How many frames to play now to stay about one round trip ahead of the server --- #
+        # The server is on roughly server.frame + (time since it sent that + half a round
+        # trip), and an input sent now takes another half a round trip to get there
+        ahead = (time.perf_counter() - self.server_time + (self.rtt or 0.0)) * FPS + LEAD_MARGIN
+        behind = self.server.frame + ahead - self.match.frame
+        if behind > 2 * MAX_CATCH_UP:
+            return int(behind)  # Just joined, or the network stalled: jump straight there
+        if behind > 1.5:
+            return min(int(behind), MAX_CATCH_UP)
+        if behind < -1.5:
+            return 0  # Too far ahead: wait a frame for the server
+        return 1
+
+    def update(self, bits):
+        # --- Called once a frame with our keys. Plays as many frames as are due --- #
+        self.receive()
+        if self.server is None:
+            self.link.flush()
+            return 0
+        due = self.frames_due()
+        for _ in range(due):
+            frame = self.match.frame + 1
+            self.inputs[frame] = bits
+            self.inputs.pop(frame - HISTORY, None)
+            self._play(bits)
+            first = max(frame - REDUNDANT + 1, 1)
+            sent = bytes(self.inputs.get(f, 0) for f in range(first, frame + 1))
+            self.link.send(INPUT_HEAD.pack(INPUT, self.player, frame, time.perf_counter(), len(sent)) + sent,
+                           self.address)
+        self.link.flush()
+        return due
+
+
+def open_link(args, bind=("", 0)):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(bind)
+    return Link(sock, args.latency, args.jitter, args.loss, args.seed)
+
+
+def play(client):
+    # --- A window for one player. W/S or the arrow keys move your paddle, R restarts --- #
+    import pygame
+
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    clock = pygame.time.Clock()
+    font = pygame.font.SysFont("Courier New", 50)
+    small = pygame.font.SysFont("Courier New", 20)
+    colour = ("RED", "BLUE")[client.player]
+    while True:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                return
+        keys = pygame.key.get_pressed()
+        if keys[pygame.K_ESCAPE]:
+            return
+        bits = ((UP if keys[pygame.K_w] or keys[pygame.K_UP] else 0)
+                | (DOWN if keys[pygame.K_s] or keys[pygame.K_DOWN] else 0)
+                | (RESTART if keys[pygame.K_r] else 0))
+        client.update(bits)
+
+        match = client.match
+        screen.fill((0, 0, 0))
+        if client.server is None:
+            screen.blit(font.render("Waiting for the other player...", True, (255, 255, 255)), (150, 250))
+        else:
+            red, blue = match.paddles()
+            pygame.draw.rect(screen, (0, 0, 255), blue)
+            pygame.draw.rect(screen, (255, 0, 0), red)
+            pygame.draw.rect(screen, (12, 243, 145), (round(match.ball_pos[0]), round(match.ball_pos[1]),
+                                                      BALL_SIZE, BALL_SIZE))
+            screen.blit(font.render(f"{match.points[0]}:{match.points[1]}", True, (255, 255, 255)), (565, 100))
+            if match.game_over:
+                winner = ("RED", "BLUE")[match.winner()]
+                screen.blit(font.render(f"{winner} wins! Press R to restart", True, (255, 255, 255)), (130, 250))
+        ping = f"{1000 * client.rtt:.0f} ms" if client.rtt is not None else "-"
+        screen.blit(small.render(f"you are {colour}   ping {ping}   roll backs {client.rollbacks}",
+                                 True, (120, 120, 120)), (10, 570))
+        pygame.display.flip()
+        clock.tick(FPS)
+
+
+def test(args):
+    # --- A server and two bot clients on this computer, with no window --- #
+    server = Server(open_link(args, ("127.0.0.1", 0)))
+    address = server.link.sock.getsockname()
+    stop = threading.Event()
+    threading.Thread(target=server.run, args=(stop,), daemon=True).start()
+
+    clients = [Client(open_link(args), address) for _ in range(2)]
+    for client in clients:
+        client.join()
+
+    def run_bot(client):
+        next_frame = time.perf_counter()
+        end = next_frame + args.seconds
+        while time.perf_counter() < end:
+            client.update(tracker(client.match, client.player))
+            next_frame += 1 / FPS
+            time.sleep(max(0.0, next_frame - time.perf_counter()))
+
+    threads = [threading.Thread(target=run_bot, args=(client,)) for client in clients]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stop.set()
+
+    # The server's match must come out the same when its inputs are played again
+    replay = Match()
+    for red, blue in server.log:
+        replay.step(red, blue)
+    print(f"server: {server.match.frame} frames, score {server.match.points[0]}:{server.match.points[1]}, "
+          f"{server.late} late inputs, replays the same: {replay.pack() == server.match.pack()}")
+    for client in clients:
+        checked = client.confirmed + client.rollbacks
+        print(f"{('red', 'blue')[client.player]:>4}: ping {1000 * (client.rtt or 0):.0f} ms, "
+              f"{client.match.frame - client.server.frame} frames ahead of the server, "
+              f"guessed {client.confirmed}/{checked} server frames right, "
+              f"{client.rollbacks} roll backs (deepest {client.deepest} frames), "
+              f"{client.link.lost}/{client.link.sent} packets lost")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pong over the network")
+    parser.add_argument("mode", choices=["server", "client", "test"])
+    parser.add_argument("--host", default="127.0.0.1", help="the server's address (client)")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--players", type=int, default=2, choices=[1, 2], help="server: 1 to play alone")
+    parser.add_argument("--latency", type=float, default=0.0, help="pretend every packet takes this long (seconds)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="and up to this much longer (seconds)")
+    parser.add_argument("--loss", type=float, default=0.0, help="pretend this fraction of packets are lost")
+    parser.add_argument("--seed", type=int, default=None, help="seed for the pretend losses")
+    parser.add_argument("--seconds", type=float, default=10.0, help="how long the test plays for")
+    args = parser.parse_args()
+
+    if args.mode == "server":
+        server = Server(open_link(args, ("", args.port)), players=args.players)
+        print(f"Pong server on port {args.port}")
+        server.run()
+    elif args.mode == "client":
+        client = Client(open_link(args), (args.host, args.port))
+        client.join()
+        play(client)
+    else:
+        test(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# ============================================================================
+# SWEPT BALL PHYSICS - WHEN during a frame does the ball hit something?
+# ============================================================================
+# The old way moved the ball and THEN checked if it was touching a paddle.
+# Once the ball is fast it can jump from one side of a paddle (or a wall) to
+# the other in a single frame and never be touching it, so it goes straight
+# through. Here we work out the exact TIME in the frame when the ball first
+# touches something, move it there, bounce it, and carry on with the rest of
+# the frame - as many times as it needs.
+#
+# Everything is a box (x, y, width, height). The ball moves in a straight
+# line between bounces, so for each side of a box "when does the ball reach
+# it?" is just distance / speed.
+MAX_BOUNCES = 100  # Most bounces worked out in one frame (only a ridiculously fast ball gets near this)
+EPSILON = 1e-9  # Times closer than this count as the same moment
+
+
+def _axis_times(pos, size, speed, lo, hi):
+    # --- When the ball's edges [pos, pos + size] start and stop overlapping [lo, hi] along one axis --- #
+    if speed > 0:
+        return (lo - (pos + size)) / speed, (hi - pos) / speed
+    if speed < 0:
+        return (hi - pos) / speed, (lo - (pos + size)) / speed
+    if pos + size > lo and pos < hi:
+        return -float("inf"), float("inf")  # Not moving this way, but already lined up
+    return float("inf"), -float("inf")  # Not moving this way, and never lined up
+
+
+def time_of_impact(pos, size, speed, box):
+    """
+    When the ball (top-left pos, size (w, h), moving by speed each frame)
+    first touches box, and which way it hits it: ("x" for a side, "y" for the
+    top or bottom). None if it is not moving into the box at all.
+    """
+    x_in, x_out = _axis_times(pos[0], size[0], speed[0], box[0], box[0] + box[2])
+    y_in, y_out = _axis_times(pos[1], size[1], speed[1], box[1], box[1] + box[3])
+    t_in, t_out = max(x_in, y_in), min(x_out, y_out)
+    if t_in >= t_out or t_out <= EPSILON:
+        return None
+    return t_in, "x" if x_in >= y_in else "y"
+
+
+def move_ball(pos, speed, size, paddles, top, bottom, on_paddle=None, dt=1.0):
+    """
+    Move the ball for dt frames, bouncing off the walls at top and bottom
+    and off the paddles. pos ([x, y]) and speed ([x, y] per frame) are
+    changed in place. on_paddle(i) is called right after the ball bounces
+    off paddles[i] (it can change speed, e.g. to make the ball faster).
+    Returns how many bounces there were.
+    """
+    left = dt
+    bounces = 0
+    while left > EPSILON and bounces < MAX_BOUNCES:
+        hit, when, side = None, left, None
+
+        # The walls (only the one the ball is heading for)
+        if speed[1] < 0:
+            t = (top - pos[1]) / speed[1]
+        elif speed[1] > 0:
+            t = (bottom - size[1] - pos[1]) / speed[1]
+        else:
+            t = float("inf")
+        if t < when:
+            hit, when, side = "wall", max(t, 0.0), "y"
+
+        # The paddles (skipping any the ball can't get near across the rest of the frame)
+        reach_lo = pos[0] + min(speed[0] * left, 0)
+        reach_hi = pos[0] + size[0] + max(speed[0] * left, 0)
+        for i, paddle in enumerate(paddles):
+            if paddle[0] >= reach_hi or paddle[0] + paddle[2] <= reach_lo:
+                continue
+            impact = time_of_impact(pos, size, speed, paddle)
+            if impact is None:
+                continue
+            t, axis = impact
+            if t < 0:
+                # Already inside it (the paddle moved onto the ball): only send the
+                # ball back if it is still heading into the paddle's middle
+                middle = paddle[0] + paddle[2] / 2
+                if (middle - (pos[0] + size[0] / 2)) * speed[0] <= 0:
+                    continue
+                t, axis = 0.0, "x"
+            if t < when:
+                hit, when, side = i, t, axis
+
+        pos[0] += speed[0] * when
+        pos[1] += speed[1] * when
+        left -= when
+        if hit is None:
+            break
+        bounces += 1
+        if side == "x":
+            speed[0] = -speed[0]
+        else:
+            speed[1] = -speed[1]
+        if hit != "wall" and on_paddle is not None:
+            on_paddle(hit)
+    return bounces
@@ -0,0 +1,98 @@
+# ============================================================================
+# BOT TOURNAMENT - thousands of bot-against-bot matches on every CPU core
+# ============================================================================
+# Every pair of bots plays the same number of matches, half of them with each
+# bot on the left. A match has no window and no clock, it is just Match.step
+# over and over, so it runs as fast as the computer can go. The matches are
+# shared out between processes (one per CPU core by default) and the results
+# are added up into a league table at the end.
+#
+#     python tournament.py --matches 2000
+#     python tournament.py --bots tracker lazy --matches 500 --workers 4
+import argparse  # Reads the options given on the command line
+import itertools  # Every pair of bots
+import multiprocessing  # Plays matches on every CPU core at the same time
+import os  # How many CPU cores there are
+import time  # To measure how fast the tournament goes
+
+from bots import BOTS, make_bot
+from match import FPS, Match
+
+MAX_FRAMES = 10 * 60 * FPS  # A match still going after 10 (game) minutes is a draw
+
+
+def play_match(job):
+    # --- One match: (red bot, blue bot, seed) -> (red bot, blue bot, points, frames, winner or None) --- #
+    red_name, blue_name, seed, max_frames = job
+    red, blue = make_bot(red_name, 2 * seed), make_bot(blue_name, 2 * seed + 1)
+    match = Match()
+    while not match.game_over and match.frame < max_frames:
+        match.step(red(match, 0), blue(match, 1))
+    return red_name, blue_name, tuple(match.points), match.frame, match.winner()
+
+
+def schedule(names, matches, seed=0, max_frames=MAX_FRAMES):
+    # --- At least `matches` jobs (rounded up), shared evenly between every pair and both sides --- #
+    pairings = [(a, b) for a, b in itertools.permutations(names, 2)]
+    per_pairing = max(1, -(-matches // len(pairings)))  # Divide, rounding up
+    return [(red, blue, seed + i * len(pairings) + p, max_frames)
+            for i in range(per_pairing) for p, (red, blue) in enumerate(pairings)]
+
+
+def tally(results):
+    # --- Add up the results into {bot: {"played", "won", "drawn", "lost", "for", "against"}} and total frames --- #
+    table = {}
+    frames = 0
+    for red, blue, points, played, winner in results:
+        frames += played
+        for side, name in enumerate((red, blue)):
+            row = table.setdefault(name, {"played": 0, "won": 0, "drawn": 0, "lost": 0, "for": 0, "against": 0})
+            row["played"] += 1
+            row["for"] += points[side]
+            row["against"] += points[1 - side]
+            if winner is None:
+                row["drawn"] += 1
+            elif winner == side:
+                row["won"] += 1
+            else:
+                row["lost"] += 1
+    return table, frames
+
+
+def run(jobs, workers=None):
+    # --- Play every job, spread over `workers` processes (all CPU cores if None) --- #
+    if workers == 1:
+        return [play_match(job) for job in jobs]
+    with multiprocessing.Pool(workers) as pool:
+        chunksize = max(1, len(jobs) // ((workers or os.cpu_count()) * 8))
+        return list(pool.imap_unordered(play_match, jobs, chunksize=chunksize))
+
+
+def print_table(table):
+    print(f"{'bot':<12}{'played':>8}{'won':>7}{'drawn':>7}{'lost':>7}{'for':>8}{'against':>9}{'win %':>8}")
+    for name, row in sorted(table.items(), key=lambda item: -item[1]["won"] / item[1]["played"]):
+        print(f"{name:<12}{row['played']:>8}{row['won']:>7}{row['drawn']:>7}{row['lost']:>7}"
+              f"{row['for']:>8}{row['against']:>9}{100 * row['won'] / row['played']:>7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play bots against each other")
+    parser.add_argument("--bots", nargs="+", default=sorted(BOTS), choices=sorted(BOTS))
+    parser.add_argument("--matches", type=int, default=1000, help="matches to play in total (rounded up so every pair plays the same number)")
+    parser.add_argument("--workers", type=int, default=None, help="processes to use (default: every CPU core)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    if len(args.bots) < 2:
+        parser.error("a tournament needs at least two bots")
+
+    jobs = schedule(args.bots, args.matches, args.seed)
+    start = time.perf_counter()
+    table, frames = tally(run(jobs, args.workers))
+    elapsed = time.perf_counter() - start
+    print_table(table)
+    print(f"{len(jobs)} matches ({frames:,} frames) in {elapsed:.1f}s: "
+          f"{len(jobs) / elapsed:,.1f} matches/s, {frames / elapsed:,.0f} frames/s")
+
+
+if __name__ == "__main__":
+    main()